@@ -12,13 +12,9 @@ Supports:
 - Validation and normalization of paths
 """
 
+import functools
 import os
-
-from shared.config import (
-    build_settings as shared_build_settings,
-    load_persistent_config as shared_load_persistent_config,
-    save_persistent_config as shared_save_persistent_config,
-)
+import sys
 
 
 # ------------------------------------------------------------
@@ -36,6 +32,9 @@ DEFAULTS = {
     "QUARANTINE_MODE": False,
     "FORCE_RENAME": False,
     "SKIP_AMBIGUOUS_ISO": True,
+    # When False, files already named with a canonical extension are
+    # counted as correct without reading their header (faster, not strict).
+    "VERIFY_CORRECT_EXT": True,
 
     # Diagnostics
     "DIAGNOSTIC_LEVEL": 2,  # 1=Standard, 2=Deep, 3=Forensic
@@ -51,7 +50,12 @@ DEFAULTS = {
     "CONSOLE_UI_HEIGHT": 12,
 
     # Performance
-    "THREAD_COUNT": 8,
+    "THREAD_COUNT": 0,  # 0 = auto (see worker.default_thread_count)
+    # Reuse detections for files whose (mtime, size) is unchanged since the
+    # last run. CACHE_FILE defaults to extension_repair.cache.json in the
+    # config directory.
+    "DETECTION_CACHE": True,
+    "CACHE_FILE": "",
 
     # Interactive fallback
     "INTERACTIVE_MODE": True,
@@ -61,13 +65,20 @@ DEFAULTS = {
 # ------------------------------------------------------------
 # Interactive helpers
 # ------------------------------------------------------------
+# Path normalization is pure, so repeated prompts and the final
+# normalization pass share results.
+_normpath = functools.lru_cache(maxsize=64)(os.path.normpath)
+
+
 def prompt_path(label, default):
+    # Existence is deliberately not cached: the user may create the
+    # directory between attempts.
     while True:
         v = input(f"{label} [{default}]: ").strip()
         if not v:
             v = default
         if v and os.path.exists(v):
-            return os.path.normpath(v)
+            return _normpath(v)
         print("Path does not exist. Try again.")
 
 
@@ -103,77 +114,85 @@ def prompt_choice(label, default):
 # ------------------------------------------------------------
 # Merge settings
 # ------------------------------------------------------------
+# shared.config is imported inside each wrapper: importing it loads the whole
+# shared package, which callers that only read DEFAULTS don't need.
 def load_persistent_config(config_dir, config_file):
     """Thin wrapper around shared config loader for compatibility."""
+    from shared.config import load_persistent_config as shared_load_persistent_config
+
     return shared_load_persistent_config(config_name=config_file, config_dir=config_dir)
 
 
 def save_persistent_config(config_dir, config_file, settings):
     """Thin wrapper around shared config saver for compatibility."""
+    from shared.config import save_persistent_config as shared_save_persistent_config
+
     return shared_save_persistent_config(settings, config_name=config_file, config_dir=config_dir)
 
 
-def _interactive_update(settings):
+def _prompt_if_missing(settings, overrides, key, prompter, label):
+    """Prompt for key unless the caller already supplied it as an override."""
+    if key not in overrides:
+        settings[key] = prompter(label, settings[key])
+
+
+def _interactive_update(settings, overrides=None):
     if not settings.get("INTERACTIVE_MODE", True):
         return settings
 
-    settings["TARGET_DIRECTORY"] = prompt_path(
-        "Directory to scan", settings["TARGET_DIRECTORY"]
-    )
+    # Headless runs (CI, pipes, toolbox subprocesses) have nobody to answer.
+    if not sys.stdin.isatty():
+        return settings
 
-    settings["IN_PLACE"] = prompt_yes_no(
-        "Repair files in place", settings["IN_PLACE"]
-    )
+    overrides = overrides or {}
 
-    if not settings["IN_PLACE"]:
-        settings["OUTPUT_DIRECTORY"] = prompt_path(
-            "Output directory", settings["OUTPUT_DIRECTORY"]
-        )
+    _prompt_if_missing(settings, overrides, "TARGET_DIRECTORY", prompt_path,
+                       "Directory to scan")
 
-    settings["DRY_RUN"] = prompt_yes_no(
-        "Dry run only", settings["DRY_RUN"]
-    )
+    _prompt_if_missing(settings, overrides, "IN_PLACE", prompt_yes_no,
+                       "Repair files in place")
 
-    settings["REPORT_ONLY"] = prompt_yes_no(
-        "Report only (no renames)", settings["REPORT_ONLY"]
-    )
+    if not settings["IN_PLACE"]:
+        _prompt_if_missing(settings, overrides, "OUTPUT_DIRECTORY", prompt_path,
+                           "Output directory")
+
+    _prompt_if_missing(settings, overrides, "DRY_RUN", prompt_yes_no,
+                       "Dry run only")
 
-    settings["QUARANTINE_MODE"] = prompt_yes_no(
-        "Enable quarantine mode", settings["QUARANTINE_MODE"]
-    )
+    _prompt_if_missing(settings, overrides, "REPORT_ONLY", prompt_yes_no,
+                       "Report only (no renames)")
 
-    settings["FORCE_RENAME"] = prompt_yes_no(
-        "Force rename even if ambiguous", settings["FORCE_RENAME"]
-    )
+    _prompt_if_missing(settings, overrides, "QUARANTINE_MODE", prompt_yes_no,
+                       "Enable quarantine mode")
 
-    settings["SKIP_AMBIGUOUS_ISO"] = prompt_yes_no(
-        "Skip ambiguous ISO BMFF files", settings["SKIP_AMBIGUOUS_ISO"]
-    )
+    _prompt_if_missing(settings, overrides, "FORCE_RENAME", prompt_yes_no,
+                       "Force rename even if ambiguous")
 
-    settings["THREAD_COUNT"] = prompt_int(
-        "Number of threads", settings["THREAD_COUNT"]
-    )
+    _prompt_if_missing(settings, overrides, "SKIP_AMBIGUOUS_ISO", prompt_yes_no,
+                       "Skip ambiguous ISO BMFF files")
 
-    settings["DIAGNOSTIC_LEVEL"] = prompt_choice(
-        "Diagnostic level (1=Standard, 2=Deep, 3=Forensic)",
-        settings["DIAGNOSTIC_LEVEL"]
-    )
+    _prompt_if_missing(settings, overrides, "THREAD_COUNT", prompt_int,
+                       "Number of threads (0 = auto)")
 
-    # Normalize paths
-    if settings["TARGET_DIRECTORY"]:
-        settings["TARGET_DIRECTORY"] = os.path.normpath(settings["TARGET_DIRECTORY"])
+    _prompt_if_missing(settings, overrides, "DIAGNOSTIC_LEVEL", prompt_choice,
+                       "Diagnostic level (1=Standard, 2=Deep, 3=Forensic)")
 
-    if settings["OUTPUT_DIRECTORY"]:
-        settings["OUTPUT_DIRECTORY"] = os.path.normpath(settings["OUTPUT_DIRECTORY"])
+    # Paths supplied as overrides skip prompt_path, so normalize here too
+    # (_normpath is cached, so already-normalized values cost nothing).
+    for key in ("TARGET_DIRECTORY", "OUTPUT_DIRECTORY"):
+        if settings[key]:
+            settings[key] = _normpath(settings[key])
 
     return settings
 
 
 def build_settings(config_dir, config_file, overrides=None):
+    from shared.config import build_settings as shared_build_settings
+
     return shared_build_settings(
         defaults=DEFAULTS,
         overrides=overrides or {},
         config_dir=config_dir,
         config_name=config_file,
-        interactive_fn=_interactive_update,
+        interactive_fn=functools.partial(_interactive_update, overrides=overrides or {}),
     )
\ No newline at end of file
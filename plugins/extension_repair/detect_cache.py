@@ -0,0 +1,75 @@
+"""
+detect_cache.py
+---------------
+
+Persistent detection cache for the Extension Repair Tool.
+
+Reading headers is the dominant cost of a scan, and most files are unchanged
+between runs. The cache maps a path to the detected extension together with
+the file's (mtime_ns, size) at detection time; a later run that sees the same
+stat for that path reuses the extension instead of opening the file.
+
+Only successful detections are stored. Skips (unknown, ambiguous, too small)
+are re-read every run so diagnostics still get their cached headers.
+
+Format (JSON, written atomically):
+    {"version": 1, "entries": {path: [mtime_ns, size, ext], ...}}
+"""
+
+import json
+import os
+
+CACHE_VERSION = 1
+
+
+def load_cache(cache_path):
+    """Return the {path: [mtime_ns, size, ext]} entries, or {} if unusable."""
+    if not cache_path or not os.path.isfile(cache_path):
+        return {}
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, UnicodeDecodeError, ValueError):
+        return {}
+
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def lookup(entries, path, st):
+    """Return the cached extension for path if its stat is unchanged."""
+    cached = entries.get(path)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    return None
+
+
+def merge_entries(old, seen, root):
+    """
+    Combine the previous cache with this run's detections.
+
+    Entries under root that were not seen this run (deleted, renamed or
+    moved files) are dropped; entries for other trees are kept.
+    """
+    prefix = os.path.join(root, "")
+    merged = {path: value for path, value in old.items() if not path.startswith(prefix)}
+    merged.update(seen)
+    return merged
+
+
+def save_cache(cache_path, entries):
+    """Write the cache atomically. Returns False if it could not be written."""
+    cache_dir = os.path.dirname(cache_path)
+    tmp_path = cache_path + ".tmp"
+    try:
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        # Compact separators: the cache grows with the tree, unlike configs
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": entries}, f, separators=(",", ":"))
+        os.replace(tmp_path, cache_path)
+        return True
+    except (OSError, UnicodeEncodeError, ValueError, TypeError):
+        return False
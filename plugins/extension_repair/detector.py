@@ -11,6 +11,7 @@ Handles:
 - ISO BMFF parsing (MP4, MOV, M4V, AVIF, HEIC, etc.)
 - Ambiguity detection for unknown ISO BMFF brands
 - Returning canonical extensions or skip reasons
+- Batch detection across many files with a thread pool
 
 Strict Mode Rules:
 - Only classify when magic bytes match a known signature.
@@ -18,25 +19,64 @@ Strict Mode Rules:
 - No extension-based heuristics.
 """
 
+import functools
 import os
+import struct
 
 from .magic_signatures import (
     SIGNATURE_LENGTH,
-    MAGIC_SIGNATURES,
+    FIXED_SIGS,
+    FIXED_MAGIC_RE,
+    FIXED_MAGIC_EXTS,
+    OFFSET_SIGNATURES,
     RIFF_TYPES,
     ISO_BRANDS,
+    ISO_BRANDS_INT,
+)
+
+# Reads the ISO BMFF brand at offset 8 as an int key for ISO_BRANDS_INT
+_unpack_u32 = struct.Struct(">I").unpack_from
+
+# Classification only ever looks at this many leading bytes (RIFF/ISO
+# subtypes end at byte 12), so results can be memoized on that prefix.
+CLASSIFY_PREFIX_LENGTH = max(
+    [12]
+    + [len(sig) for sig in FIXED_SIGS]
+    + [off + len(sig) for sig, off, _ext in OFFSET_SIGNATURES]
 )
 
 
 # ------------------------------------------------------------
 # Helper: read header bytes
 # ------------------------------------------------------------
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+_FADV_RANDOM = getattr(os, "POSIX_FADV_RANDOM", None)
+
+
 def read_header(path, length=SIGNATURE_LENGTH):
+    """
+    Read the first `length` bytes of a file, or None if it can't be read.
+
+    Uses a raw fd instead of open() so no BufferedReader is built and the
+    read is a single small read() rather than a 4+ KiB buffer fill. Where
+    supported, the kernel is told not to read ahead into the rest of the file.
+    """
+    try:
+        fd = os.open(path, _OPEN_FLAGS)
+    except (OSError, ValueError):
+        return None
+
     try:
-        with open(path, "rb") as f:
-            return f.read(length)
-    except Exception:
+        if _FADV_RANDOM is not None:
+            try:
+                os.posix_fadvise(fd, 0, length, _FADV_RANDOM)
+            except OSError:
+                pass
+        return os.read(fd, length)
+    except OSError:
         return None
+    finally:
+        os.close(fd)
 
 
 # ------------------------------------------------------------
@@ -86,14 +126,8 @@ def detect_iso_bmff(header):
     if header[4:8] != b"ftyp":
         return None
 
-    brand = header[8:12]
-
-    # Known brand?
-    if brand in ISO_BRANDS:
-        return ISO_BRANDS[brand]
-
-    # Unknown brand → ambiguous ISO BMFF
-    return "ambiguous_iso"
+    # Known brand? Unknown brand → ambiguous ISO BMFF
+    return ISO_BRANDS_INT.get(_unpack_u32(header, 8)[0], "ambiguous_iso")
 
 
 # ------------------------------------------------------------
@@ -102,11 +136,18 @@ def detect_iso_bmff(header):
 def detect_fixed_magic(header):
     """
     Check against all fixed signatures (strict).
+
+    Offset-0 signatures are matched by a single precompiled regex whose
+    alternatives are ordered longest first, so the most specific match wins.
     """
     if header is None:
         return None
 
-    for sig, offset, ext in MAGIC_SIGNATURES:
+    match = FIXED_MAGIC_RE.match(header)
+    if match:
+        return FIXED_MAGIC_EXTS[match.lastindex]
+
+    for sig, offset, ext in OFFSET_SIGNATURES:
         if header[offset:offset + len(sig)] == sig:
             return ext
 
@@ -118,6 +159,21 @@ def detect_fixed_magic(header):
 # ------------------------------------------------------------
 def detect_file_type(path):
     """
+    Read a file's header and classify it.
+
+    Returns:
+        (ext, reason) as described in classify_header().
+    """
+    return classify_header(read_header(path))
+
+
+def classify_header(header):
+    """
+    Classify header bytes previously returned by read_header().
+
+    Callers that need the header afterwards (e.g. to cache it for
+    diagnostics) read it once and call this directly.
+
     Returns:
         (ext, reason)
 
@@ -133,32 +189,80 @@ def detect_file_type(path):
         - "ambiguous_riff"
         - "ambiguous_iso"
     """
-    header = read_header(path)
-
     if header is None:
         return None, "unreadable"
 
-    if len(header) < 4:
+    # Real trees repeat a handful of prefixes (JFIF, ftypisom, ...), so
+    # most calls are a slice plus a cache hit.
+    return _classify_prefix(header[:CLASSIFY_PREFIX_LENGTH])
+
+
+@functools.lru_cache(maxsize=4096)
+def _classify_prefix(header):
+    # Single pass: each check is done once, inline, rather than through
+    # detect_fixed_magic / detect_riff / detect_iso_bmff (which remain as
+    # standalone helpers with the same rules).
+    size = len(header)
+    if size < 4:
         return None, "too_small"
 
     # 1. Fixed signatures
-    ext = detect_fixed_magic(header)
-    if ext:
-        return ext, None
+    match = FIXED_MAGIC_RE.match(header)
+    if match:
+        return FIXED_MAGIC_EXTS[match.lastindex], None
+
+    for sig, offset, ext in OFFSET_SIGNATURES:
+        if header[offset:offset + len(sig)] == sig:
+            return ext, None
 
     # 2. RIFF container
-    if header.startswith(b"RIFF"):
-        ext = detect_riff(header)
-        if ext == "ambiguous_riff":
+    if header[:4] == b"RIFF":
+        ext = RIFF_TYPES.get(header[8:12]) if size >= 12 else None
+        if ext is None:
             return None, "ambiguous_riff"
         return ext, None
 
     # 3. ISO BMFF container
-    iso = detect_iso_bmff(header)
-    if iso == "ambiguous_iso":
-        return None, "ambiguous_iso"
-    if iso:
-        return iso, None
+    if size >= 12 and header[4:8] == b"ftyp":
+        ext = ISO_BRANDS_INT.get(_unpack_u32(header, 8)[0])
+        if ext is None:
+            return None, "ambiguous_iso"
+        return ext, None
 
     # 4. Unknown
-    return None, "unknown"
\ No newline at end of file
+    return None, "unknown"
+
+
+# ------------------------------------------------------------
+# Batch detection
+# ------------------------------------------------------------
+def detect_file_types(paths, workers=None):
+    """
+    Detect many files concurrently.
+
+    Header reads are dominated by open()/read() latency, so overlapping
+    them across a thread pool scales well until the device queue saturates.
+    detect_file_type() keeps no shared state, so it is safe to fan out.
+
+    workers takes a THREAD_COUNT setting: None or 0 sizes the pool the way
+    the repair worker does (worker.default_thread_count).
+
+    Returns:
+        list of (path, (ext, reason)) in input order
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    paths = list(paths)
+    if not paths:
+        return []
+
+    if not workers:
+        # Imported here: worker.py imports this module
+        from .worker import default_thread_count
+
+        workers = default_thread_count()
+
+    with ThreadPoolExecutor(max_workers=max(1, int(workers))) as executor:
+        results = executor.map(detect_file_type, paths, chunksize=64)
+        return list(zip(paths, results))
+
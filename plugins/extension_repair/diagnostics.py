@@ -15,162 +15,158 @@ This module does NOT perform detection or renaming.
 It only organizes and reports results.
 """
 
-import os
-import binascii
+from collections import Counter
+
+from .magic_signatures import classify_family
 
 
 # ------------------------------------------------------------
 # Skip reason categories
 # ------------------------------------------------------------
+_STATS_KEYS = (
+    "unknown",
+    "too_small",
+    "unreadable",
+    "correct_ext",
+    "ambiguous_riff",
+    "ambiguous_iso",
+    "rename_conflict",
+    "permission_denied",
+    "unicode_issue",
+    "zero_byte",
+    "truncated",
+    "malformed_zip",
+    "malformed_rar",
+    "malformed_7z",
+    "other",
+)
+
+
 def init_stats():
     """
     Returns a dictionary of categorized skip-reason lists.
     Each list contains file paths or (path, details).
+
+    "unknown" entries are (path, header16, size) tuples captured during
+    detection so summaries never reopen or re-stat the file.
     """
-    return {
-        "unknown": [],
-        "too_small": [],
-        "unreadable": [],
-        "correct_ext": [],
-        "ambiguous_riff": [],
-        "ambiguous_iso": [],
-        "rename_conflict": [],
-        "permission_denied": [],
-        "unicode_issue": [],
-        "zero_byte": [],
-        "truncated": [],
-        "malformed_zip": [],
-        "malformed_rar": [],
-        "malformed_7z": [],
-        "other": [],
-    }
+    return {key: [] for key in _STATS_KEYS}
 
 
 # ------------------------------------------------------------
 # Helper: write to console + log
 # ------------------------------------------------------------
-def out(msg, logger):
+def emit(lines, logger):
+    """
+    Write accumulated summary lines with one print and one bulk log call.
+    """
+    if not lines:
+        return
+
     if not getattr(logger, "suppress_console", False):
-        print(msg)
-    logger.log(msg)
+        print("\n".join(lines))
+
+    log_bulk = getattr(logger, "log_bulk", None)
+    if log_bulk is not None:
+        log_bulk(lines)
+    else:
+        for line in lines:
+            logger.log(line)
 
 
 # ------------------------------------------------------------
 # Diagnostic Level 1 (Standard)
+#
+# Each summary_level_N appends its report lines to `lines`;
+# generate_summary() writes them out in one go.
 # ------------------------------------------------------------
-def summary_level_1(stats, logger):
-    out("\n=== SUMMARY (Standard Diagnostics) ===", logger)
+def summary_level_1(stats, lines):
+    lines.append("\n=== SUMMARY (Standard Diagnostics) ===")
 
     def count(key):
         return len(stats[key])
 
-    out(f"Unknown format: {count('unknown')}", logger)
-    out(f"Already correct extension: {count('correct_ext')}", logger)
-    out(f"Unreadable files: {count('unreadable')}", logger)
-    out(f"Too small to detect: {count('too_small')}", logger)
-    out(f"Ambiguous RIFF: {count('ambiguous_riff')}", logger)
-    out(f"Ambiguous ISO BMFF: {count('ambiguous_iso')}", logger)
-    out(f"Rename conflicts: {count('rename_conflict')}", logger)
-    out(f"Permission denied: {count('permission_denied')}", logger)
-    out(f"Unicode issues: {count('unicode_issue')}", logger)
-    out(f"Other: {count('other')}", logger)
+    lines.append(f"Unknown format: {count('unknown')}")
+    lines.append(f"Already correct extension: {count('correct_ext')}")
+    lines.append(f"Unreadable files: {count('unreadable')}")
+    lines.append(f"Too small to detect: {count('too_small')}")
+    lines.append(f"Ambiguous RIFF: {count('ambiguous_riff')}")
+    lines.append(f"Ambiguous ISO BMFF: {count('ambiguous_iso')}")
+    lines.append(f"Rename conflicts: {count('rename_conflict')}")
+    lines.append(f"Permission denied: {count('permission_denied')}")
+    lines.append(f"Unicode issues: {count('unicode_issue')}")
+    lines.append(f"Other: {count('other')}")
 
 
 # ------------------------------------------------------------
 # Diagnostic Level 2 (Deep)
 # ------------------------------------------------------------
-def summary_level_2(stats, logger):
-    summary_level_1(stats, logger)
+def summary_level_2(stats, lines):
+    summary_level_1(stats, lines)
 
-    out("\n=== DEEP DIAGNOSTICS ===", logger)
+    lines.append("\n=== DEEP DIAGNOSTICS ===")
 
     # Unknown breakdown
     if stats["unknown"]:
-        out("\nUnknown Format Breakdown:", logger)
-        zero = [p for p in stats["unknown"] if os.path.getsize(p) == 0]
-        out(f"  Zero-byte files: {len(zero)}", logger)
+        lines.append("\nUnknown Format Breakdown:")
+        zero = sum(1 for _path, _header, size in stats["unknown"] if size == 0)
+        lines.append(f"  Zero-byte files: {zero}")
 
         # Header-family breakdown
-        riff_like = []
-        iso_like = []
-        jpeg_like = []
-        zip_like = []
-        other = []
+        families = Counter(classify_family(h) for _path, h, _size in stats["unknown"])
 
-        for path in stats["unknown"]:
-            try:
-                with open(path, "rb") as f:
-                    h = f.read(16)
-            except Exception:
-                continue
-
-            if h.startswith(b"RIFF"):
-                riff_like.append(path)
-            elif h[4:8] == b"ftyp":
-                iso_like.append(path)
-            elif h.startswith(b"\xFF\xD8"):
-                jpeg_like.append(path)
-            elif h.startswith(b"PK\x03\x04"):
-                zip_like.append(path)
-            else:
-                other.append(path)
-
-        out(f"  RIFF-like unknowns: {len(riff_like)}", logger)
-        out(f"  ISO BMFF-like unknowns: {len(iso_like)}", logger)
-        out(f"  JPEG-like unknowns: {len(jpeg_like)}", logger)
-        out(f"  ZIP-like unknowns: {len(zip_like)}", logger)
-        out(f"  Completely unrecognized: {len(other)}", logger)
+        lines.append(f"  RIFF-like unknowns: {families['riff']}")
+        lines.append(f"  ISO BMFF-like unknowns: {families['iso']}")
+        lines.append(f"  JPEG-like unknowns: {families['jpeg']}")
+        lines.append(f"  ZIP-like unknowns: {families['zip']}")
+        lines.append(f"  Completely unrecognized: {families['other']}")
 
     # Ambiguous ISO BMFF details
     if stats["ambiguous_iso"]:
-        out("\nAmbiguous ISO BMFF Files:", logger)
+        lines.append("\nAmbiguous ISO BMFF Files:")
         for path in stats["ambiguous_iso"]:
             try:
                 with open(path, "rb") as f:
                     h = f.read(12)
                 brand = h[8:12]
-                out(f"  {path} (brand={brand})", logger)
+                lines.append(f"  {path} (brand={brand})")
             except Exception:
-                out(f"  {path} (unreadable)", logger)
+                lines.append(f"  {path} (unreadable)")
 
 
 # ------------------------------------------------------------
 # Diagnostic Level 3 (Forensic)
 # ------------------------------------------------------------
-def summary_level_3(stats, logger):
-    summary_level_2(stats, logger)
+def summary_level_3(stats, lines):
+    summary_level_2(stats, lines)
 
-    out("\n=== FORENSIC MODE ===", logger)
+    lines.append("\n=== FORENSIC MODE ===")
 
     # Hex dump of unknowns
     if stats["unknown"]:
-        out("\nHex Signatures of Unknown Files:", logger)
-        for path in stats["unknown"]:
-            try:
-                with open(path, "rb") as f:
-                    h = f.read(16)
-                hexstr = binascii.hexlify(h).decode("ascii")
-                out(f"  {path}: {hexstr}", logger)
-            except Exception:
-                out(f"  {path}: <unreadable>", logger)
+        lines.append("\nHex Signatures of Unknown Files:")
+        lines.extend(
+            f"  {path}: {h.hex()}"
+            for path, h, _size in stats["unknown"]
+        )
 
     # Rename conflicts
     if stats["rename_conflict"]:
-        out("\nRename Conflicts:", logger)
+        lines.append("\nRename Conflicts:")
         for path, new_path in stats["rename_conflict"]:
-            out(f"  {path} -> {new_path}", logger)
+            lines.append(f"  {path} -> {new_path}")
 
     # Unicode issues
     if stats["unicode_issue"]:
-        out("\nUnicode Path Issues:", logger)
+        lines.append("\nUnicode Path Issues:")
         for path in stats["unicode_issue"]:
-            out(f"  {path}", logger)
+            lines.append(f"  {path}")
 
     # Truncated signatures
     if stats["truncated"]:
-        out("\nTruncated Signature Files:", logger)
+        lines.append("\nTruncated Signature Files:")
         for path in stats["truncated"]:
-            out(f"  {path}", logger)
+            lines.append(f"  {path}")
 
 
 # ------------------------------------------------------------
@@ -178,11 +174,16 @@ def summary_level_3(stats, logger):
 # ------------------------------------------------------------
 def generate_summary(stats, diagnostic_level, logger):
     """
-    Dispatches to the appropriate summary generator.
+    Dispatches to the appropriate summary generator, then writes the
+    whole report at once.
     """
+    lines = []
+
     if diagnostic_level == 1:
-        summary_level_1(stats, logger)
+        summary_level_1(stats, lines)
     elif diagnostic_level == 2:
-        summary_level_2(stats, logger)
+        summary_level_2(stats, lines)
     else:
-        summary_level_3(stats, logger)
\ No newline at end of file
+        summary_level_3(stats, lines)
+
+    emit(lines, logger)
\ No newline at end of file
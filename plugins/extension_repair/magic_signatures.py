@@ -7,8 +7,13 @@ Strict-mode magic-byte signatures for the Extension Repair Tool.
 Defines:
 - MAGIC_SIGNATURES: exact byte signatures for formats with fixed headers
 - ISO_BRANDS: known ISO BMFF brands (MP4, MOV, M4V, AVIF, HEIC, etc.)
+- ISO_BRANDS_INT: the same brands keyed by big-endian uint32
 - RIFF_TYPES: RIFF subtypes (AVI, WAV, WEBP)
 - SIGNATURE_LENGTH: how many bytes to read for detection
+- FIXED_BY_PREFIX: offset-0 signatures keyed by their bytes
+- FIXED_MAGIC_RE / FIXED_MAGIC_EXTS: anchored matcher over offset-0 signatures
+- CANONICAL_EXTS: every extension detection can produce
+- FAMILY_PREFIXES / classify_family: coarse header families for diagnostics
 
 Strict Mode Rules:
 - Only classify a file if its magic bytes match a known signature.
@@ -16,6 +21,10 @@ Strict Mode Rules:
 - Unknown or ambiguous formats must be skipped and logged.
 """
 
+import re
+import sys
+from types import MappingProxyType
+
 # How many bytes to read from each file for detection
 SIGNATURE_LENGTH = 64
 
@@ -27,7 +36,7 @@ SIGNATURE_LENGTH = 64
 #   (signature_bytes, offset, canonical_extension)
 #
 # These are formats with stable, unambiguous headers.
-MAGIC_SIGNATURES = [
+MAGIC_SIGNATURES = (
 
     # ============================
     # IMAGE FORMATS
@@ -121,39 +130,100 @@ MAGIC_SIGNATURES = [
 
     # WMV / ASF
     (b"\x30\x26\xB2\x75\x8E\x66\xCF\x11", 0, "wmv"),
-]
+)
+
+# Extension strings are compared and returned for every file; intern them so
+# they are shared objects across all tables.
+MAGIC_SIGNATURES = tuple((sig, off, sys.intern(ext)) for sig, off, ext in MAGIC_SIGNATURES)
+
+
+# Offset-0 signatures keyed by their exact bytes: the source for the
+# anchored regex below.
+FIXED_BY_PREFIX = {sig: ext for sig, off, ext in MAGIC_SIGNATURES if off == 0}
+
+# All offset-0 signatures compiled into one anchored alternation (one group
+# per signature, longest first as in FIXED_SIGS) so matching runs inside the
+# regex engine rather than a Python loop. FIXED_MAGIC_EXTS is indexed by
+# match.lastindex.
+FIXED_SIGS = tuple(sorted(FIXED_BY_PREFIX, key=len, reverse=True))
+FIXED_MAGIC_RE = re.compile(
+    b"|".join(b"(" + re.escape(sig) + b")" for sig in FIXED_SIGS),
+    re.DOTALL,
+)
+FIXED_MAGIC_EXTS = (None,) + tuple(FIXED_BY_PREFIX[sig] for sig in FIXED_SIGS)
+
+# Signatures at a nonzero offset still need the general scan.
+OFFSET_SIGNATURES = tuple((sig, off, ext) for sig, off, ext in MAGIC_SIGNATURES if off != 0)
 
 
 # ------------------------------------------------------------
 # 2. RIFF CONTAINER TYPES (AVI, WAV, WEBP)
 # ------------------------------------------------------------
-RIFF_TYPES = {
-    b"AVI ": "avi",
-    b"WAVE": "wav",
-    b"WEBP": "webp",
-}
+RIFF_TYPES = MappingProxyType({
+    b"AVI ": sys.intern("avi"),
+    b"WAVE": sys.intern("wav"),
+    b"WEBP": sys.intern("webp"),
+})
 
 
 # ------------------------------------------------------------
 # 3. ISO BMFF BRANDS (MP4, MOV, M4V, AVIF, HEIC, etc.)
 # ------------------------------------------------------------
-ISO_BRANDS = {
+ISO_BRANDS = MappingProxyType({
     # MP4 family
-    b"isom": "mp4",
-    b"iso2": "mp4",
-    b"mp41": "mp4",
-    b"mp42": "mp4",
-    b"M4V ": "m4v",
+    b"isom": sys.intern("mp4"),
+    b"iso2": sys.intern("mp4"),
+    b"mp41": sys.intern("mp4"),
+    b"mp42": sys.intern("mp4"),
+    b"M4V ": sys.intern("m4v"),
 
     # QuickTime
-    b"qt  ": "mov",
+    b"qt  ": sys.intern("mov"),
 
     # AVIF
-    b"avif": "avif",
+    b"avif": sys.intern("avif"),
 
     # HEIC / HEIF
-    b"heic": "heic",
-    b"heix": "heic",
-    b"hevc": "heic",
-    b"hevx": "heic",
-}
\ No newline at end of file
+    b"heic": sys.intern("heic"),
+    b"heix": sys.intern("heic"),
+    b"hevc": sys.intern("heic"),
+    b"hevx": sys.intern("heic"),
+})
+
+# Same brands keyed by their big-endian uint32 value, so the brand can be
+# read with struct.unpack_from without slicing.
+ISO_BRANDS_INT = MappingProxyType({int.from_bytes(k, "big"): v for k, v in ISO_BRANDS.items()})
+
+
+# ------------------------------------------------------------
+# 4. CANONICAL EXTENSIONS
+# ------------------------------------------------------------
+# Every extension detection can return. A file already named with one of
+# these can optionally skip the header read (see VERIFY_CORRECT_EXT).
+CANONICAL_EXTS = frozenset(
+    [ext for _sig, _off, ext in MAGIC_SIGNATURES]
+    + list(RIFF_TYPES.values())
+    + list(ISO_BRANDS.values())
+)
+
+
+# ------------------------------------------------------------
+# 5. HEADER FAMILIES (diagnostics only)
+# ------------------------------------------------------------
+# Coarse "looks like" families for headers that did NOT match strictly.
+# Never used for classification.
+FAMILY_PREFIXES = MappingProxyType({
+    b"PK\x03\x04": "zip",
+    b"\xFF\xD8": "jpeg",
+})
+
+
+def classify_family(header):
+    """
+    Return "riff", "iso", "jpeg", "zip" or "other" for an unmatched header.
+    """
+    if header[:4] == b"RIFF":
+        return "riff"
+    if header[4:8] == b"ftyp":
+        return "iso"
+    return FAMILY_PREFIXES.get(header[:4]) or FAMILY_PREFIXES.get(header[:2], "other")
\ No newline at end of file
@@ -16,57 +16,69 @@ Provides:
 
 import os
 import sys
-import argparse
-from queue import Queue
+from types import SimpleNamespace
 
 # Support running as a script (python plugins/extension_repair/tool.py ...) as well as
-# a module (python -m plugins.extension_repair.tool ...).
+# a module (python -m plugins.extension_repair.tool ...). Setting __package__ lets the
+# relative imports below resolve either way (PEP 366).
 if __package__ in (None, ""):
-    sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
-    from plugins.extension_repair.config import build_settings, save_persistent_config
-    from shared.logger import BufferedLogger
-    from plugins.extension_repair.worker import ExtensionRepairWorker
-    from plugins.extension_repair.diagnostics import generate_summary
-else:
-    from .config import build_settings, save_persistent_config
-    from shared.logger import BufferedLogger
-    from .worker import ExtensionRepairWorker
-    from .diagnostics import generate_summary
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    __package__ = "plugins.extension_repair"
+
+# The worker, logger, diagnostics and config modules are imported inside the
+# functions that use them, so `--help` and GUI launches don't pay for the
+# detector, thread pool and shared scanner import graph.
 
 
 # ------------------------------------------------------------
 # Constants
 # ------------------------------------------------------------
 CONFIG_FILE = "extension_repair.json"
+CACHE_FILE = "extension_repair.cache.json"
+
+# Settings whose command-line flags only apply to the run they are given
+# on; the saved config keeps its own value for them.
+RUN_ONLY_KEYS = ("VERIFY_CORRECT_EXT", "DETECTION_CACHE")
 
 # ------------------------------------------------------------
 # Web UI Configuration (for dynamic GUI generation)
 # ------------------------------------------------------------
-webui_config = {
-    "actions": [
-        {
-            "id": "scan",
-            "name": "Scan & Repair",
-            "description": "Scan a directory and fix file extensions based on magic bytes.",
-            "fields": [
-                {"id": "directory", "name": "Target Directory", "type": "directory", "required": True},
-                {"id": "dry_run", "name": "Dry Run (preview only)", "type": "checkbox", "default": True},
-                {"id": "force", "name": "Force ambiguous renames", "type": "checkbox", "default": False},
-                {"id": "quarantine", "name": "Quarantine mode", "type": "checkbox", "default": False},
-            ],
-            "command": "extension-repair {directory} --mode cli",
-        },
-        {
-            "id": "report",
-            "name": "Report Only",
-            "description": "Generate a report without making changes.",
-            "fields": [
-                {"id": "directory", "name": "Target Directory", "type": "directory", "required": True},
-            ],
-            "command": "extension-repair {directory} --mode cli --report",
-        },
-    ]
-}
+# Only the web UI reads this, so it is built on first access (PEP 562)
+# instead of at import time on every CLI run.
+def _build_webui_config():
+    return {
+        "actions": [
+            {
+                "id": "scan",
+                "name": "Scan & Repair",
+                "description": "Scan a directory and fix file extensions based on magic bytes.",
+                "fields": [
+                    {"id": "directory", "name": "Target Directory", "type": "directory", "required": True},
+                    {"id": "dry_run", "name": "Dry Run (preview only)", "type": "checkbox", "default": True},
+                    {"id": "force", "name": "Force ambiguous renames", "type": "checkbox", "default": False},
+                    {"id": "quarantine", "name": "Quarantine mode", "type": "checkbox", "default": False},
+                ],
+                "command": "extension-repair {directory} --mode cli",
+            },
+            {
+                "id": "report",
+                "name": "Report Only",
+                "description": "Generate a report without making changes.",
+                "fields": [
+                    {"id": "directory", "name": "Target Directory", "type": "directory", "required": True},
+                ],
+                "command": "extension-repair {directory} --mode cli --report",
+            },
+        ]
+    }
+
+
+def __getattr__(name):
+    if name == "webui_config":
+        config = _build_webui_config()
+        globals()["webui_config"] = config
+        return config
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ------------------------------------------------------------
@@ -76,6 +88,9 @@ def run_cli(settings, logger):
     """
     Run the tool in CLI mode.
     """
+    from .worker import ExtensionRepairWorker
+    from .diagnostics import generate_summary
+
     logger.log("Starting Extension Repair Tool (CLI mode)")
 
     use_console_ui = bool(settings.get("CONSOLE_UI")) and sys.stdout.isatty() and sys.stdin.isatty()
@@ -92,6 +107,8 @@ def run_cli(settings, logger):
                 use_console_ui = False
 
     if use_console_ui:
+        from queue import Queue
+
         # Queues for UI
         log_queue = Queue()
         event_queue = Queue()
@@ -174,6 +191,9 @@ def run(mode="cli", overrides=None, config_dir=None):
             # Fall back to normal settings path if webui can't be imported.
             pass
 
+    from shared.logger import BufferedLogger
+    from .config import DEFAULTS, build_settings, load_persistent_config, save_persistent_config
+
     if config_dir is None:
         # Toolbox passes this automatically
         config_dir = os.path.join(os.getcwd(), "config")
@@ -204,7 +224,18 @@ def run(mode="cli", overrides=None, config_dir=None):
     # --------------------------------------------------------
     # Save updated settings
     # --------------------------------------------------------
-    save_persistent_config(config_dir, CONFIG_FILE, settings)
+    saved = dict(settings)
+    run_only = [key for key in RUN_ONLY_KEYS if key in (overrides or {})]
+    if run_only:
+        persisted = load_persistent_config(config_dir, CONFIG_FILE)
+        for key in run_only:
+            saved[key] = persisted.get(key, DEFAULTS[key])
+    save_persistent_config(config_dir, CONFIG_FILE, saved)
+
+    # Derived after saving, so the config doesn't pin an absolute path
+    # that goes stale if the config directory moves
+    if not settings.get("CACHE_FILE"):
+        settings["CACHE_FILE"] = os.path.join(config_dir, CACHE_FILE)
 
     # --------------------------------------------------------
     # Run mode
@@ -243,13 +274,37 @@ def _add_arguments(parser):
     parser.add_argument("--config-dir", help="Config directory")
     parser.add_argument("-y", "--yes", dest="non_interactive", action="store_true", help="Non-interactive mode")
     parser.add_argument("--out", dest="OUTPUT_DIRECTORY", help="Output directory (for non-in-place mode)")
-    parser.add_argument("-n", "--dry-run", dest="DRY_RUN", action="store_true", help="Preview changes only")
-    parser.add_argument("--commit", dest="DRY_RUN", action="store_false", help="Actually make changes")
-    parser.add_argument("--report", dest="REPORT_ONLY", action="store_true", help="Report only, no renames")
-    parser.add_argument("--quarantine", dest="QUARANTINE_MODE", action="store_true", help="Move to quarantine instead")
-    parser.add_argument("-f", "--force", dest="FORCE_RENAME", action="store_true", help="Force ambiguous renames")
+    # Flags default to None rather than False so that only options actually
+    # given become overrides; the rest are still prompted for interactively.
+    parser.add_argument("-n", "--dry-run", dest="DRY_RUN", action="store_true", default=None, help="Preview changes only")
+    parser.add_argument("--commit", dest="DRY_RUN", action="store_false", default=None, help="Actually make changes")
+    parser.add_argument(
+        "--report", dest="REPORT_ONLY", action="store_true", default=None, help="Report only, no renames"
+    )
+    parser.add_argument(
+        "--quarantine", dest="QUARANTINE_MODE", action="store_true", default=None, help="Move to quarantine instead"
+    )
+    parser.add_argument(
+        "-f", "--force", dest="FORCE_RENAME", action="store_true", default=None, help="Force ambiguous renames"
+    )
+    parser.add_argument(
+        "--trust-ext",
+        dest="VERIFY_CORRECT_EXT",
+        action="store_false",
+        default=None,
+        help="Skip header reads for files already named with a known extension",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="DETECTION_CACHE",
+        action="store_false",
+        default=None,
+        help="Re-read every header instead of reusing results for unchanged files",
+    )
     parser.add_argument("-t", "--threads", dest="THREAD_COUNT", type=int, help="Worker threads")
-    parser.add_argument("--console-ui", dest="CONSOLE_UI", action="store_true", help="Show split-pane console UI")
+    parser.add_argument(
+        "--console-ui", dest="CONSOLE_UI", action="store_true", default=None, help="Show split-pane console UI"
+    )
     parser.add_argument("--json", dest="LOG_FORMAT", action="store_const", const="jsonl", help="JSON log output")
 
 
@@ -267,6 +322,8 @@ def _run_from_args(args):
         "REPORT_ONLY",
         "QUARANTINE_MODE",
         "FORCE_RENAME",
+        "VERIFY_CORRECT_EXT",
+        "DETECTION_CACHE",
         "THREAD_COUNT",
         "LOG_FORMAT",
         "CONSOLE_UI",
@@ -281,13 +338,123 @@ def _run_from_args(args):
     run(mode=args.mode, overrides=overrides if overrides else None, config_dir=args.config_dir)
 
 
-def main():
+# ------------------------------------------------------------
+# Fast path for direct execution
+# ------------------------------------------------------------
+# Mirrors _add_arguments for the common, well-formed command lines so that
+# running this file directly doesn't import argparse. Anything the table
+# doesn't cover exactly (help, errors, abbreviations, bundled short flags)
+# falls back to argparse, which stays the single source of help text.
+#
+# (option strings, dest, action, const or type)
+_FLAGS = (
+    (("-m", "--mode"), "mode", "store", None),
+    (("--config-dir",), "config_dir", "store", None),
+    (("-y", "--yes"), "non_interactive", "store_const", True),
+    (("--out",), "OUTPUT_DIRECTORY", "store", None),
+    (("-n", "--dry-run"), "DRY_RUN", "store_const", True),
+    (("--commit",), "DRY_RUN", "store_const", False),
+    (("--report",), "REPORT_ONLY", "store_const", True),
+    (("--quarantine",), "QUARANTINE_MODE", "store_const", True),
+    (("-f", "--force"), "FORCE_RENAME", "store_const", True),
+    (("--trust-ext",), "VERIFY_CORRECT_EXT", "store_const", False),
+    (("--no-cache",), "DETECTION_CACHE", "store_const", False),
+    (("-t", "--threads"), "THREAD_COUNT", "store", int),
+    (("--console-ui",), "CONSOLE_UI", "store_const", True),
+    (("--json",), "LOG_FORMAT", "store_const", "jsonl"),
+)
+_FLAG_TABLE = {opt: (dest, action, arg) for opts, dest, action, arg in _FLAGS for opt in opts}
+_MODES = ("gui", "cli")
+
+# Same defaults argparse produces for _add_arguments
+_ARG_DEFAULTS = {
+    "directory": None,
+    "mode": "gui",
+    "config_dir": None,
+    "non_interactive": False,
+    "OUTPUT_DIRECTORY": None,
+    "DRY_RUN": None,
+    "REPORT_ONLY": None,
+    "QUARANTINE_MODE": None,
+    "FORCE_RENAME": None,
+    "VERIFY_CORRECT_EXT": None,
+    "DETECTION_CACHE": None,
+    "THREAD_COUNT": None,
+    "CONSOLE_UI": None,
+    "LOG_FORMAT": None,
+}
+
+
+def _parse_fast(argv):
+    """
+    Parse argv with the static flag table.
+
+    Returns a namespace with the same attributes argparse would produce, or
+    None when argv needs the full argparse parser.
+    """
+    values = dict(_ARG_DEFAULTS)
+    have_directory = False
+    i = 0
+
+    while i < len(argv):
+        token = argv[i]
+        i += 1
+
+        if not token.startswith("-") or token == "-":
+            if have_directory:
+                return None
+            values["directory"] = token
+            have_directory = True
+            continue
+
+        # Only long options take the --opt=value form
+        opt, eq, inline = token.partition("=") if token.startswith("--") else (token, "", "")
+        spec = _FLAG_TABLE.get(opt)
+        if spec is None:
+            return None
+        dest, action, arg = spec
+
+        if action == "store_const":
+            if eq:
+                return None
+            values[dest] = arg
+            continue
+
+        if eq:
+            value = inline
+        elif i < len(argv) and not argv[i].startswith("-"):
+            value = argv[i]
+            i += 1
+        else:
+            return None
+
+        if arg is int:
+            try:
+                value = int(value)
+            except ValueError:
+                return None
+        values[dest] = value
+
+    if values["mode"] not in _MODES:
+        return None
+
+    return SimpleNamespace(**values)
+
+
+def main(argv=None):
     """
     Standard entry point so the master toolbox launcher can call this tool.
     """
-    parser = argparse.ArgumentParser(description="Extension Repair Tool")
-    _add_arguments(parser)
-    args = parser.parse_args()
+    if argv is None:
+        argv = sys.argv[1:]
+
+    args = _parse_fast(argv)
+    if args is None:
+        import argparse
+
+        parser = argparse.ArgumentParser(description="Extension Repair Tool")
+        _add_arguments(parser)
+        args = parser.parse_args(argv)
     _run_from_args(args)
 
 
@@ -12,8 +12,11 @@ This is optional and only used when running in a real TTY.
 
 from __future__ import annotations
 
+# curses is imported eagerly on purpose: tool.run_cli only imports this
+# module once the console UI has been requested, and relies on the
+# ImportError raised here (e.g. no _curses on Windows) to fall back to
+# plain text output.
 import curses
-import time
 from collections import deque
 from queue import Empty
 
@@ -37,113 +40,165 @@ def run_fixed_log_ui(
     Returns the stats dict if received, else None.
     """
 
+    def _geometry(stdscr):
+        height, width = stdscr.getmaxyx()
+        top_h = max(3, min(int(log_height), max(3, height - 3)))
+        bottom_h = max(1, height - top_h)
+        return width, top_h, bottom_h
+
     def _curses_main(stdscr):
         curses.curs_set(0)
-        stdscr.nodelay(True)
+        # getch() waits up to 50 ms in the kernel and returns -1 on timeout,
+        # so the loop below needs no sleep and reacts to keys immediately.
+        stdscr.timeout(50)
         stdscr.keypad(True)
 
         stats = None
         done_handled = False
 
-        while True:
-            height, width = stdscr.getmaxyx()
-            top_h = max(3, min(int(log_height), max(3, height - 3)))
-            bottom_h = max(1, height - top_h)
+        status_line = "Starting… (press 'q' to hide UI)"
+        progress_line = ""
+
+        # Both windows live for the whole session; a terminal resize only
+        # changes their geometry (see relayout).
+        width, top_h, bottom_h = _geometry(stdscr)
+        log_win = curses.newwin(top_h, width, 0, 0)
+        status_win = curses.newwin(bottom_h, width, top_h, 0)
+
+        log_lines = deque(maxlen=max(1, top_h - 2))
+
+        # Fixed for the current window size
+        line_w = width - 1
+        header = f"{title} — Logs".ljust(line_w)
+
+        def place(new_width, new_top, new_bottom):
+            log_win.resize(new_top, new_width)
+            # A window must fit on screen where it is moved to, so a growing
+            # status window moves before it grows and a shrinking one after
+            if new_bottom > status_win.getmaxyx()[0]:
+                status_win.mvwin(new_top, 0)
+                status_win.resize(new_bottom, new_width)
+            else:
+                status_win.resize(new_bottom, new_width)
+                status_win.mvwin(new_top, 0)
+
+        def relayout():
+            nonlocal width, top_h, bottom_h, log_lines, line_w, header
+            geometry = _geometry(stdscr)
+
+            try:
+                place(*geometry)
+            except curses.error:
+                # Terminal too small for the layout; put the windows back
+                # and keep the old geometry so redraw() stays inside them.
+                try:
+                    place(width, top_h, bottom_h)
+                except curses.error:
+                    pass
+                stdscr.erase()
+                stdscr.refresh()
+                return
+
+            width, top_h, bottom_h = geometry
 
-            log_win = curses.newwin(top_h, width, 0, 0)
-            status_win = curses.newwin(bottom_h, width, top_h, 0)
+            # Keep the most recent lines that still fit
+            log_lines = deque(log_lines, maxlen=max(1, top_h - 2))
+            line_w = width - 1
+            header = f"{title} — Logs".ljust(line_w)
 
-            max_log_lines = max(1, top_h - 2)
-            log_lines = deque(maxlen=max_log_lines)
+            stdscr.erase()
+            stdscr.refresh()
 
-            status_line = "Starting… (press 'q' to hide UI)"
-            progress_line = ""
+        def redraw():
+            log_win.erase()
+            status_win.erase()
 
-            def redraw():
-                log_win.erase()
-                status_win.erase()
+            # Header
+            log_win.addnstr(0, 0, header, line_w)
 
-                # Header
-                header = f"{title} — Logs".ljust(width - 1)
-                log_win.addnstr(0, 0, header, width - 1)
+            # Log body (the deque is already bounded to the window height)
+            for i, line in enumerate(log_lines, 1):
+                log_win.addnstr(i, 0, line, line_w)
 
-                # Log body
-                for i, line in enumerate(list(log_lines)[-max_log_lines:]):
-                    log_win.addnstr(1 + i, 0, line, width - 1)
+            # Footer / separator
+            log_win.hline(top_h - 1, 0, curses.ACS_HLINE, line_w)
 
-                # Footer / separator
-                log_win.hline(top_h - 1, 0, curses.ACS_HLINE, width - 1)
+            # Status area
+            status_win.addnstr(0, 0, status_line, line_w)
+            if bottom_h > 1 and progress_line:
+                status_win.addnstr(1, 0, progress_line, line_w)
 
-                # Status area
-                status_win.addnstr(0, 0, status_line, width - 1)
-                if bottom_h > 1 and progress_line:
-                    status_win.addnstr(1, 0, progress_line, width - 1)
+            status_win.refresh()
+            log_win.refresh()
 
-                status_win.refresh()
-                log_win.refresh()
+        redraw()
 
-            redraw()
+        while True:
+            # Handle keypress
+            try:
+                ch = stdscr.getch()
+            except Exception:
+                ch = -1
+            if ch in (ord("q"), ord("Q")):
+                return stats
+
+            # Only redraw when something visible changed
+            dirty = False
+
+            if ch == curses.KEY_RESIZE:
+                relayout()
+                dirty = True
+
+            # Drain log lines
+            while True:
+                try:
+                    line = log_queue.get_nowait()
+                except Empty:
+                    break
+                log_lines.append(line)
+                dirty = True
 
+            # Drain worker events
             while True:
-                # Handle keypress
                 try:
-                    ch = stdscr.getch()
-                except Exception:
-                    ch = -1
-                if ch in (ord("q"), ord("Q")):
-                    return stats
-
-                drained = False
-
-                # Drain log lines
-                while True:
-                    try:
-                        line = log_queue.get_nowait()
-                    except Empty:
-                        break
-                    log_lines.append(line)
-                    drained = True
-
-                # Drain worker events
-                while True:
-                    try:
-                        ev = event_queue.get_nowait()
-                    except Empty:
-                        break
-
-                    drained = True
-                    if not ev:
-                        continue
-
-                    kind = ev[0]
-                    if kind == "progress":
-                        frac = ev[1]
-                        msg = ev[2] if len(ev) > 2 else ""
-                        pct = int((frac or 0) * 100)
-                        progress_line = f"[{pct:3d}%] {msg}"
-                    elif kind == "error":
-                        status_line = f"Error: {ev[1] if len(ev) > 1 else ''}"[: width - 1]
-                    elif kind == "done":
-                        stats = ev[1] if len(ev) > 1 else None
-                        status_line = "Completed. Press 'q' to exit."[: width - 1]
-                        progress_line = ""
-
-                        if (not done_handled) and (on_done is not None):
-                            done_handled = True
-                            try:
-                                on_done(stats)
-                            except Exception:
-                                # Keep UI resilient.
-                                pass
-
-                if drained:
-                    redraw()
-
-                # If done, keep UI up until user quits.
-                if stats is not None:
-                    time.sleep(0.05)
+                    ev = event_queue.get_nowait()
+                except Empty:
+                    break
+
+                if not ev:
                     continue
 
-                time.sleep(0.05)
+                kind = ev[0]
+                if kind == "progress":
+                    frac = ev[1]
+                    msg = ev[2] if len(ev) > 2 else ""
+                    if frac is None:
+                        # Total not known yet (scan still streaming)
+                        line = f"[ ... ] {msg}"
+                    else:
+                        line = f"[{int(frac * 100):3d}%] {msg}"
+                    if line != progress_line:
+                        progress_line = line
+                        dirty = True
+                elif kind == "error":
+                    status_line = f"Error: {ev[1] if len(ev) > 1 else ''}"[:line_w]
+                    dirty = True
+                elif kind == "done":
+                    stats = ev[1] if len(ev) > 1 else None
+                    status_line = "Completed. Press 'q' to exit."[:line_w]
+                    progress_line = ""
+                    dirty = True
+
+                    if (not done_handled) and (on_done is not None):
+                        done_handled = True
+                        try:
+                            on_done(stats)
+                        except Exception:
+                            # Keep UI resilient.
+                            pass
+
+            # Once done, the UI stays up until the user quits.
+            if dirty:
+                redraw()
 
     return curses.wrapper(_curses_main)
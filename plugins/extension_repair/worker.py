@@ -15,16 +15,18 @@ Responsibilities:
 """
 
 import os
+import sys
 import threading
-from concurrent.futures import as_completed
+import time
 from concurrent.futures.thread import ThreadPoolExecutor
 
-from .detector import detect_file_type
+from . import detect_cache
+from .detector import read_header, classify_header
+from .magic_signatures import CANONICAL_EXTS
 from shared.path_utils import (
     get_extension,
     build_new_name,
     safe_rename,
-    is_zero_byte,
 )
 from .diagnostics import init_stats
 
@@ -34,7 +36,9 @@ from shared import (
     iter_files_chunked as _iter_files_chunked,
     collect_files as _collect_files,
     collect_files_chunked as _collect_files_chunked,
+    iter_file_entries as _iter_file_entries,
     DEFAULT_CHUNK_SIZE,
+    QueueLogger,
 )
 
 
@@ -61,6 +65,74 @@ def collect_files_chunked(root, chunk_size=DEFAULT_CHUNK_SIZE, callback=None):
     return _collect_files_chunked(root, chunk_size, callback, as_path=False)
 
 
+def iter_file_entries_chunked(root, chunk_size=DEFAULT_CHUNK_SIZE, skip_dirs=()):
+    """Yield lists of os.DirEntry objects, chunk_size at a time."""
+    chunk = []
+
+    for entry in _iter_file_entries(root, skip_dirs=skip_dirs):
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+# ------------------------------------------------------------
+# Thread count
+# ------------------------------------------------------------
+def default_thread_count():
+    """
+    Worker threads to use when THREAD_COUNT is 0 (auto).
+
+    Header reads are I/O-bound and release the GIL, so oversubscribe the
+    CPUs: 4 threads per CPU, capped at 32. Free-threaded builds (3.13t)
+    also run the CPU-side work in parallel, so allow up to 64 there.
+    """
+    cpus = os.cpu_count() or 4
+    gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    return min(32 if gil_enabled else 64, cpus * 4)
+
+
+# ------------------------------------------------------------
+# Progress throttling
+# ------------------------------------------------------------
+# Listeners redraw at ~20 Hz, so finer-grained updates are wasted queue
+# traffic. Files are processed while the scan is still running, so the
+# total is unknown until the end: emit every PROGRESS_EVERY files or after
+# PROGRESS_INTERVAL seconds without an update, then once more when done.
+PROGRESS_EVERY = 500
+PROGRESS_INTERVAL = 0.1
+
+
+# ------------------------------------------------------------
+# Per-file result codes
+# ------------------------------------------------------------
+# process_file returns (code, path, payload); the result loop dispatches on
+# code through ExtensionRepairWorker._RESULT_HANDLERS.
+_A_ERROR = 0
+_A_SKIP = 1
+_A_CORRECT = 2
+_A_REPORT = 3
+_A_QUARANTINE = 4
+_A_DRY_RUN = 5
+_A_RENAME = 6
+
+
+# ------------------------------------------------------------
+# Detection failure dispatch
+# ------------------------------------------------------------
+# reason -> (stats key, log format). Anything else is an unknown type,
+# which is split into zero-byte vs. unknown with a cached header.
+_DETECTION_SKIPS = {
+    "unreadable": ("unreadable", "SKIP unreadable: %s"),
+    "too_small": ("too_small", "SKIP too small: %s"),
+    "ambiguous_riff": ("ambiguous_riff", "SKIP ambiguous RIFF: %s"),
+    "ambiguous_iso": ("ambiguous_iso", "SKIP ambiguous ISO BMFF: %s"),
+}
+
+
 # ------------------------------------------------------------
 # Worker Thread
 # ------------------------------------------------------------
@@ -69,7 +141,7 @@ class ExtensionRepairWorker(threading.Thread):
     Threaded worker that processes files and emits progress updates.
 
     Emits queue messages:
-        ("progress", fraction, message)
+        ("progress", fraction, message)  (fraction is None until the end)
         ("done", stats)
         ("error", message)
     """
@@ -92,11 +164,25 @@ class ExtensionRepairWorker(threading.Thread):
     # Main thread entry
     # --------------------------------------------------------
     def run(self):
+        # Log lines go through a listener thread so the result loop only pays
+        # for a queue put. It is drained before "done" is emitted, so the
+        # caller's summary always lands after every per-file line.
+        logger = self.logger
+        self.logger = QueueLogger(logger)
+        error = None
         try:
             self._run_internal()
         except Exception as e:  # pylint: disable=broad-exception-caught
-            self.emit("error", str(e))
+            error = str(e)
             self.logger.log(f"FATAL ERROR: {e}")
+        finally:
+            self.logger.close()
+            self.logger = logger
+
+        if error is None:
+            self.emit("done", self.stats)
+        else:
+            self.emit("error", error)
 
     # --------------------------------------------------------
     # Internal logic
@@ -111,22 +197,25 @@ class ExtensionRepairWorker(threading.Thread):
         quarantine = settings["QUARANTINE_MODE"]
         force_rename = settings["FORCE_RENAME"]
         skip_ambiguous_iso = settings["SKIP_AMBIGUOUS_ISO"]
-        thread_count = settings.get("THREAD_COUNT", 8)
+        verify_correct_ext = settings.get("VERIFY_CORRECT_EXT", True)
+        thread_count = settings.get("THREAD_COUNT") or default_thread_count()
+        cache_path = settings.get("CACHE_FILE") if settings.get("DETECTION_CACHE", True) else None
 
         # ----------------------------------------------------
-        # Collect files with chunked scanning + progress
+        # Stream the scan in chunks (memory stays O(chunk size))
         # ----------------------------------------------------
         self.logger.log(f"Scanning directory: {target_dir}")
-        def on_scan_chunk(_chunk, total_so_far):
-            self.emit("progress", 0.0, f"Scanning... found {total_so_far} files")
-            self.logger.log(f"Scan progress: {total_so_far} files found")
 
-        files = collect_files_chunked(target_dir, DEFAULT_CHUNK_SIZE, on_scan_chunk)
-        total = len(files)
-        self.logger.log(f"Found {total} files.")
+        quarantine_dir = os.path.join(target_dir, "_quarantine") if quarantine else None
 
-        if total == 0:
-            self.emit("done", self.stats)
+        # Files are processed while the scan runs, so never descend into the
+        # directories this run writes to
+        skip_dirs = [d for d in (quarantine_dir, None if in_place else out_dir) if d]
+        chunks = iter_file_entries_chunked(target_dir, DEFAULT_CHUNK_SIZE, skip_dirs)
+
+        first_chunk = next(chunks, None)
+        if first_chunk is None:
+            self.logger.log("Found 0 files.")
             return
 
         # ----------------------------------------------------
@@ -138,180 +227,262 @@ class ExtensionRepairWorker(threading.Thread):
         # ----------------------------------------------------
         # Ensure quarantine directory exists if needed
         # ----------------------------------------------------
-        quarantine_dir = None
         if quarantine:
-            quarantine_dir = os.path.join(target_dir, "_quarantine")
             os.makedirs(quarantine_dir, exist_ok=True)
 
-        # Thread-safe counter for progress
-        progress_lock = threading.Lock()
-        processed = [0]  # mutable container for closure
+        # Every scanned path is os.path.join(target_dir, ...), so the path
+        # relative to target_dir is a plain slice (no os.path.relpath walk).
+        rel_start = len(os.path.join(target_dir, ""))
+
+        # Detection cache: the previous run's results are read-only here;
+        # worker threads record this run's detections in `seen` (distinct
+        # keys per file, so plain dict stores need no lock).
+        cached_exts = detect_cache.load_cache(cache_path) if cache_path else {}
+        seen = {} if cache_path else None
+
+        # Progress is only counted on this thread (the result loop), so it
+        # needs no lock
+        processed = 0
+        last_progress = time.monotonic()
+
+        def process_file(entry):
+            """
+            Process a single file - designed for ThreadPoolExecutor.
+
+            Returns (action code, path, payload); see _RESULT_HANDLERS.
+            """
+            path = entry.path
 
-        def process_file(path):
-            """Process a single file - designed for ThreadPoolExecutor."""
-            rel = os.path.relpath(path, target_dir)
-            result = {"path": path, "action": None, "detail": None}
+            # The DirEntry already carries the basename, so the extension
+            # comes from that instead of rescanning the full path
+            name = entry.name
+            current_ext = get_extension(name)
 
             # ------------------------------------------------
-            # Detect file type
+            # Optional fast path: trust canonical extensions
             # ------------------------------------------------
-            ext, reason = detect_file_type(path)
+            if not verify_correct_ext and current_ext in CANONICAL_EXTS:
+                return _A_CORRECT, path, None
 
-            # Handle detection failures
+            # ------------------------------------------------
+            # Detect file type (skipped if unchanged since the last run)
+            # ------------------------------------------------
+            ext = st = None
+            if seen is not None:
+                try:
+                    st = entry.stat()
+                except OSError:
+                    pass
+                else:
+                    ext = detect_cache.lookup(cached_exts, path, st)
+                    if ext is not None:
+                        seen[path] = cached_exts[path]
+
+            if ext is not None:
+                header = reason = None
+            else:
+                header = read_header(path)
+                ext, reason = classify_header(header)
+                if ext is not None and st is not None:
+                    seen[path] = [st.st_mtime_ns, st.st_size, ext]
+
+            # Handle detection failures (keep the header so diagnostics
+            # never has to reopen the file). The size comes from the
+            # scan's DirEntry, which is free on Windows and cached after
+            # the first stat elsewhere.
             if ext is None:
-                result["action"] = "skip"
-                result["detail"] = reason
-                return result
+                size = None
+                if reason == "unknown":
+                    try:
+                        size = entry.stat().st_size
+                    except OSError:
+                        pass
+                return _A_SKIP, path, (reason, header, size)
 
             # ------------------------------------------------
             # Compare extension
             # ------------------------------------------------
-            current_ext = get_extension(path)
-
             # Already correct?
             if current_ext == ext:
-                result["action"] = "correct"
-                return result
+                return _A_CORRECT, path, None
 
             # ------------------------------------------------
             # Ambiguous ISO BMFF handling
             # ------------------------------------------------
             if reason == "ambiguous_iso":
                 if skip_ambiguous_iso and not force_rename:
-                    result["action"] = "skip"
-                    result["detail"] = "ambiguous_iso"
-                    return result
+                    return _A_SKIP, path, ("ambiguous_iso", header, None)
 
-            # ------------------------------------------------
-            # Determine target directory
-            # ------------------------------------------------
-            if in_place:
-                base_dir = os.path.dirname(path)
-            else:
-                base_dir = os.path.join(out_dir, os.path.dirname(rel))
-                os.makedirs(base_dir, exist_ok=True)
+            # Mode-specific action, chosen once below
+            return act(path, name, ext)
 
-            # ------------------------------------------------
-            # Build new name
-            # ------------------------------------------------
-            original_name = os.path.basename(path)
-            new_path = build_new_name(base_dir, original_name, ext)
+        # Output directories already created this run. Two threads racing on
+        # the same directory just both call makedirs(exist_ok=True), which is
+        # harmless, so the set needs no lock.
+        ensured_dirs = set()
 
-            # ------------------------------------------------
-            # Report-only mode
-            # ------------------------------------------------
-            if report_only:
-                result["action"] = "report"
-                result["detail"] = (path, new_path, ext)
-                return result
+        def new_path_for(path, name, ext, create=True):
+            """
+            Build the conflict-free target path for a detected file.
 
-            # ------------------------------------------------
-            # Quarantine mode
-            # ------------------------------------------------
-            if quarantine:
-                assert quarantine_dir is not None
-                q_target = os.path.join(quarantine_dir, os.path.basename(path))
-                status, detail = safe_rename(path, q_target)
-                result["action"] = "quarantine"
-                result["detail"] = (status, detail)
-                return result
+            Report and dry-run pass create=False: they only log the target,
+            so the output tree is not created for them.
+            """
+            path_dir = os.path.dirname(path)
+            if in_place:
+                base_dir = path_dir
+            else:
+                base_dir = os.path.join(out_dir, path_dir[rel_start:])
+                if create and base_dir not in ensured_dirs:
+                    os.makedirs(base_dir, exist_ok=True)
+                    ensured_dirs.add(base_dir)
+            return build_new_name(base_dir, name, ext)
 
-            # ------------------------------------------------
-            # Dry-run mode
-            # ------------------------------------------------
-            if dry_run:
-                result["action"] = "dry_run"
-                result["detail"] = (path, new_path, ext)
-                return result
+        # ----------------------------------------------------
+        # Mode-specific actions
+        # ----------------------------------------------------
+        # The mode flags never change during a run, so one of these is bound
+        # to `act` up front instead of re-testing every flag per file.
+        def act_report(path, name, ext):
+            return _A_REPORT, path, (new_path_for(path, name, ext, create=False), ext)
+
+        def act_quarantine(path, name, ext):
+            # Quarantine moves the file as-is; no target name is needed
+            assert quarantine_dir is not None
+            q_target = os.path.join(quarantine_dir, name)
+            return _A_QUARANTINE, path, safe_rename(path, q_target)
+
+        def act_dry_run(path, name, ext):
+            return _A_DRY_RUN, path, (new_path_for(path, name, ext, create=False), ext)
+
+        def act_rename(path, name, ext):
+            status, detail = safe_rename(path, new_path_for(path, name, ext))
+            return _A_RENAME, path, (status, detail, ext)
+
+        # Same precedence as before: report > quarantine > dry-run > rename
+        if report_only:
+            act = act_report
+        elif quarantine:
+            act = act_quarantine
+        elif dry_run:
+            act = act_dry_run
+        else:
+            act = act_rename
 
-            # ------------------------------------------------
-            # Actual rename
-            # ------------------------------------------------
-            status, detail = safe_rename(path, new_path)
-            result["action"] = "rename"
-            result["detail"] = (status, detail, ext)
-            return result
+        def process_entry(entry):
+            """Run process_file, turning an exception into an error result."""
+            try:
+                return process_file(entry)
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                return _A_ERROR, entry.path, e
 
         # ----------------------------------------------------
         # Process files with ThreadPoolExecutor
         # ----------------------------------------------------
+        # map() yields results in scan order without a futures dict or the
+        # per-future waiters as_completed() installs. Errors come back as
+        # results, since an exception would end map()'s iterator.
+        handlers = self._RESULT_HANDLERS
         with ThreadPoolExecutor(max_workers=thread_count) as executor:
-            futures = {executor.submit(process_file, path): path for path in files}
-            
-            for future in as_completed(futures):
-                path = futures[future]
-                rel = os.path.relpath(path, target_dir)
-                
-                with progress_lock:
-                    processed[0] += 1
-                    fraction = processed[0] / total
-                    self.emit("progress", fraction, f"Processing {rel}")
 
-                try:
-                    result = future.result()
-                except Exception as e:  # pylint: disable=broad-exception-caught
-                    self.stats["other"].append(path)
-                    self.logger.log(f"ERROR processing {path}: {e}")
-                    continue
-
-                # Handle result based on action
-                action = result["action"]
-                detail = result["detail"]
-
-                if action == "skip":
-                    self._handle_detection_failure(path, detail)
-                elif action == "correct":
-                    self.stats["correct_ext"].append(path)
-                    self.logger.log(f"OK correct ext: {path}")
-                elif action == "report":
-                    src, dst, ext = detail
-                    self.logger.log(f"REPORT: {src} -> {dst} (type: {ext})")
-                elif action == "quarantine":
-                    status, rename_detail = detail
-                    if status == "ok":
-                        self.logger.log(f"QUARANTINE: {path} -> {rename_detail}")
-                    else:
-                        self._handle_rename_failure(path, status, rename_detail)
-                elif action == "dry_run":
-                    src, dst, ext = detail
-                    self.logger.log(f"DRY-RUN: {src} -> {dst} (type: {ext})")
-                elif action == "rename":
-                    status, rename_detail, ext = detail
-                    if status == "ok":
-                        self.logger.log(f"RENAME: {path} -> {rename_detail} (type: {ext})")
-                    else:
-                        self._handle_rename_failure(path, status, rename_detail)
+            def results():
+                # Submit the next chunk before draining the current one, so
+                # the pool never idles at a chunk boundary
+                pending = executor.map(process_entry, first_chunk)
+                for chunk in chunks:
+                    submitted = executor.map(process_entry, chunk)
+                    yield from pending
+                    pending = submitted
+                yield from pending
+
+            for code, path, payload in results():
+                processed += 1
+                if self.queue is not None and (
+                    processed % PROGRESS_EVERY == 0
+                    or time.monotonic() - last_progress >= PROGRESS_INTERVAL
+                ):
+                    last_progress = time.monotonic()
+                    self.emit("progress", None, f"Files processed: {processed} ({path[rel_start:]})")
+
+                handlers[code](self, path, payload)
+
+        self.logger.log(f"Found {processed} files.")
+
+        if seen is not None:
+            merged = detect_cache.merge_entries(cached_exts, seen, target_dir)
+            if not detect_cache.save_cache(cache_path, merged):
+                self.logger.log(f"WARNING could not write detection cache: {cache_path}")
+        self.emit("progress", 1.0, f"Files processed: {processed}")
 
-        # ----------------------------------------------------
-        # Done
-        # ----------------------------------------------------
-        self.emit("done", self.stats)
+    # --------------------------------------------------------
+    # Result handlers (run on the result loop, indexed by action code)
+    # --------------------------------------------------------
+    # Per-file messages pass %-style args so formatting happens on the
+    # logger's listener thread, not here.
+    def _on_error(self, path, error):
+        self.stats["other"].append(path)
+        self.logger.log("ERROR processing %s: %s", path, error)
+
+    def _on_skip(self, path, detail):
+        reason, header, size = detail
+        self._handle_detection_failure(path, reason, header, size)
+
+    def _on_correct(self, path, _payload):
+        self.stats["correct_ext"].append(path)
+        self.logger.log("OK correct ext: %s", path)
+
+    def _on_report(self, path, detail):
+        dst, ext = detail
+        self.logger.log("REPORT: %s -> %s (type: %s)", path, dst, ext)
+
+    def _on_quarantine(self, path, detail):
+        status, rename_detail = detail
+        if status == "ok":
+            self.logger.log("QUARANTINE: %s -> %s", path, rename_detail)
+        else:
+            self._handle_rename_failure(path, status, rename_detail)
+
+    def _on_dry_run(self, path, detail):
+        dst, ext = detail
+        self.logger.log("DRY-RUN: %s -> %s (type: %s)", path, dst, ext)
+
+    def _on_rename(self, path, detail):
+        status, rename_detail, ext = detail
+        if status == "ok":
+            self.logger.log("RENAME: %s -> %s (type: %s)", path, rename_detail, ext)
+        else:
+            self._handle_rename_failure(path, status, rename_detail)
+
+    # Same order as the _A_* action codes
+    _RESULT_HANDLERS = (
+        _on_error,
+        _on_skip,
+        _on_correct,
+        _on_report,
+        _on_quarantine,
+        _on_dry_run,
+        _on_rename,
+    )
 
     # --------------------------------------------------------
     # Detection failure handler
     # --------------------------------------------------------
-    def _handle_detection_failure(self, path, reason):
+    def _handle_detection_failure(self, path, reason, header=None, size=None):
         stats = self.stats
         logger = self.logger
 
-        if reason == "unreadable":
-            stats["unreadable"].append(path)
-            logger.log(f"SKIP unreadable: {path}")
-        elif reason == "too_small":
-            stats["too_small"].append(path)
-            logger.log(f"SKIP too small: {path}")
-        elif reason == "ambiguous_riff":
-            stats["ambiguous_riff"].append(path)
-            logger.log(f"SKIP ambiguous RIFF: {path}")
-        elif reason == "ambiguous_iso":
-            stats["ambiguous_iso"].append(path)
-            logger.log(f"SKIP ambiguous ISO BMFF: {path}")
-        elif is_zero_byte(path):
+        skip = _DETECTION_SKIPS.get(reason)
+        if skip is not None:
+            key, fmt = skip
+            stats[key].append(path)
+            logger.log(fmt, path)
+        elif size == 0:
             stats["zero_byte"].append(path)
-            logger.log(f"SKIP zero-byte: {path}")
+            logger.log("SKIP zero-byte: %s", path)
         else:
-            stats["unknown"].append(path)
-            logger.log(f"SKIP unknown type: {path}")
+            # Cache the header prefix and size for deep/forensic summaries
+            stats["unknown"].append((path, (header or b"")[:16], size))
+            logger.log("SKIP unknown type: %s", path)
 
     # --------------------------------------------------------
     # Rename failure handler
@@ -322,10 +493,10 @@ class ExtensionRepairWorker(threading.Thread):
 
         if status == "permission":
             stats["permission_denied"].append(path)
-            logger.log(f"ERROR permission denied: {path}")
+            logger.log("ERROR permission denied: %s", path)
         elif status == "unicode":
             stats["unicode_issue"].append(path)
-            logger.log(f"ERROR unicode issue: {path}")
+            logger.log("ERROR unicode issue: %s", path)
         else:
             stats["other"].append(path)
-            logger.log(f"ERROR renaming {path}: {detail}")
\ No newline at end of file
+            logger.log("ERROR renaming %s: %s", path, detail)
\ No newline at end of file
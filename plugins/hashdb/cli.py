@@ -5,13 +5,13 @@ cli.py
 Command-line interface for the HashDB Toolbox.
 
 Subcommands:
-    hashdb scan --dir <folder> --db <db> --hash md5|sha256
-    hashdb verify --db <db> --hash md5|sha256 [--dir <folder>]
-    hashdb dedupe --db <db> --hash md5|sha256 [--hard-delete]
-    hashdb cleanup --db <db> [--delete-zero]
-    hashdb export --db <db> --hash md5|sha256 --out <file>
-    hashdb export-chunked --db <db> --hash md5|sha256 --outdir <folder>
-    hashdb report --db <db> --hash md5|sha256 --out <file>
+    hashdb scan --dir <folder> --db <db> --hash md5|sha1|sha256|blake3
+    hashdb verify --db <db> --hash md5|sha1|sha256|blake3 [--dir <folder>]
+    hashdb dedupe --db <db> --hash md5|sha1|sha256|blake3 [--hard-delete]
+    hashdb cleanup --db <db> [--delete-zero] [--vacuum]
+    hashdb export --db <db> --hash md5|sha1|sha256|blake3 --out <file>
+    hashdb export-chunked --db <db> --hash md5|sha1|sha256|blake3 --outdir <folder>
+    hashdb report --db <db> --hash md5|sha1|sha256|blake3 --out <file>
 
 This module is pure orchestration.
 """
@@ -19,11 +19,25 @@ This module is pure orchestration.
 import argparse
 import os
 import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-
-from .db import open_db, ensure_schema
+import threading
+from collections import OrderedDict
+from functools import partial
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor
+
+from .db import (
+    open_db,
+    db_file_paths,
+    ensure_schema,
+    hash_column,
+    create_hash_indexes,
+    drop_hash_indexes,
+    upsert_sql,
+    HASH_TYPES,
+    UPSERT_FIELDS,
+)
 from .scanner import build_work_list
-from .hasher import run_hashing, compute_hash
+from .hasher import run_hashing, compute_hash, require_hash_type
 from .deduper import dedupe
 from .maintenance import run_cleanup
 from .exporter import export_hashes, export_hashes_chunked
@@ -33,6 +47,15 @@ from shared.progress import cli_progress
 
 TABLE_NAME = "file_hashes"
 
+# Record dict -> upsert parameter tuple, in UPSERT_FIELDS order
+_upsert_params = itemgetter(*UPSERT_FIELDS)
+
+# Records per scan commit. Each commit is a journal sync, so small batches
+# spend most of the scan waiting on the disk; below MIN_EFFICIENT_BATCH the
+# commit overhead dominates the upserts themselves.
+DEFAULT_BATCH_SIZE = 5000
+MIN_EFFICIENT_BATCH = 500
+
 
 # ------------------------------------------------------------
 # Subcommand: scan
@@ -46,6 +69,12 @@ def cmd_scan(args):
         print(f"[ERROR] Folder not found: {folder}", flush=True)
         return
 
+    try:
+        require_hash_type(hash_type)
+    except (ValueError, RuntimeError) as e:
+        print(f"[ERROR] {e}", flush=True)
+        return
+
     with open_db(db_path) as conn:
         ensure_schema(conn)
 
@@ -59,53 +88,61 @@ def cmd_scan(args):
                 f"SELECT * FROM {t} WHERE filepath=?", (p,)
             ).fetchone(),
             threads=args.threads,
+            # The live WAL/SHM files vanish when the connection closes
+            skip_paths=db_file_paths(db_path),
         )
 
         print(f"[INFO] {len(work)} files need hashing", flush=True)
 
-        batch_size = args.batch_size if hasattr(args, 'batch_size') and args.batch_size else 50
+        batch_size = args.batch_size if hasattr(args, 'batch_size') and args.batch_size else DEFAULT_BATCH_SIZE
+        if batch_size < MIN_EFFICIENT_BATCH:
+            print(
+                f"[WARN] --batch-size {batch_size} commits very often; "
+                f"sizes below {MIN_EFFICIENT_BATCH} make large scans much slower.",
+                flush=True,
+            )
         committed_count = [0]  # mutable container for closure
 
         def commit_batch(records):
             """Write a batch of records to DB and commit."""
-            for rec in records:
-                conn.execute(
-                    f"""
-                    INSERT INTO {TABLE_NAME} (
-                        filepath, filename, size_bytes,
-                        hash_md5, hash_sha256,
-                        imported_on, last_scanned_on,
-                        created_on, modified_on, flags
-                    )
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(filepath) DO UPDATE SET
-                        filename=excluded.filename,
-                        size_bytes=excluded.size_bytes,
-                        hash_md5=excluded.hash_md5,
-                        hash_sha256=excluded.hash_sha256,
-                        last_scanned_on=excluded.last_scanned_on,
-                        created_on=excluded.created_on,
-                        modified_on=excluded.modified_on
-                    """,
-                    (
-                        rec["filepath"], rec["filename"], rec["size_bytes"],
-                        rec["hash_md5"], rec["hash_sha256"],
-                        rec["imported_on"], rec["last_scanned_on"],
-                        rec["created_on"], rec["modified_on"], rec["flags"],
-                    )
-                )
+            params = [_upsert_params(rec) for rec in records]
+
+            # One explicit transaction (one journal sync) per batch. IMMEDIATE
+            # takes the write lock up front, so another writer makes us wait
+            # here instead of failing halfway through the batch. executemany
+            # prepares the statement once for the whole batch.
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(upsert_sql(TABLE_NAME), params)
+            except Exception:
+                conn.rollback()
+                raise
             conn.commit()
             committed_count[0] += len(records)
             print(f"[INFO] Committed {committed_count[0]} records to DB", flush=True)
 
-        results = run_hashing(
-            work,
-            hash_type,
-            threads=args.threads,
-            progress_callback=cli_progress,
-            batch_callback=commit_batch,
-            batch_size=batch_size,
-        )
+        # Maintaining the hash indexes row by row is slower than one sorted
+        # rebuild when most of the table is new (first scan of a large tree)
+        defer_index = getattr(args, "defer_index", False) and bool(work)
+        if defer_index:
+            print("[INFO] Dropping hash indexes until the scan finishes", flush=True)
+            drop_hash_indexes(conn, TABLE_NAME)
+
+        try:
+            results = run_hashing(
+                work,
+                hash_type,
+                threads=args.threads,
+                progress_callback=cli_progress,
+                batch_callback=commit_batch,
+                batch_size=batch_size,
+            )
+        finally:
+            if defer_index:
+                print("[INFO] Rebuilding hash indexes…", flush=True)
+                create_hash_indexes(conn, TABLE_NAME)
+                conn.commit()
 
     print("[DONE] Scan complete.", flush=True)
 
@@ -113,12 +150,99 @@ def cmd_scan(args):
 # ------------------------------------------------------------
 # Subcommand: verify
 # ------------------------------------------------------------
-def _verify_one(filepath: str, expected_hash: str, hash_type: str):
-    if not filepath or not os.path.exists(filepath):
+# On Windows a directory listing already carries each entry's stat, so one
+# scandir() per directory replaces a stat() per file. Elsewhere
+# DirEntry.stat() is a stat() call anyway and listings would only add work.
+_LISTING_STATS = os.name == "nt"
+
+
+class _DirListings:
+    """
+    Small thread-safe LRU of {name: DirEntry} listings for recently seen
+    directories. verify reads rows in filepath order, so the workers are
+    all inside the same few directories at any time.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._listings = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+
+    def get(self, directory, capacity):
+        """Return the listing for directory, or None if it can't be read."""
+        with self._lock:
+            listing = self._listings.get(directory)
+            if listing is not None:
+                self._listings.move_to_end(directory)
+                return listing
+
+        try:
+            with os.scandir(directory) as it:
+                listing = {entry.name: entry for entry in it}
+        except (FileNotFoundError, NotADirectoryError):
+            listing = {}
+        except OSError:
+            return None
+
+        with self._lock:
+            self._listings[directory] = listing
+            while len(self._listings) > max(1, capacity):
+                self._listings.popitem(last=False)
+        return listing
+
+
+_dir_listings = _DirListings()
+
+
+def _listed_stat(filepath, capacity):
+    """os.stat(filepath), answered from the parent's cached listing."""
+    directory, name = os.path.split(filepath)
+    listing = _dir_listings.get(directory, capacity)
+    entry = listing.get(name) if listing is not None else None
+    if entry is None:
+        # Unlisted (or unreadable directory): let the real stat decide, so
+        # case-insensitive name matches aren't reported missing
+        return os.stat(filepath)
+    return entry.stat()
+
+
+def _verify_one(
+    filepath: str,
+    expected_hash: str,
+    hash_type: str,
+    size_bytes=None,
+    modified_on=None,
+    listing_cache: int = 0,
+    mtime_ns=None,
+):
+    """
+    Check one DB record against the file on disk.
+
+    When size_bytes and mtime_ns (or, for rows older than that column,
+    modified_on) are given (verify --quick), a file whose size and mtime
+    still match the record counts as ok without being read.
+    listing_cache > 0 takes the stat from cached directory listings (see
+    _LISTING_STATS), keeping that many directories.
+    """
+    if not filepath:
+        return "missing", filepath, expected_hash, None, None
+    try:
+        st = _listed_stat(filepath, listing_cache) if listing_cache else os.stat(filepath)
+    except OSError:
         return "missing", filepath, expected_hash, None, None
 
-    if not expected_hash:
-        return "nohash", filepath, expected_hash, None, None
+    if mtime_ns is not None:
+        unchanged = st.st_mtime_ns == mtime_ns
+    else:
+        unchanged = (
+            modified_on is not None
+            and datetime.datetime.fromtimestamp(st.st_mtime).isoformat() == modified_on
+        )
+    if unchanged and st.st_size == size_bytes:
+        return "ok", filepath, expected_hash, None, None
 
     try:
         actual = compute_hash(filepath, hash_type)
@@ -131,37 +255,85 @@ def _verify_one(filepath: str, expected_hash: str, hash_type: str):
     return "ok", filepath, expected_hash, actual, None
 
 
+def _verify_row(row, hash_type, quick=False, listing_cache=0):
+    """_verify_one for a (filepath, hash[, size_bytes, modified_on, mtime_ns]) row."""
+    if quick:
+        return _verify_one(row[0], row[1], hash_type, row[2], row[3], listing_cache, row[4])
+    return _verify_one(row[0], row[1], hash_type, listing_cache=listing_cache)
+
+
+# Rows fetched and submitted per step. verify keeps at most two batches in
+# flight, so memory stays bounded however large the table is.
+VERIFY_BATCH = 512
+
+# Full verifies with these hashes are CPU-bound on fast disks, so they run
+# in worker processes instead of threads. Below VERIFY_PROCESS_MIN records
+# the process start-up costs more than it saves; rows are shipped to the
+# workers VERIFY_CHUNK at a time to amortise the IPC.
+_CPU_BOUND_HASHES = ("sha256", "blake3")
+VERIFY_PROCESS_MIN = 500
+VERIFY_CHUNK = 64
+
+
 def cmd_verify(args):
     db_path = args.database
     hash_type = args.hash
     threads = args.threads
     root_filter = args.dir
 
-    hash_col = "hash_md5" if hash_type == "md5" else "hash_sha256"
+    hash_col = hash_column(hash_type)
+
+    try:
+        require_hash_type(hash_type)
+    except (ValueError, RuntimeError) as e:
+        print(f"[ERROR] {e}", flush=True)
+        return
 
-    root_prefix = None
+    # --dir becomes a filepath range: every path starting with "<dir>/"
+    # sorts between that prefix and the prefix with its separator bumped
+    # by one. Unlike LIKE, the comparison is case-sensitive, has no
+    # wildcards to escape, and is answered from the filepath index.
+    # Stored paths are only as normalised as the scan root was, so rows
+    # that may not be (relative, "." or ".." segments, doubled or
+    # alternate separators) are also matched after normpath() in Python.
+    scope, params = "", ()
+    in_root = None
     if root_filter:
         if not os.path.isdir(root_filter):
             print(f"[ERROR] Folder not found: {root_filter}", flush=True)
             return
-        root_prefix = os.path.normpath(os.path.abspath(root_filter))
-
-    with open_db(db_path) as conn:
-        ensure_schema(conn)
-
-        cur = conn.cursor()
-        cur.execute(f"SELECT filepath, {hash_col} FROM {TABLE_NAME}")
-        rows = cur.fetchall()
-
-    if root_prefix:
-        rows = [r for r in rows if os.path.normpath(r["filepath"]).startswith(root_prefix)]
-
-    total = len(rows)
-    if total == 0:
-        print("[INFO] No records to verify.", flush=True)
-        return
-
-    print(f"[INFO] Verifying {total} DB record(s) using {hash_type.upper()}…", flush=True)
+        low = os.path.join(os.path.normpath(os.path.abspath(root_filter)), "")
+        high = low[:-1] + chr(ord(low[-1]) + 1)
+        anchor = os.path.splitdrive(low)[0] + os.sep
+        markers = [os.sep + "." + os.sep, os.sep + ".." + os.sep, os.sep * 2]
+        if os.path.altsep:
+            markers.append(os.path.altsep)
+
+        def in_root(filepath):
+            return os.path.normpath(os.path.abspath(filepath)).startswith(low)
+
+        unnormalised = " OR ".join(["substr(filepath, 1, ?) != ?"] + ["instr(filepath, ?) > 0"] * len(markers))
+        scope = f"((filepath >= ? AND filepath < ?) OR (({unnormalised}) AND verify_in_root(filepath))) AND "
+        params = (low, high, len(anchor), anchor, *markers)
+
+    # Records without a hash of this type can't be verified, so they are
+    # only counted and never reach the workers. "!= ''" is false for NULL.
+    where = f" WHERE {scope}{hash_col} != ''"
+    where_nohash = f" WHERE {scope}({hash_col} IS NULL OR {hash_col} = '')"
+
+    if args.quick:
+        columns = f"filepath, {hash_col}, size_bytes, modified_on, mtime_ns"
+    else:
+        columns = f"filepath, {hash_col}"
+    # One cached listing per worker is enough to keep every worker's
+    # current directory resident. Listings never outlive a verify run.
+    _dir_listings.clear()
+    verify_row = partial(
+        _verify_row,
+        hash_type=hash_type,
+        quick=args.quick,
+        listing_cache=threads if _LISTING_STATS else 0,
+    )
 
     counts = {
         "ok": 0,
@@ -173,32 +345,77 @@ def cmd_verify(args):
 
     problems_shown = 0
 
-    with ThreadPoolExecutor(max_workers=threads) as executor:
-        futures = []
-        for r in rows:
-            futures.append(
-                executor.submit(_verify_one, r["filepath"], r[hash_col], hash_type)
+    # Rows are streamed from the cursor rather than fetched all at once, so
+    # the connection stays open for the whole verify (WAL mode lets a scan
+    # keep writing meanwhile).
+    with open_db(db_path) as conn:
+        ensure_schema(conn)
+        if in_root is not None:
+            conn.create_function("verify_in_root", 1, in_root, deterministic=True)
+
+        total = conn.execute(f"SELECT COUNT(*) FROM {TABLE_NAME}{where}", params).fetchone()[0]
+        counts["nohash"] = conn.execute(
+            f"SELECT COUNT(*) FROM {TABLE_NAME}{where_nohash}", params
+        ).fetchone()[0]
+
+        if total == 0 and counts["nohash"] == 0:
+            print("[INFO] No records to verify.", flush=True)
+            return
+
+        print(f"[INFO] Verifying {total} DB record(s) using {hash_type.upper()}…", flush=True)
+        if counts["nohash"]:
+            print(
+                f"[INFO] Skipping {counts['nohash']} record(s) with no {hash_type.upper()} hash",
+                flush=True,
             )
 
-        for i, fut in enumerate(as_completed(futures)):
-            status, filepath, expected, actual, err = fut.result()
-            counts[status] += 1
-
-            if status in ("missing", "nohash", "mismatch", "error"):
-                problems_shown += 1
-                if status == "missing":
-                    print(f"[MISSING] {filepath}", flush=True)
-                elif status == "nohash":
-                    print(f"[NOHASH]  {filepath}", flush=True)
-                elif status == "mismatch":
-                    print(f"[MISMATCH] {filepath}", flush=True)
-                    print(f"  expected: {expected}", flush=True)
-                    print(f"  actual:   {actual}", flush=True)
-                else:
-                    print(f"[ERROR] {filepath}: {err}", flush=True)
+        # filepath order (read straight off its index) keeps each
+        # directory's rows together
+        cur = conn.execute(f"SELECT {columns} FROM {TABLE_NAME}{where} ORDER BY filepath", params)
+        batches = iter(lambda: cur.fetchmany(VERIFY_BATCH), [])
+
+        # --quick mostly stats, which threads handle fine
+        use_processes = (
+            not args.quick
+            and hash_type in _CPU_BOUND_HASHES
+            and total >= VERIFY_PROCESS_MIN
+        )
+        if use_processes:
+            # Imported here: multiprocessing is a noticeable share of startup
+            from concurrent.futures import ProcessPoolExecutor
+            executor_cls, chunksize = ProcessPoolExecutor, VERIFY_CHUNK
+        else:
+            executor_cls, chunksize = ThreadPoolExecutor, 1
+
+        with executor_cls(max_workers=threads) as executor:
+
+            def results():
+                # Submit the next batch before draining the current one, so
+                # the pool never idles at a batch boundary. Rows are plain
+                # tuples, so they pickle as-is for worker processes.
+                pending = ()
+                for batch in batches:
+                    submitted = executor.map(verify_row, batch, chunksize=chunksize)
+                    yield from pending
+                    pending = submitted
+                yield from pending
+
+            for i, (status, filepath, expected, actual, err) in enumerate(results()):
+                counts[status] += 1
+
+                if status in ("missing", "mismatch", "error"):
+                    problems_shown += 1
+                    if status == "missing":
+                        print(f"[MISSING] {filepath}", flush=True)
+                    elif status == "mismatch":
+                        print(f"[MISMATCH] {filepath}", flush=True)
+                        print(f"  expected: {expected}", flush=True)
+                        print(f"  actual:   {actual}", flush=True)
+                    else:
+                        print(f"[ERROR] {filepath}: {err}", flush=True)
                     
-            if args.progress and (i + 1) % 200 == 0:
-                cli_progress((i + 1) / total, "verify")
+                if args.progress and (i + 1) % 200 == 0:
+                    cli_progress((i + 1) / total, "verify")
 
     print("\n[DONE] Verify complete.", flush=True)
     print(
@@ -236,6 +453,7 @@ def cmd_dedupe(args):
             safe_delete=safe_delete,
             quarantine_dir=quarantine,
             progress_callback=cli_progress,
+            threads=args.threads,
         )
 
     ts = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -262,6 +480,7 @@ def cmd_cleanup(args):
             delete_zero_bytes=args.delete_zero,
             threads=args.threads,
             progress_callback=cli_progress,
+            full_vacuum=args.vacuum,
         )
 
     print(f"[DONE] Cleanup complete.", flush=True)
@@ -321,25 +540,40 @@ def _add_subcommands(sub):
     p = sub.add_parser("scan", help="Scan and hash files")
     p.add_argument("directory", help="Directory to scan")
     p.add_argument("--db", help="Database path (default: .hashdb.sqlite in scan directory)")
-    p.add_argument("--hash", choices=["md5", "sha256"], default="sha256", help="Hash algorithm (default: sha256)")
+    p.add_argument("--hash", choices=HASH_TYPES, default="sha256", help="Hash algorithm (default: sha256)")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
     p.add_argument("--full", action="store_true", help="Full scan, ignore optimization")
-    p.add_argument("--batch-size", type=int, default=50, help="Commit batch size (default: 50)")
+    p.add_argument(
+        "--defer-index",
+        action="store_true",
+        help="Drop hash indexes during the scan and rebuild them after (faster initial imports)",
+    )
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"Records per DB commit (default: {DEFAULT_BATCH_SIZE})",
+    )
     p.set_defaults(func=cmd_scan)
 
     # verify
     p = sub.add_parser("verify", help="Verify files against DB hashes (non-destructive)")
     p.add_argument("database", help="Database path")
-    p.add_argument("--hash", choices=["md5", "sha256"], default="sha256", help="Hash algorithm (default: sha256)")
+    p.add_argument("--hash", choices=HASH_TYPES, default="sha256", help="Hash algorithm (default: sha256)")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
     p.add_argument("--dir", help="Only verify records under this directory")
     p.add_argument("--progress", action="store_true", help="Show periodic progress")
+    p.add_argument(
+        "--quick",
+        action="store_true",
+        help="Trust files whose size and mtime match the DB (skips reading them; misses silent corruption)",
+    )
     p.set_defaults(func=cmd_verify)
 
     # dedupe
     p = sub.add_parser("dedupe", help="Remove duplicate files")
     p.add_argument("database", help="Database path")
-    p.add_argument("--hash", choices=["md5", "sha256"], default="sha256")
+    p.add_argument("--hash", choices=HASH_TYPES, default="sha256")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
     p.add_argument("--hard-delete", action="store_true", help="Permanently delete (dangerous)")
     p.add_argument("--quarantine", help="Quarantine directory")
@@ -350,6 +584,11 @@ def _add_subcommands(sub):
     p.add_argument("database", help="Database path")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
     p.add_argument("--delete-zero", action="store_true", help="Delete zero-byte files")
+    p.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Rewrite the whole database with VACUUM instead of an incremental vacuum",
+    )
     p.set_defaults(func=cmd_cleanup)
 
     # export
@@ -357,7 +596,7 @@ def _add_subcommands(sub):
     p.add_argument("database", help="Database path")
     p.add_argument("output", help="Output file path")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
-    p.add_argument("--hash", choices=["md5", "sha256"], default="sha256")
+    p.add_argument("--hash", choices=HASH_TYPES, default="sha256")
     p.set_defaults(func=cmd_export)
 
     # export-chunked
@@ -365,7 +604,7 @@ def _add_subcommands(sub):
     p.add_argument("database", help="Database path")
     p.add_argument("output_dir", help="Output directory")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
-    p.add_argument("--hash", choices=["md5", "sha256"], default="sha256")
+    p.add_argument("--hash", choices=HASH_TYPES, default="sha256")
     p.set_defaults(func=cmd_export_chunked)
 
     # report
@@ -373,7 +612,7 @@ def _add_subcommands(sub):
     p.add_argument("database", help="Database path")
     p.add_argument("output", help="Output report path")
     p.add_argument("--threads", type=int, default=8, help="Worker threads (default: 8)")
-    p.add_argument("--hash", choices=["md5", "sha256"], default="sha256")
+    p.add_argument("--hash", choices=HASH_TYPES, default="sha256")
     p.set_defaults(func=cmd_report)
 
 
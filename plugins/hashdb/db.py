@@ -17,6 +17,7 @@ This module does NOT:
 Other modules (hasher, scanner, deduper, etc.) should build on this.
 """
 
+import functools
 import os
 import sqlite3
 from contextlib import contextmanager
@@ -25,22 +26,99 @@ from typing import Optional, Dict, Any
 
 DEFAULT_TABLE_NAME = "file_hashes"
 
+# Supported hash types and the column each one's digests are stored in
+HASH_COLUMNS = {
+    "md5": "hash_md5",
+    "sha1": "hash_sha1",
+    "sha256": "hash_sha256",
+    "blake3": "hash_blake3",
+}
+HASH_TYPES = tuple(HASH_COLUMNS)
+
+# Applied by connect(fast=True). WAL turns commits into appends and lets
+# readers run alongside a writer; synchronous=NORMAL only syncs at WAL
+# checkpoints, so a power loss can drop the last commits but never corrupts
+# the database. The rest trade memory for fewer page reads.
+FAST_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",  # 64 MiB
+    "PRAGMA mmap_size=268435456",  # 256 MiB
+)
+
+# Applied by tune_for_bulk() before whole-table passes (cleanup, chunked
+# export, duplicate report). Connection-local only: nothing here changes
+# the database file, so it is safe on connections the caller opened.
+BULK_PRAGMAS = (
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-262144",  # 256 MiB
+    "PRAGMA mmap_size=1073741824",  # 1 GiB
+)
+
 
 # ------------------------------------------------------------
 # Connection management
 # ------------------------------------------------------------
-def connect(db_path: str) -> sqlite3.Connection:
+def db_file_paths(db_path: str):
+    """
+    Return the database file and the sidecars SQLite keeps next to it
+    (-wal and -shm in WAL mode, -journal otherwise). A scan of the folder
+    holding the database must not hash these: the sidecars come and go
+    with the connection.
+    """
+    return [db_path] + [db_path + suffix for suffix in ("-wal", "-shm", "-journal")]
+
+
+def connect(db_path: str, fast: bool = True, rows_as_dict: bool = False) -> sqlite3.Connection:
     """
     Open a SQLite connection with sane defaults.
+
+    fast=True applies FAST_PRAGMAS; pass fast=False for SQLite's fully
+    synchronous defaults.
+
+    Rows are plain tuples unless rows_as_dict=True (sqlite3.Row, which
+    costs a little per row on large SELECTs). Queries that want names
+    for a few rows can set row_factory on their own cursor instead.
     """
     os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    # Every statement here is one of a handful of fixed strings, so a larger
+    # prepared-statement cache means each is compiled once per connection
+    conn = sqlite3.connect(db_path, cached_statements=256)
+    if rows_as_dict:
+        conn.row_factory = sqlite3.Row
+    # New databases free pages incrementally (see vacuum()). This only takes
+    # effect before the first table exists, and before WAL is switched on;
+    # on existing databases it is a no-op.
+    try:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    except sqlite3.DatabaseError:
+        pass
+    if fast:
+        _apply_pragmas(conn, FAST_PRAGMAS)
     return conn
 
 
+def _apply_pragmas(conn: sqlite3.Connection, pragmas):
+    for pragma in pragmas:
+        try:
+            conn.execute(pragma)
+        except sqlite3.DatabaseError:
+            # e.g. WAL unsupported by the filesystem or the DB is busy;
+            # the defaults still work, just slower.
+            pass
+
+
+def tune_for_bulk(conn: sqlite3.Connection):
+    """
+    Give conn a larger page cache and memory map for a pass over the whole
+    table (see BULK_PRAGMAS).
+    """
+    _apply_pragmas(conn, BULK_PRAGMAS)
+
+
 @contextmanager
-def open_db(db_path: str):
+def open_db(db_path: str, fast: bool = True, rows_as_dict: bool = False):
     """
     Context manager for opening/closing the DB.
 
@@ -48,7 +126,7 @@ def open_db(db_path: str):
         with open_db(db_path) as conn:
             ...
     """
-    conn = connect(db_path)
+    conn = connect(db_path, fast=fast, rows_as_dict=rows_as_dict)
     try:
         yield conn
         conn.commit()
@@ -56,6 +134,31 @@ def open_db(db_path: str):
         conn.close()
 
 
+def hash_column(hash_type: str) -> str:
+    """
+    Return the column that stores digests for hash_type.
+    """
+    try:
+        return HASH_COLUMNS[hash_type]
+    except KeyError:
+        raise ValueError(f"Unsupported hash type: {hash_type}") from None
+
+
+def duplicate_hashes_sql(table_name: str, col: str) -> str:
+    """
+    Return a subquery selecting (as h, with its row count as n) every value
+    of col that more than one row shares. SQLite answers it from the hash
+    index, so callers can join back to just the duplicated rows instead of
+    grouping every row in Python.
+    """
+    return f"""
+        SELECT {col} AS h, COUNT(*) AS n FROM {table_name}
+        WHERE {col} IS NOT NULL
+        GROUP BY {col}
+        HAVING COUNT(*) > 1
+    """
+
+
 # ------------------------------------------------------------
 # Schema and index creation
 # ------------------------------------------------------------
@@ -79,28 +182,127 @@ def ensure_schema(conn: sqlite3.Connection, table_name: str = DEFAULT_TABLE_NAME
             last_scanned_on TEXT,
             created_on TEXT,
             modified_on TEXT,
-            flags TEXT
+            flags TEXT,
+            hash_sha1 TEXT,
+            hash_blake3 TEXT,
+            mtime_ns INTEGER
         )
     """)
 
-    # Indexes
-    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_filepath ON {table_name}(filepath)")
-    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_hash_md5 ON {table_name}(hash_md5)")
-    cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_hash_sha256 ON {table_name}(hash_sha256)")
+    # Columns added after the first release; older databases get them on
+    # first open. mtime_ns (st_mtime_ns) is what rescans compare, so they
+    # don't have to format an ISO modified_on for every file.
+    existing = {row[1] for row in cur.execute(f"PRAGMA table_info({table_name})")}
+    added = {col: "TEXT" for col in HASH_COLUMNS.values()}
+    added["mtime_ns"] = "INTEGER"
+    for col, col_type in added.items():
+        if col not in existing:
+            cur.execute(f"ALTER TABLE {table_name} ADD COLUMN {col} {col_type}")
+
+    # Indexes. filepath lookups use the UNIQUE constraint's own index; the
+    # separate filepath index older versions created duplicated it and only
+    # cost an extra write per upsert.
+    cur.execute(f"DROP INDEX IF EXISTS idx_{table_name}_filepath")
+    create_hash_indexes(conn, table_name)
+
+    conn.commit()
+
+
+def create_hash_indexes(conn: sqlite3.Connection, table_name: str = DEFAULT_TABLE_NAME):
+    """
+    Create the (hash, filepath) index for every hash column.
+
+    Duplicate grouping and the hash -> filepath listings used by reports
+    and exports are answered from these indexes alone, without reading the
+    table. They supersede the older single-column hash indexes, which are
+    dropped.
+
+    The indexes are partial (WHERE col IS NOT NULL): a row only carries the
+    hash type it was scanned with, so full indexes would spend an entry,
+    and a write per upsert, on NULL for every other type. Every hash
+    lookup compares the column, which SQLite knows implies NOT NULL.
+    Full indexes from older versions are rebuilt as partial ones.
+    """
+    for col in HASH_COLUMNS.values():
+        name = f"idx_{table_name}_{col}_path"
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table_name}_{col}")
+        row = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        ).fetchone()
+        if row and "WHERE" not in row[0].upper():
+            conn.execute(f"DROP INDEX {name}")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} ON {table_name}({col}, filepath) WHERE {col} IS NOT NULL"
+        )
+
 
+def drop_hash_indexes(conn: sqlite3.Connection, table_name: str = DEFAULT_TABLE_NAME):
+    """
+    Drop the hash indexes ahead of a bulk load (see scan --defer-index).
+    create_hash_indexes() rebuilds them in one sorted pass afterwards.
+    """
+    for col in HASH_COLUMNS.values():
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table_name}_{col}_path")
     conn.commit()
 
 
 # ------------------------------------------------------------
 # Basic CRUD helpers
 # ------------------------------------------------------------
+# Column order of upsert_sql()'s placeholders
+UPSERT_FIELDS = (
+    "filepath",
+    "filename",
+    "size_bytes",
+    "hash_md5",
+    "hash_sha256",
+    "hash_sha1",
+    "hash_blake3",
+    "imported_on",
+    "last_scanned_on",
+    "created_on",
+    "modified_on",
+    "mtime_ns",
+    "flags",
+)
+
+# Kept from the existing row when a path is upserted again
+_UPSERT_PRESERVED = ("filepath", "imported_on", "flags")
+
+
+@functools.lru_cache(maxsize=8)
+def upsert_sql(table_name: str) -> str:
+    """
+    Return the INSERT ... ON CONFLICT(filepath) statement for table_name.
+
+    Bind values in UPSERT_FIELDS order. imported_on and flags keep their
+    original values when the path already exists. The string is built once
+    per table, so sqlite3's statement cache sees the identical object on
+    every call.
+    """
+    # Identifiers can't be bound as parameters; only accept plain names
+    if not table_name.isidentifier():
+        raise ValueError(f"Invalid table name: {table_name!r}")
+
+    cols = ", ".join(UPSERT_FIELDS)
+    placeholders = ", ".join("?" * len(UPSERT_FIELDS))
+    updates = ", ".join(
+        f"{col}=excluded.{col}" for col in UPSERT_FIELDS if col not in _UPSERT_PRESERVED
+    )
+    return (
+        f"INSERT INTO {table_name} ({cols}) VALUES ({placeholders}) "
+        f"ON CONFLICT(filepath) DO UPDATE SET {updates}"
+    )
+
+
 def upsert_file_record(
     conn: sqlite3.Connection,
     table_name: str,
     record: Dict[str, Any],
 ):
     """
-    Insert or update a file record based on filepath.
+    Insert or update a file record based on filepath (see upsert_sql:
+    an existing row keeps its imported_on and flags).
 
     Expected keys in record:
         - filepath (required)
@@ -108,53 +310,20 @@ def upsert_file_record(
         - size_bytes
         - hash_md5
         - hash_sha256
+        - hash_sha1
+        - hash_blake3
         - imported_on
         - last_scanned_on
         - created_on
         - modified_on
+        - mtime_ns
         - flags
     """
     # Ensure required key
     if "filepath" not in record:
         raise ValueError("record['filepath'] is required for upsert_file_record")
 
-    fields = [
-        "filepath",
-        "filename",
-        "size_bytes",
-        "hash_md5",
-        "hash_sha256",
-        "imported_on",
-        "last_scanned_on",
-        "created_on",
-        "modified_on",
-        "flags",
-    ]
-
-    # Build column/value lists
-    cols = []
-    placeholders = []
-    values = []
-
-    for field in fields:
-        cols.append(field)
-        placeholders.append("?")
-        values.append(record.get(field))
-
-    col_list = ", ".join(cols)
-    placeholder_list = ", ".join(placeholders)
-
-    # For update on conflict, we set everything except filepath
-    update_assignments = ", ".join(f"{col}=excluded.{col}" for col in cols if col != "filepath")
-
-    sql = f"""
-        INSERT INTO {table_name} ({col_list})
-        VALUES ({placeholder_list})
-        ON CONFLICT(filepath) DO UPDATE SET
-            {update_assignments}
-    """
-
-    conn.execute(sql, values)
+    conn.execute(upsert_sql(table_name), [record.get(field) for field in UPSERT_FIELDS])
 
 
 def get_record_by_path(
@@ -167,6 +336,7 @@ def get_record_by_path(
     Returns a sqlite3.Row or None.
     """
     cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
     cur.execute(
         f"SELECT * FROM {table_name} WHERE filepath = ?",
         (filepath,),
@@ -176,17 +346,31 @@ def get_record_by_path(
 
 def iter_all_records(conn: sqlite3.Connection, table_name: str):
     """
-    Generator over all records in the table.
+    Generator over all records in the table, as sqlite3.Row.
     """
     cur = conn.cursor()
+    cur.row_factory = sqlite3.Row
     cur.execute(f"SELECT * FROM {table_name}")
     for row in cur:
         yield row
 
 
-def vacuum(conn: sqlite3.Connection):
+def vacuum(conn: sqlite3.Connection, full: bool = False):
     """
-    Run VACUUM to compact the database.
+    Compact the database.
+
+    By default this runs PRAGMA incremental_vacuum, which returns only the
+    pages freed since the last run and costs I/O in proportion to them.
+    Databases created before auto_vacuum=INCREMENTAL was set free nothing
+    this way. full=True runs VACUUM, which rewrites the whole file and
+    also switches such a database to incremental mode.
     """
-    conn.execute("VACUUM")
+    conn.commit()
+    if full:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        # executescript steps the pragma to completion; execute() would
+        # free a single page
+        conn.executescript("PRAGMA incremental_vacuum;")
     conn.commit()
\ No newline at end of file
@@ -5,7 +5,7 @@ deduper.py
 Duplicate detection + safe deletion logic for the HashDB system.
 
 This module:
-- Finds duplicate files using the database (MD5 or SHA-256)
+- Finds duplicate files using the database (any stored hash type)
 - Groups duplicates into sets
 - Scores files to choose the "best" one to keep
 - Supports safe delete (quarantine) or hard delete
@@ -20,42 +20,66 @@ It does NOT:
 
 import os
 import shutil
+import sqlite3
 import datetime
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+from operator import itemgetter
+from typing import List, Dict, Tuple, Optional, Iterator
 from pathlib import Path
 
+from .db import duplicate_hashes_sql, hash_column
+
 
 # ------------------------------------------------------------
 # Duplicate detection
 # ------------------------------------------------------------
-def find_duplicates(conn, table_name: str, hash_type: str = "md5") -> Dict[str, List[Dict]]:
+def count_duplicate_sets(conn, table_name: str, hash_type: str = "md5") -> int:
     """
-    Return a dict: hash_value -> list of DB rows (duplicates).
-    hash_type: "md5" or "sha256"
+    Return how many hash values are shared by more than one row.
+    """
+    col = hash_column(hash_type)
+    sql = f"SELECT COUNT(*) FROM ({duplicate_hashes_sql(table_name, col)})"
+    return conn.execute(sql).fetchone()[0]
+
+
+def find_duplicates(conn, table_name: str, hash_type: str = "md5") -> Iterator[Tuple[str, List]]:
+    """
+    Yield (hash_value, rows) for every set of duplicate DB rows.
+    hash_type: any key of db.HASH_COLUMNS
+
+    Rows are sqlite3.Row objects carrying only the columns dedupe uses
+    (id, filepath, filename, size_bytes and the hash), and sets are
+    streamed from the cursor one at a time.
     """
     cur = conn.cursor()
+    # Name access for the handful of rows in duplicate sets, whatever the
+    # connection's own row_factory
+    cur.row_factory = sqlite3.Row
 
-    col = "hash_md5" if hash_type == "md5" else "hash_sha256"
+    col = hash_column(hash_type)
 
+    # SQLite finds the duplicated hashes from the hash index, so only rows
+    # that belong to a duplicate set are ever read. Sorting by hash makes
+    # each set contiguous; id keeps the original order within a set.
     cur.execute(f"""
-        SELECT * FROM {table_name}
-        WHERE {col} IS NOT NULL
+        SELECT t.id, t.filepath, t.filename, t.size_bytes, t.{col}
+        FROM {table_name} AS t
+        JOIN ({duplicate_hashes_sql(table_name, col)}) AS d ON t.{col} = d.h
+        ORDER BY t.{col}, t.id
     """)
 
-    groups = {}
-    for row in cur.fetchall():
-        h = row[col]
-        if h not in groups:
-            groups[h] = []
-        groups[h].append(dict(row))
-
-    # Keep only groups with more than one file
-    return {h: rows for h, rows in groups.items() if len(rows) > 1}
+    for h, rows in groupby(cur, key=itemgetter(col)):
+        yield h, list(rows)
 
 
 # ------------------------------------------------------------
 # Scoring logic (choose best file to keep)
 # ------------------------------------------------------------
+# Name fragments that usually mark the copy rather than the original
+_DUPLICATE_MARKERS = ("_1", "(1)", "-copy", "-edited", " - ")
+
+
 def score_file(path: str) -> float:
     """
     Heuristic scoring to choose the best file to keep.
@@ -65,7 +89,7 @@ def score_file(path: str) -> float:
     score = 0
 
     # Penalize common duplicate indicators
-    if any(suffix in name for suffix in ["_1", "(1)", "-copy", "-edited", " - "]):
+    if any(marker in name for marker in _DUPLICATE_MARKERS):
         score += 10
 
     # Penalize deeper paths
@@ -74,10 +98,10 @@ def score_file(path: str) -> float:
     # Penalize long names
     score += len(name) / 10
 
-    # Prefer older files (lower ctime)
+    # Prefer older files (lower ctime); one stat call per file
     try:
-        score -= os.path.getctime(path) / 1e6
-    except Exception:
+        score -= os.stat(path).st_ctime / 1e6
+    except OSError:
         pass
 
     return score
@@ -86,6 +110,9 @@ def score_file(path: str) -> float:
 def choose_best_file(rows: List[Dict]) -> Dict:
     """
     Given a list of DB rows for duplicate files, return the best one to keep.
+
+    min() evaluates the key once per row, so each candidate is scored (and
+    stat'ed) exactly once.
     """
     return min(rows, key=lambda r: score_file(r["filepath"]))
 
@@ -97,19 +124,37 @@ def safe_move(src: str, quarantine_dir: str) -> str:
     """
     Move a file to the quarantine directory with collision-safe renaming.
     Returns the final destination path.
+
+    The name is claimed by creating it with O_EXCL, so concurrent movers
+    (dedupe threads, or another process sharing the quarantine) can never
+    pick the same one; the file is then moved over its placeholder.
     """
     os.makedirs(quarantine_dir, exist_ok=True)
 
     base = os.path.basename(src)
+    name, ext = os.path.splitext(base)
     dest = os.path.join(quarantine_dir, base)
 
     counter = 1
-    while os.path.exists(dest):
-        name, ext = os.path.splitext(base)
-        dest = os.path.join(quarantine_dir, f"{name}_{counter}{ext}")
-        counter += 1
+    while True:
+        try:
+            fd = os.open(dest, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+        except FileExistsError:
+            dest = os.path.join(quarantine_dir, f"{name}_{counter}{ext}")
+            counter += 1
+            continue
+        os.close(fd)
+        break
 
-    shutil.move(src, dest)
+    try:
+        os.replace(src, dest)
+    except OSError:
+        try:
+            # Cross-device quarantine: copy over the placeholder instead
+            shutil.move(src, dest)
+        except OSError:
+            os.remove(dest)
+            raise
     return dest
 
 
@@ -159,6 +204,10 @@ def write_log(log_path: str, actions: List[Tuple[str, str]]):
 # ------------------------------------------------------------
 # High-level dedupe workflow
 # ------------------------------------------------------------
+# Duplicate sets submitted to the pool per step
+DEDUPE_BATCH = 64
+
+
 def dedupe(
     conn,
     table_name: str,
@@ -166,6 +215,7 @@ def dedupe(
     safe_delete: bool = True,
     quarantine_dir: Optional[str] = None,
     progress_callback=None,
+    threads: int = 1,
 ) -> Tuple[int, List[Tuple[str, str]]]:
     """
     Perform full dedupe:
@@ -173,22 +223,48 @@ def dedupe(
     - Choose best file to keep
     - Delete/quarantine others
     - Return (duplicate_sets, actions)
+
+    Sets are handled on `threads` worker threads (scoring stats every
+    candidate and each move/delete is a syscall round trip, so this is
+    I/O-bound). Actions are still returned in set order.
     """
-    duplicates = find_duplicates(conn, table_name, hash_type)
+    # Counted up front only as the progress denominator; the sets
+    # themselves are streamed
+    total_sets = count_duplicate_sets(conn, table_name, hash_type)
     actions = []
-    total_sets = len(duplicates)
 
-    for i, (h, rows) in enumerate(duplicates.items()):
+    def handle_set(item):
+        h, rows = item
         keep = choose_best_file(rows)
-        set_actions = delete_or_quarantine(
+        return h, delete_or_quarantine(
             rows,
             keep,
             safe_delete=safe_delete,
             quarantine_dir=quarantine_dir,
         )
-        actions.extend(set_actions)
 
-        if progress_callback:
-            progress_callback((i + 1) / total_sets, f"Processed hash {h}")
+    sets = find_duplicates(conn, table_name, hash_type)
+
+    with ThreadPoolExecutor(max_workers=max(1, threads)) as executor:
+
+        def results():
+            # The cursor is only read on this thread. Submit the next
+            # batch of sets before draining the current one, so at most
+            # two batches are in flight.
+            pending = ()
+            while True:
+                batch = list(islice(sets, DEDUPE_BATCH))
+                if not batch:
+                    break
+                submitted = executor.map(handle_set, batch)
+                yield from pending
+                pending = submitted
+            yield from pending
+
+        for i, (h, set_actions) in enumerate(results()):
+            actions.extend(set_actions)
+
+            if progress_callback:
+                progress_callback((i + 1) / total_sets, f"Processed hash {h}")
 
     return total_sets, actions
\ No newline at end of file
@@ -5,7 +5,7 @@ exporter.py
 Hash export utilities for the HashDB system.
 
 This module:
-- Exports MD5 or SHA-256 hashes
+- Exports MD5, SHA-1, SHA-256 or BLAKE3 hashes
 - Supports chunked export (Hydrus-style)
 - Can export duplicates only
 - Can export full file records
@@ -18,54 +18,80 @@ It does NOT:
 """
 
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .db import duplicate_hashes_sql, hash_column, tune_for_bulk
 
 
 # ------------------------------------------------------------
 # Core DB queries
 # ------------------------------------------------------------
+def _hashes_cursor(conn, table_name: str, hash_type: str):
+    col = hash_column(hash_type)
+    cur = conn.cursor()
+    cur.execute(f"SELECT {col} FROM {table_name} WHERE {col} IS NOT NULL")
+    return cur
+
+
 def fetch_hashes(conn, table_name: str, hash_type: str) -> List[str]:
     """
-    Fetch all MD5 or SHA-256 hashes from the DB.
+    Fetch all hashes of the given type from the DB.
     """
-    col = "hash_md5" if hash_type == "md5" else "hash_sha256"
-    cur = conn.cursor()
-    cur.execute(f"SELECT {col} FROM {table_name} WHERE {col} IS NOT NULL")
-    return [row[0] for row in cur.fetchall()]
+    return [row[0] for row in _hashes_cursor(conn, table_name, hash_type)]
 
 
-def fetch_duplicate_hashes(conn, table_name: str, hash_type: str) -> Dict[str, List[str]]:
+def iter_duplicate_hashes(conn, table_name: str, hash_type: str) -> Iterator[Tuple[str, List[str]]]:
     """
-    Return a dict: hash_value -> list of filepaths (duplicates only).
+    Yield (hash_value, filepaths) for each duplicate set, streamed from the
+    cursor. SQLite picks out the duplicated hashes, so only their rows are
+    read; sorting by hash makes each set contiguous, so only one set is
+    held at a time.
     """
-    col = "hash_md5" if hash_type == "md5" else "hash_sha256"
+    col = hash_column(hash_type)
     cur = conn.cursor()
     cur.execute(f"""
-        SELECT {col}, filepath
-        FROM {table_name}
-        WHERE {col} IS NOT NULL
+        SELECT t.{col}, t.filepath
+        FROM {table_name} AS t
+        JOIN ({duplicate_hashes_sql(table_name, col)}) AS d ON t.{col} = d.h
+        ORDER BY t.{col}, t.filepath
     """)
 
-    groups = {}
-    for h, fp in cur.fetchall():
-        if h not in groups:
-            groups[h] = []
-        groups[h].append(fp)
+    # itemgetter keeps the per-row grouping work in C
+    for h, rows in groupby(cur, key=itemgetter(0)):
+        yield h, list(map(itemgetter(1), rows))
+
 
-    return {h: fps for h, fps in groups.items() if len(fps) > 1}
+def fetch_duplicate_hashes(conn, table_name: str, hash_type: str) -> Dict[str, List[str]]:
+    """
+    Return a dict: hash_value -> list of filepaths (duplicates only).
+    """
+    return dict(iter_duplicate_hashes(conn, table_name, hash_type))
 
 
 # ------------------------------------------------------------
 # Export helpers
 # ------------------------------------------------------------
-def write_lines(path: str, lines: List[str]):
+# write_lines joins this many lines into each write() (a few MiB of hashes),
+# through a 1 MiB file buffer
+WRITE_SLAB_LINES = 65536
+WRITE_BUFFER = 1024 * 1024
+
+
+def write_lines(path: str, lines: Iterable[str]) -> int:
     """
-    Write a list of lines to a file.
+    Write lines (any iterable) to a file. Returns how many were written.
     """
-    with open(path, "w", encoding="utf-8") as f:
-        for line in lines:
-            f.write(line + "\n")
+    count = 0
+    it = iter(lines)
+    with open(path, "w", encoding="utf-8", buffering=WRITE_BUFFER) as f:
+        for slab in iter(lambda: list(islice(it, WRITE_SLAB_LINES)), []):
+            f.write("\n".join(slab))
+            f.write("\n")
+            count += len(slab)
+    return count
 
 
 def chunk_list(items: List[str], chunk_size: int) -> List[List[str]]:
@@ -86,13 +112,13 @@ def export_hashes(
     progress_callback=None,
 ):
     """
-    Export all MD5 or SHA-256 hashes into a single file.
+    Export all hashes of the given type into a single file.
     """
-    hashes = fetch_hashes(conn, table_name, hash_type)
-    write_lines(output_path, hashes)
+    cur = _hashes_cursor(conn, table_name, hash_type)
+    count = write_lines(output_path, (row[0] for row in cur))
 
     if progress_callback:
-        progress_callback(1.0, f"Exported {len(hashes)} hashes")
+        progress_callback(1.0, f"Exported {count} hashes")
 
 
 def export_hashes_chunked(
@@ -106,37 +132,53 @@ def export_hashes_chunked(
 ):
     """
     Export hashes into multiple chunked files (Hydrus-style).
+
+    Hashes are read from the cursor chunk_size at a time and each chunk is
+    written as soon as it is read, so at most `threads` chunks are held in
+    memory however large the table is.
     """
     os.makedirs(output_dir, exist_ok=True)
+    tune_for_bulk(conn)
 
-    hashes = fetch_hashes(conn, table_name, hash_type)
-    chunks = chunk_list(hashes, chunk_size)
-
-    total = len(chunks)
+    col = hash_column(hash_type)
+    count = conn.execute(
+        f"SELECT COUNT(*) FROM {table_name} WHERE {col} IS NOT NULL"
+    ).fetchone()[0]
+    total = -(-count // chunk_size)
     if total == 0:
         if progress_callback:
             progress_callback(1.0, "No hashes to export")
         return
 
+    cur = _hashes_cursor(conn, table_name, hash_type)
+    chunks = iter(lambda: cur.fetchmany(chunk_size), [])
+
+    def _write_one(i, chunk):
+        filename = os.path.join(output_dir, f"{hash_type}_chunk_{i+1}.txt")
+        write_lines(filename, (row[0] for row in chunk))
+        return filename
+
     t = max(1, int(threads or 1))
     if t <= 1:
         for i, chunk in enumerate(chunks):
-            filename = os.path.join(output_dir, f"{hash_type}_chunk_{i+1}.txt")
-            write_lines(filename, chunk)
+            filename = _write_one(i, chunk)
             if progress_callback:
                 progress_callback((i + 1) / total, f"Wrote {filename}")
         return
 
-    def _write_one(i_and_chunk):
-        i, chunk = i_and_chunk
-        filename = os.path.join(output_dir, f"{hash_type}_chunk_{i+1}.txt")
-        write_lines(filename, chunk)
-        return filename
-
-    written = 0
     with ThreadPoolExecutor(max_workers=min(t, total)) as ex:
-        futures = {ex.submit(_write_one, pair): pair[0] for pair in enumerate(chunks)}
-        for fut in as_completed(futures):
+        # Keep at most t writes in flight; the cursor is only read here
+        in_flight = []
+        written = 0
+        for i, chunk in enumerate(chunks):
+            in_flight.append(ex.submit(_write_one, i, chunk))
+            if len(in_flight) < t:
+                continue
+            filename = in_flight.pop(0).result()
+            written += 1
+            if progress_callback:
+                progress_callback(written / total, f"Wrote {filename}")
+        for fut in in_flight:
             filename = fut.result()
             written += 1
             if progress_callback:
@@ -159,18 +201,20 @@ def export_duplicates(
         ...
 
     """
-    dupes = fetch_duplicate_hashes(conn, table_name, hash_type)
+    sets = 0
 
-    lines = []
-    for h, paths in dupes.items():
-        lines.append(h)
-        lines.extend(paths)
-        lines.append("")  # blank line between groups
+    def lines():
+        nonlocal sets
+        for h, paths in iter_duplicate_hashes(conn, table_name, hash_type):
+            sets += 1
+            yield h
+            yield from paths
+            yield ""  # blank line between groups
 
-    write_lines(output_path, lines)
+    write_lines(output_path, lines())
 
     if progress_callback:
-        progress_callback(1.0, f"Exported {len(dupes)} duplicate sets")
+        progress_callback(1.0, f"Exported {sets} duplicate sets")
 
 
 def export_full_records(
@@ -182,24 +226,25 @@ def export_full_records(
     """
     Export full DB rows as a TSV file.
     Useful for debugging or external tools.
+
+    SQLite formats each row into its finished TSV line (NULL as an empty
+    field), so lines are written as they come off the cursor without a
+    Python step per cell.
     """
+    columns = [d[0] for d in conn.execute(f"SELECT * FROM {table_name} LIMIT 0").description]
+    line_sql = " || char(9) || ".join(f'ifnull(CAST("{c}" AS TEXT), \'\')' for c in columns)
+
     cur = conn.cursor()
-    cur.execute(f"SELECT * FROM {table_name}")
-    rows = cur.fetchall()
+    cur.execute(f"SELECT {line_sql} FROM {table_name}")
 
-    if not rows:
+    first = cur.fetchone()
+    if first is None:
         write_lines(output_path, [])
         return
 
-    # Header
-    header = rows[0].keys()
-    lines = ["\t".join(header)]
-
-    # Rows
-    for row in rows:
-        lines.append("\t".join(str(row[h]) if row[h] is not None else "" for h in header))
+    lines = chain(["\t".join(columns), first[0]], map(itemgetter(0), cur))
 
-    write_lines(output_path, lines)
+    count = write_lines(output_path, lines) - 1
 
     if progress_callback:
-        progress_callback(1.0, f"Exported {len(rows)} records")
\ No newline at end of file
+        progress_callback(1.0, f"Exported {count} records")
\ No newline at end of file
@@ -5,38 +5,124 @@ hasher.py
 Threaded hashing engine.
 
 This module:
-- Computes MD5 and/or SHA-256
-- Uses ThreadPoolExecutor for concurrency
+- Computes MD5, SHA-1, SHA-256 or BLAKE3 (optional `blake3` package)
+- Uses ThreadPoolExecutor for concurrency (ProcessPoolExecutor for large
+  hashlib runs)
 - Produces DB-ready record dicts
 - Does NOT write to the database (db.py handles that)
 """
 
+import os
+import mmap
 import hashlib
 import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, List, Optional
 
+from .db import HASH_COLUMNS, hash_column
 
-def compute_hash(path: str, hash_type: str, chunk_size: int = 65536) -> str:
+
+_HASHLIB_TYPES = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+}
+
+# BLAKE3 always hashes through blake3's update_mmap (one call into the
+# extension, which reads tiny files instead of mapping them). Files at least
+# this large also get its multithreaded tree mode; smaller ones stay
+# single-threaded, since the thread pool already hashes several at once.
+BLAKE3_MMAP_MIN = 16 * 1024 * 1024
+
+# Files at least this large are hashed from a read-only memory map in one
+# update() call: no copy into Python bytes per chunk, and the kernel reads
+# ahead over the whole mapping. Like update_mmap, a file truncated while it
+# is mapped can fault, so this is left to files big enough to be worth it.
+HASH_MMAP_MIN = 8 * 1024 * 1024
+
+
+def _import_blake3():
+    try:
+        import blake3
+    except ImportError:
+        raise RuntimeError(
+            "BLAKE3 hashing needs the optional 'blake3' package (pip install blake3)"
+        ) from None
+    return blake3
+
+
+def require_hash_type(hash_type: str):
     """
-    Compute MD5 or SHA-256 for a file.
+    Raise ValueError/RuntimeError if hash_type can't be computed here.
+    Call once before hashing so a missing optional package fails fast
+    instead of once per file.
     """
-    if hash_type == "md5":
-        h = hashlib.md5()
-    else:
-        h = hashlib.sha256()
+    hash_column(hash_type)
+    if hash_type == "blake3":
+        _import_blake3()
+
+
+# Read size for files that are neither small enough to read whole nor
+# mappable. Each read()/update() pair is an interpreter round trip, so
+# bigger reads mean fewer of them and better use of readahead.
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# run_hashing moves hashlib work to processes once there are this many bytes
+# to hash: the per-file Python around each hash then runs in parallel too,
+# and the pool start-up is noise. BLAKE3 stays on threads since the
+# extension already hashes large files on several cores. Files are sent to
+# the workers PROCESS_CHUNK at a time to amortise the IPC.
+PROCESS_HASH_MIN_BYTES = 256 * 1024 * 1024
+PROCESS_CHUNK = 16
+
+
+def compute_hash(path: str, hash_type: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """
+    Compute MD5, SHA-1, SHA-256 or BLAKE3 for a file.
+    """
+    if hash_type == "blake3":
+        blake3 = _import_blake3()
+        if os.path.getsize(path) >= BLAKE3_MMAP_MIN:
+            h = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        else:
+            h = blake3.blake3()
+        h.update_mmap(path)
+        return h.hexdigest()
+
+    h = _HASHLIB_TYPES.get(hash_type, hashlib.sha256)()
 
     with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < HASH_MMAP_MIN:
+            # Small enough to hash in a single read and update
+            h.update(f.read())
+            return h.hexdigest()
+
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            mm = None  # not mappable (odd filesystem): read it in chunks
+        if mm is not None:
+            with mm:
+                h.update(mm)
+            return h.hexdigest()
+
         for chunk in iter(lambda: f.read(chunk_size), b""):
             h.update(chunk)
 
     return h.hexdigest()
 
 
-def hash_worker(meta: Dict[str, Any], hash_type: str) -> Dict[str, Any]:
+def _iso(ts: Optional[float]) -> Optional[str]:
+    return datetime.datetime.fromtimestamp(ts).isoformat() if ts is not None else None
+
+
+def hash_worker(meta: Dict[str, Any], hash_type: str, now: Optional[str] = None) -> Dict[str, Any]:
     """
     Worker function for threaded hashing.
-    Returns a DB-ready record dict.
+    Returns a DB-ready record dict; now (ISO timestamp) defaults to the
+    current time.
     """
     filepath = meta["filepath"]
 
@@ -45,20 +131,25 @@ def hash_worker(meta: Dict[str, Any], hash_type: str) -> Dict[str, Any]:
     except Exception:
         return None
 
-    now = datetime.datetime.now().isoformat()
+    if now is None:
+        now = datetime.datetime.now().isoformat()
 
     record = {
         "filepath": filepath,
         "filename": meta["filename"],
         "size_bytes": meta["size_bytes"],
-        "created_on": meta["created_on"],
-        "modified_on": meta["modified_on"],
+        "created_on": _iso(meta["birthtime"]),
+        "modified_on": _iso(meta["mtime"]),
+        "mtime_ns": meta["mtime_ns"],
         "imported_on": now,
         "last_scanned_on": now,
-        "hash_md5": hash_value if hash_type == "md5" else None,
-        "hash_sha256": hash_value if hash_type == "sha256" else None,
         "flags": None,
     }
+    # Only the scanned hash type is set; the others are cleared, since a
+    # rehashed file may have changed.
+    for col in HASH_COLUMNS.values():
+        record[col] = None
+    record[hash_column(hash_type)] = hash_value
 
     return record
 
@@ -74,6 +165,9 @@ def run_hashing(
     """
     Threaded hashing over a list of metadata dicts.
 
+    Large md5/sha1/sha256 runs use worker processes instead (see
+    PROCESS_HASH_MIN_BYTES). Records come back in work_list order.
+
     progress_callback(fraction, message) is optional.
     batch_callback(records_list) is optional and called every batch_size records.
     """
@@ -85,15 +179,37 @@ def run_hashing(
 
     pending_batch = []
 
-    with ThreadPoolExecutor(max_workers=threads) as executor:
-        futures = {
-            executor.submit(hash_worker, meta, hash_type): meta
-            for meta in work_list
-        }
-
-        for i, future in enumerate(as_completed(futures)):
-            meta = futures[future]
-            rec = future.result()
+    use_processes = (
+        threads > 1
+        and hash_type in _HASHLIB_TYPES
+        and sum(meta["size_bytes"] or 0 for meta in work_list) >= PROCESS_HASH_MIN_BYTES
+    )
+    if use_processes:
+        # Imported here: multiprocessing is a noticeable share of startup
+        from concurrent.futures import ProcessPoolExecutor
+        executor_cls, chunksize = ProcessPoolExecutor, PROCESS_CHUNK
+    else:
+        executor_cls, chunksize = ThreadPoolExecutor, 1
+
+    with executor_cls(max_workers=threads) as executor:
+
+        def hashed():
+            # Submit work batch_size files at a time, one batch ahead of
+            # the one being drained, with one timestamp per batch
+            pending = ()
+            for start in range(0, total, batch_size):
+                chunk = work_list[start:start + batch_size]
+                worker = partial(
+                    hash_worker,
+                    hash_type=hash_type,
+                    now=datetime.datetime.now().isoformat(),
+                )
+                submitted = zip(chunk, executor.map(worker, chunk, chunksize=chunksize))
+                yield from pending
+                pending = submitted
+            yield from pending
+
+        for i, (meta, rec) in enumerate(hashed()):
             if rec:
                 results.append(rec)
                 pending_batch.append(rec)
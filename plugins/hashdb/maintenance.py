@@ -8,7 +8,7 @@ This module:
 - Removes DB entries for files that no longer exist
 - Detects and optionally deletes zero-byte files
 - Writes cleanup logs
-- Runs VACUUM to compact the database
+- Compacts the database (incremental vacuum, or a full VACUUM on request)
 - Provides progress callbacks for GUI integration
 
 It does NOT:
@@ -19,8 +19,11 @@ It does NOT:
 
 import os
 import datetime
+from collections import defaultdict
 from concurrent.futures import ThreadPoolExecutor
-from typing import List, Tuple, Optional
+from typing import Iterable, List, Optional, Tuple
+
+from .db import tune_for_bulk, vacuum
 
 
 # ------------------------------------------------------------
@@ -30,6 +33,15 @@ def db_size_mb(path: str) -> float:
     return os.path.getsize(path) / (1024 * 1024)
 
 
+def _map(fn, items: List, threads: int) -> List:
+    """list(map(fn, items)), on a thread pool when threads > 1."""
+    t = max(1, int(threads or 1))
+    if t <= 1 or len(items) <= 1:
+        return list(map(fn, items))
+    with ThreadPoolExecutor(max_workers=t) as ex:
+        return list(ex.map(fn, items))
+
+
 def list_all_filepaths(conn, table_name: str) -> List[str]:
     cur = conn.cursor()
     cur.execute(f"SELECT filepath FROM {table_name}")
@@ -48,26 +60,32 @@ def find_missing_files(filepaths: List[str]) -> List[str]:
 
 
 def find_missing_files_parallel(filepaths: List[str], threads: int) -> List[str]:
-    """Find missing files using a thread pool (IO-bound)."""
-    if not filepaths:
-        return []
-    t = max(1, int(threads or 1))
-    if t <= 1:
-        return find_missing_files(filepaths)
+    """Find missing files using a thread pool (IO-bound); see classify_files."""
+    return classify_files(filepaths, threads)[0]
 
-    def _check(fp: str) -> Optional[str]:
-        return fp if not os.path.exists(fp) else None
 
-    with ThreadPoolExecutor(max_workers=t) as ex:
-        return [fp for fp in ex.map(_check, filepaths) if fp]
+def remove_missing_from_db(conn, table_name: str, missing: List[str]):
+    """
+    Delete the rows for missing paths in one statement and one transaction.
 
+    The paths are bulk-loaded into a temp table and removed with a single
+    DELETE ... IN (SELECT ...), rather than one DELETE per path.
+    """
+    if not missing:
+        return
 
-def remove_missing_from_db(conn, table_name: str, missing: List[str]):
     cur = conn.cursor()
-    cur.executemany(
-        f"DELETE FROM {table_name} WHERE filepath = ?",
-        [(fp,) for fp in missing]
-    )
+    if not conn.in_transaction:
+        cur.execute("BEGIN IMMEDIATE")
+    try:
+        cur.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_missing (fp TEXT PRIMARY KEY)")
+        cur.execute("DELETE FROM tmp_missing")
+        cur.executemany("INSERT OR IGNORE INTO tmp_missing VALUES (?)", ((fp,) for fp in missing))
+        cur.execute(f"DELETE FROM {table_name} WHERE filepath IN (SELECT fp FROM tmp_missing)")
+        cur.execute("DROP TABLE tmp_missing")
+    except Exception:
+        conn.rollback()
+        raise
     conn.commit()
 
 
@@ -86,23 +104,8 @@ def find_zero_byte_files(filepaths: List[str]) -> List[str]:
 
 
 def find_zero_byte_files_parallel(filepaths: List[str], threads: int) -> List[str]:
-    """Find zero-byte files using a thread pool (IO-bound)."""
-    if not filepaths:
-        return []
-    t = max(1, int(threads or 1))
-    if t <= 1:
-        return find_zero_byte_files(filepaths)
-
-    def _check(fp: str) -> Optional[str]:
-        try:
-            if os.path.exists(fp) and os.path.getsize(fp) == 0:
-                return fp
-        except Exception:
-            return None
-        return None
-
-    with ThreadPoolExecutor(max_workers=t) as ex:
-        return [fp for fp in ex.map(_check, filepaths) if fp]
+    """Find zero-byte files using a thread pool (IO-bound); see classify_files."""
+    return classify_files(filepaths, threads)[1]
 
 
 def delete_zero_byte_files(paths: List[str]) -> int:
@@ -116,23 +119,95 @@ def delete_zero_byte_files(paths: List[str]) -> int:
     return deleted
 
 
+def _remove(fp: str) -> bool:
+    try:
+        os.remove(fp)
+        return True
+    except Exception:
+        return False
+
+
+def remove_files(paths: List[str], threads: int) -> List[str]:
+    """
+    Delete files concurrently (IO-bound) and return the paths actually
+    deleted, in input order.
+    """
+    return [fp for fp, ok in zip(paths, _map(_remove, paths, threads)) if ok]
+
+
 def delete_zero_byte_files_parallel(paths: List[str], threads: int) -> int:
-    """Delete files concurrently (IO-bound)."""
-    if not paths:
-        return 0
-    t = max(1, int(threads or 1))
-    if t <= 1:
-        return delete_zero_byte_files(paths)
+    """Delete files concurrently (IO-bound); see remove_files."""
+    return len(remove_files(paths, threads))
+
 
-    def _delete(fp: str) -> int:
+# ------------------------------------------------------------
+# Combined missing / zero-byte pass
+# ------------------------------------------------------------
+def _classify(fp: str) -> str:
+    """Return "missing", "zero" or "ok" for fp from a single stat."""
+    try:
+        st = os.stat(fp)
+    except OSError:
+        # Same as os.path.exists(): anything unstat-able counts as missing
+        return "missing"
+    return "zero" if st.st_size == 0 else "ok"
+
+
+# On Windows a directory listing carries each entry's size, so one scandir()
+# per directory replaces a stat() per file. Elsewhere DirEntry.stat() is a
+# stat() call anyway, so listing first would only add work.
+_LISTING_STATS = os.name == "nt"
+
+
+def _classify_dir(group: Tuple[str, List[str]]) -> List[str]:
+    """_classify for every path in one directory, from a single listing."""
+    directory, fps = group
+    try:
+        with os.scandir(directory) as it:
+            present = {entry.name: entry for entry in it}
+    except (FileNotFoundError, NotADirectoryError):
+        return ["missing"] * len(fps)
+    except OSError:
+        present = {}
+
+    statuses = []
+    for fp in fps:
+        entry = present.get(os.path.basename(fp))
+        if entry is None:
+            # Unlisted: confirm with a real stat (case-insensitive names)
+            statuses.append(_classify(fp))
+            continue
         try:
-            os.remove(fp)
-            return 1
-        except Exception:
-            return 0
+            statuses.append("zero" if entry.stat().st_size == 0 else "ok")
+        except OSError:
+            statuses.append("missing")
+    return statuses
 
-    with ThreadPoolExecutor(max_workers=t) as ex:
-        return sum(ex.map(_delete, paths))
+
+def classify_files(filepaths: List[str], threads: int) -> Tuple[List[str], List[str]]:
+    """
+    Split filepaths into (missing, zero_bytes) with one stat per file,
+    instead of separate exists/getsize passes. Where listings carry the
+    stat (_LISTING_STATS), each directory is listed once instead.
+    """
+    if _LISTING_STATS:
+        by_dir = defaultdict(list)
+        for fp in filepaths:
+            by_dir[os.path.dirname(fp)].append(fp)
+        groups = list(by_dir.items())
+        ordered = [fp for _, fps in groups for fp in fps]
+        statuses = [s for group in _map(_classify_dir, groups, threads) for s in group]
+    else:
+        ordered = filepaths
+        statuses = _map(_classify, filepaths, threads)
+
+    missing, zero_bytes = [], []
+    for fp, status in zip(ordered, statuses):
+        if status == "missing":
+            missing.append(fp)
+        elif status == "zero":
+            zero_bytes.append(fp)
+    return missing, zero_bytes
 
 
 # ------------------------------------------------------------
@@ -145,7 +220,16 @@ def write_cleanup_log(
     zero_deleted: int,
     db_before: float,
     db_after: float,
+    deleted_paths: Optional[Iterable[str]] = None,
 ):
+    """
+    deleted_paths marks which zero-byte files were deleted; without it the
+    first zero_deleted entries are assumed to be.
+    """
+    if deleted_paths is None:
+        deleted_paths = zero_bytes[:zero_deleted]
+    deleted = set(deleted_paths)
+
     with open(log_path, "w", encoding="utf-8") as f:
         f.write("HashDB Cleanup Log\n")
         f.write(f"Generated: {datetime.datetime.now().isoformat()}\n\n")
@@ -154,13 +238,12 @@ def write_cleanup_log(
         f.write(f"Database size after cleanup:  {db_after:.2f} MB\n\n")
 
         f.write("Missing Files Removed from DB:\n")
-        for fp in missing:
-            f.write(f"  {fp}\n")
+        f.writelines(f"  {fp}\n" for fp in missing)
 
         f.write("\nZero-Byte Files:\n")
-        for fp in zero_bytes:
-            status = "DELETED" if fp in zero_bytes[:zero_deleted] else "FLAGGED"
-            f.write(f"  {fp} [{status}]\n")
+        f.writelines(
+            f"  {fp} [{'DELETED' if fp in deleted else 'FLAGGED'}]\n" for fp in zero_bytes
+        )
 
 
 # ------------------------------------------------------------
@@ -173,43 +256,43 @@ def run_cleanup(
     delete_zero_bytes: bool = False,
     threads: int = 8,
     progress_callback=None,
+    full_vacuum: bool = False,
 ) -> Tuple[int, int, int, str]:
     """
     Perform full cleanup:
     - Remove missing files from DB
     - Detect zero-byte files
     - Optionally delete zero-byte files
-    - VACUUM database
+    - Compact the database (db.vacuum; full_vacuum rewrites the whole file)
     - Write log file
 
     Returns:
         (missing_count, zero_count, zero_deleted, log_path)
     """
     db_before = db_size_mb(db_path)
+    tune_for_bulk(conn)
 
     # Step 1: Load all filepaths
     filepaths = list_all_filepaths(conn, table_name)
 
-    # Step 2: Missing files
-    missing = find_missing_files_parallel(filepaths, threads)
+    # Step 2: Missing and zero-byte files, one stat per file
+    missing, zero_bytes = classify_files(filepaths, threads)
     remove_missing_from_db(conn, table_name, missing)
 
     if progress_callback:
         progress_callback(0.33, f"Removed {len(missing)} missing files")
 
     # Step 3: Zero-byte files
-    zero_bytes = find_zero_byte_files_parallel(filepaths, threads)
-
-    zero_deleted = 0
+    deleted_paths: List[str] = []
     if delete_zero_bytes:
-        zero_deleted = delete_zero_byte_files_parallel(zero_bytes, threads)
+        deleted_paths = remove_files(zero_bytes, threads)
+    zero_deleted = len(deleted_paths)
 
     if progress_callback:
         progress_callback(0.66, f"Processed {len(zero_bytes)} zero-byte files")
 
-    # Step 4: VACUUM
-    conn.execute("VACUUM")
-    conn.commit()
+    # Step 4: Compact
+    vacuum(conn, full=full_vacuum)
 
     db_after = db_size_mb(db_path)
 
@@ -224,6 +307,7 @@ def run_cleanup(
         zero_deleted,
         db_before,
         db_after,
+        deleted_paths=deleted_paths,
     )
 
     if progress_callback:
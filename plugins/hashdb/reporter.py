@@ -19,8 +19,12 @@ It does NOT:
 
 import os
 import datetime
+from itertools import groupby
+from operator import itemgetter
 from typing import Dict, List, Optional
 
+from .db import duplicate_hashes_sql, hash_column, tune_for_bulk
+
 
 # ------------------------------------------------------------
 # Core DB queries
@@ -32,41 +36,32 @@ def count_rows(conn, table_name: str) -> int:
 
 
 def count_unique_hashes(conn, table_name: str, hash_type: str) -> int:
-    col = "hash_md5" if hash_type == "md5" else "hash_sha256"
+    col = hash_column(hash_type)
     cur = conn.cursor()
     cur.execute(f"SELECT COUNT(DISTINCT {col}) FROM {table_name} WHERE {col} IS NOT NULL")
     return cur.fetchone()[0]
 
 
 def count_duplicates(conn, table_name: str, hash_type: str) -> int:
-    col = "hash_md5" if hash_type == "md5" else "hash_sha256"
+    col = hash_column(hash_type)
     cur = conn.cursor()
-    cur.execute(f"""
-        SELECT {col}, COUNT(*)
-        FROM {table_name}
-        WHERE {col} IS NOT NULL
-        GROUP BY {col}
-        HAVING COUNT(*) > 1
-    """)
-    return len(cur.fetchall())
+    cur.execute(f"SELECT COUNT(*) FROM ({duplicate_hashes_sql(table_name, col)})")
+    return cur.fetchone()[0]
 
 
 def fetch_duplicate_groups(conn, table_name: str, hash_type: str) -> Dict[str, List[str]]:
-    col = "hash_md5" if hash_type == "md5" else "hash_sha256"
+    col = hash_column(hash_type)
     cur = conn.cursor()
+    # Only rows of duplicated hashes come back, already grouped by hash
     cur.execute(f"""
-        SELECT {col}, filepath
-        FROM {table_name}
-        WHERE {col} IS NOT NULL
+        SELECT t.{col}, t.filepath
+        FROM {table_name} AS t
+        JOIN ({duplicate_hashes_sql(table_name, col)}) AS d ON t.{col} = d.h
+        ORDER BY t.{col}, t.id
     """)
 
-    groups = {}
-    for h, fp in cur.fetchall():
-        if h not in groups:
-            groups[h] = []
-        groups[h].append(fp)
-
-    return {h: fps for h, fps in groups.items() if len(fps) > 1}
+    path = itemgetter(1)
+    return {h: list(map(path, rows)) for h, rows in groupby(cur, key=itemgetter(0))}
 
 
 # ------------------------------------------------------------
@@ -110,24 +105,36 @@ def write_duplicate_report(
           path2
           ...
 
+    Sets come largest first. SQLite sorts the sets (one row per hash, not
+    per file) and each set's sample paths are fetched from the hash index as
+    it is written, so nothing beyond the current set is held in memory.
     """
-    groups = fetch_duplicate_groups(conn, table_name, hash_type)
-    total = len(groups)
+    col = hash_column(hash_type)
+    tune_for_bulk(conn)
+    total = count_duplicates(conn, table_name, hash_type)
+
+    sets = conn.cursor()
+    sets.execute(f"""
+        SELECT h, n FROM ({duplicate_hashes_sql(table_name, col)})
+        ORDER BY n DESC, h
+    """)
+    samples = conn.cursor()
+    sample_sql = f"SELECT filepath FROM {table_name} WHERE {col} = ? ORDER BY id LIMIT ?"
 
     with open(output_path, "w", encoding="utf-8") as f:
         f.write("Duplicate Hash Report\n")
         f.write(f"Generated: {datetime.datetime.now().isoformat()}\n")
         f.write(f"Hash Type: {hash_type.upper()}\n\n")
 
-        for i, (h, paths) in enumerate(sorted(groups.items(), key=lambda x: len(x[1]), reverse=True)):
+        for i, (h, count) in enumerate(sets):
             f.write(f"Hash: {h}\n")
-            f.write(f"File Count: {len(paths)}\n")
+            f.write(f"File Count: {count}\n")
 
-            for p in paths[:max_samples]:
+            for (p,) in samples.execute(sample_sql, (h, max_samples)):
                 f.write(f"  {p}\n")
 
-            if len(paths) > max_samples:
-                f.write(f"  ... ({len(paths) - max_samples} more files)\n")
+            if count > max_samples:
+                f.write(f"  ... ({count - max_samples} more files)\n")
 
             f.write("\n")
 
@@ -16,14 +16,14 @@ It does NOT compute hashes.
 import os
 import datetime
 from pathlib import Path
-from concurrent.futures import ThreadPoolExecutor
-from typing import List, Dict, Any, Optional, Iterator, Callable
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Callable
 
 # Import shared scanner utilities
 import sys
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from shared import (
     iter_files,
+    iter_file_entries,
     iter_files_chunked,
     collect_files,
     collect_files_chunked,
@@ -31,32 +31,88 @@ from shared import (
 )
 
 
+_fromtimestamp = datetime.datetime.fromtimestamp
+
+
+# The platform branch is fixed, so pick it once rather than per file
+if hasattr(os.stat_result, 'st_birthtime'):
+    # True creation time (macOS, BSDs, Windows on 3.12+)
+    def _birthtime(stat) -> Optional[float]:
+        return stat.st_birthtime
+elif os.name == 'nt':
+    # On Windows, st_ctime is creation time
+    def _birthtime(stat) -> Optional[float]:
+        return stat.st_ctime
+else:
+    # On Linux, st_ctime is metadata change time, not creation - leave as None
+    def _birthtime(stat) -> Optional[float]:
+        return None
+
+
+def _metadata_from_stat(filepath: str, filename: str, stat) -> Dict[str, Any]:
+    # Raw stat times only: the ISO created_on/modified_on strings are built
+    # by the hasher, for just the files that get (re)hashed
+    return {
+        "filepath": filepath,
+        "filename": filename,
+        "size_bytes": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "mtime": stat.st_mtime,
+        "birthtime": _birthtime(stat),
+    }
+
+
 def get_file_metadata(path: Path) -> Dict[str, Any]:
     """
-    Extract filesystem metadata for a file.
-    
+    Extract filesystem metadata for a file: filepath, filename, size_bytes,
+    created_on and modified_on as ISO strings, plus the raw mtime_ns,
+    mtime and birthtime that the scan walk and hash_worker use.
+
     Note: On macOS, st_birthtime gives true creation time.
           On Linux, st_ctime is inode change time (not creation).
           We use st_birthtime when available, else None for created_on.
     """
-    stat = path.stat()
-    
-    # Try to get true creation time (macOS has st_birthtime)
-    created_on = None
-    if hasattr(stat, 'st_birthtime'):
-        created_on = datetime.datetime.fromtimestamp(stat.st_birthtime).isoformat()
-    # On Windows, st_ctime is creation time
-    elif os.name == 'nt':
-        created_on = datetime.datetime.fromtimestamp(stat.st_ctime).isoformat()
-    # On Linux, st_ctime is metadata change time, not creation - leave as None
-    
-    return {
-        "filepath": str(path),
-        "filename": path.name,
-        "size_bytes": stat.st_size,
-        "created_on": created_on,
-        "modified_on": datetime.datetime.fromtimestamp(stat.st_mtime).isoformat(),
-    }
+    meta = _metadata_from_stat(str(path), path.name, path.stat())
+    birthtime = meta["birthtime"]
+    meta["created_on"] = _fromtimestamp(birthtime).isoformat() if birthtime is not None else None
+    meta["modified_on"] = _fromtimestamp(meta["mtime"]).isoformat()
+    return meta
+
+
+def _scandir_meta(root: str) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Yield a metadata dict for every file under root, from a scandir walk.
+
+    The DirEntry already knows its path and name, and its stat() is served
+    from the directory listing on Windows, so no per-file Path objects or
+    thread pool round trips are needed. Files that can't be stat'ed yield
+    None (so callers can still count them as seen).
+    """
+    # Path() normalisation, so filepaths match what earlier scans stored.
+    # Path(".") / name is just name, but scandir yields "./name"; drop that
+    # prefix so a scan of "." keeps storing "a" and "sub/b".
+    base = str(Path(root))
+    strip = len(os.curdir + os.sep) if base == os.curdir else 0
+    for entry in iter_file_entries(base):
+        try:
+            yield _metadata_from_stat(entry.path[strip:], entry.name, entry.stat())
+        except OSError:
+            yield None
+
+
+def _iter_meta_chunks(root: str, chunk_size: int) -> Iterator[tuple]:
+    """Yield (metas, files_seen) for up to chunk_size files at a time."""
+    metas: List[Dict[str, Any]] = []
+    seen = 0
+    for meta in _scandir_meta(root):
+        seen += 1
+        if meta:
+            metas.append(meta)
+        if seen >= chunk_size:
+            yield metas, seen
+            metas, seen = [], 0
+    if seen:
+        yield metas, seen
 
 
 def needs_rescan(db_record: Dict[str, Any], meta: Dict[str, Any], rescan_mode: bool) -> bool:
@@ -74,31 +130,27 @@ def needs_rescan(db_record: Dict[str, Any], meta: Dict[str, Any], rescan_mode: b
     if not rescan_mode:
         return True
 
-    return db_record["modified_on"] != meta["modified_on"]
+    mtime_ns = db_record.get("mtime_ns")
+    if mtime_ns is not None:
+        return mtime_ns != meta["mtime_ns"]
+    # Rows written before mtime_ns existed only carry the ISO string
+    return db_record["modified_on"] != _fromtimestamp(meta["mtime"]).isoformat()
 
 
-def build_work_list(
-    conn,
-    table_name: str,
-    root: str,
-    rescan_mode: bool,
-    db_get_record,
-    threads: int = 8,
-    chunk_size: int = DEFAULT_CHUNK_SIZE,
-) -> List[Dict[str, Any]]:
+def _load_db_records(conn, table_name: str) -> Callable[[str], Optional[Dict[str, Any]]]:
     """
-    Build a list of files that need hashing.
+    Load every row's modification stamp once and return a filepath ->
+    needs_rescan() record lookup (None for paths not in the DB).
 
-    Returns a list of metadata dicts.
+    Each path keeps one value, mtime_ns when the row has it and the
+    modified_on string otherwise.
     """
-    # Bulk-load DB state once to avoid per-file DB queries (SQLite is single-writer
-    # and per-file SELECTs become a huge bottleneck).
     modified_index: Dict[str, Any] = {}
     try:
         cur = conn.cursor()
-        cur.execute(f"SELECT filepath, modified_on FROM {table_name}")
-        for fp, modified_on in cur.fetchall():
-            modified_index[str(fp)] = modified_on
+        cur.execute(f"SELECT filepath, mtime_ns, modified_on FROM {table_name}")
+        for fp, mtime_ns, modified_on in cur:
+            modified_index[str(fp)] = mtime_ns if mtime_ns is not None else modified_on
     except Exception:
         modified_index = {}
 
@@ -106,31 +158,72 @@ def build_work_list(
         mo = modified_index.get(filepath)
         if mo is None:
             return None
+        if isinstance(mo, int):
+            return {"mtime_ns": mo}
         return {"modified_on": mo}
 
-    work: List[Dict[str, Any]] = []
-    t = max(1, int(threads or 1))
+    return _get_db_record
 
-    def _meta_safe(p: Path) -> Optional[Dict[str, Any]]:
-        try:
-            return get_file_metadata(p)
-        except Exception:
-            return None
 
-    for file_chunk in iter_files_chunked(root, chunk_size):
-        metas: List[Optional[Dict[str, Any]]]
-        if t <= 1 or len(file_chunk) <= 1:
-            metas = [_meta_safe(p) for p in file_chunk]
-        else:
-            with ThreadPoolExecutor(max_workers=min(t, len(file_chunk))) as ex:
-                metas = list(ex.map(_meta_safe, file_chunk))
-
-        for meta in metas:
-            if not meta:
-                continue
-            db_record = _get_db_record(meta["filepath"])
-            if needs_rescan(db_record, meta, rescan_mode):
-                work.append(meta)
+def _iter_work_chunks(
+    conn,
+    table_name: str,
+    root: str,
+    rescan_mode: bool,
+    chunk_size: int,
+    skip_paths: Iterable[str] = (),
+) -> Iterator[tuple]:
+    """
+    Yield (work_chunk, files_seen) per chunk of the walk: the shared core of
+    the build_work_list* and iter_work_list_chunked entry points. Files in
+    skip_paths (e.g. the database and its sidecars) are left out.
+    """
+    # Bulk-load DB state once to avoid per-file DB queries (SQLite is single-writer
+    # and per-file SELECTs become a huge bottleneck).
+    get_db_record = _load_db_records(conn, table_name)
+
+    skip = {os.path.normcase(os.path.abspath(p)) for p in skip_paths}
+    # Cheap name check first, so only same-named files pay for abspath()
+    skip_names = {os.path.basename(p) for p in skip}
+
+    def skipped(meta):
+        return (
+            os.path.normcase(meta["filename"]) in skip_names
+            and os.path.normcase(os.path.abspath(meta["filepath"])) in skip
+        )
+
+    for metas, seen in _iter_meta_chunks(root, chunk_size):
+        work_chunk = [
+            meta for meta in metas
+            if not (skip and skipped(meta))
+            and needs_rescan(get_db_record(meta["filepath"]), meta, rescan_mode)
+        ]
+        yield work_chunk, seen
+
+
+def build_work_list(
+    conn,
+    table_name: str,
+    root: str,
+    rescan_mode: bool,
+    db_get_record,
+    threads: int = 8,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_paths: Iterable[str] = (),
+) -> List[Dict[str, Any]]:
+    """
+    Build a list of files that need hashing.
+
+    Metadata comes from one scandir walk (_scandir_meta); threads is
+    accepted for compatibility but no longer used, since a pool cost more
+    per file than the stat it parallelised. Files listed in skip_paths are
+    never included.
+
+    Returns a list of metadata dicts.
+    """
+    work: List[Dict[str, Any]] = []
+    for work_chunk, _ in _iter_work_chunks(conn, table_name, root, rescan_mode, chunk_size, skip_paths):
+        work.extend(work_chunk)
 
     return work
 
@@ -161,49 +254,11 @@ def build_work_list_chunked(
     Returns:
         Complete list of work items (built incrementally)
     """
-    # Bulk-load DB state once (same rationale as build_work_list).
-    modified_index: Dict[str, Any] = {}
-    try:
-        cur = conn.cursor()
-        cur.execute(f"SELECT filepath, modified_on FROM {table_name}")
-        for fp, modified_on in cur.fetchall():
-            modified_index[str(fp)] = modified_on
-    except Exception:
-        modified_index = {}
-
-    def _get_db_record(filepath: str) -> Optional[Dict[str, Any]]:
-        mo = modified_index.get(filepath)
-        if mo is None:
-            return None
-        return {"modified_on": mo}
-
     work: List[Dict[str, Any]] = []
     files_scanned = 0
-    t = max(1, int(threads or 1))
-
-    def _meta_safe(p: Path) -> Optional[Dict[str, Any]]:
-        try:
-            return get_file_metadata(p)
-        except Exception:
-            return None
-
-    for file_chunk in iter_files_chunked(root, chunk_size):
-        if t <= 1 or len(file_chunk) <= 1:
-            metas = [_meta_safe(p) for p in file_chunk]
-        else:
-            with ThreadPoolExecutor(max_workers=min(t, len(file_chunk))) as ex:
-                metas = list(ex.map(_meta_safe, file_chunk))
-
-        work_chunk: List[Dict[str, Any]] = []
-        for meta in metas:
-            if not meta:
-                continue
-            db_record = _get_db_record(meta["filepath"])
-            if needs_rescan(db_record, meta, rescan_mode):
-                work_chunk.append(meta)
-
+    for work_chunk, seen in _iter_work_chunks(conn, table_name, root, rescan_mode, chunk_size):
         work.extend(work_chunk)
-        files_scanned += len(file_chunk)
+        files_scanned += seen
 
         if chunk_callback:
             chunk_callback(work_chunk, files_scanned, len(work))
@@ -229,43 +284,6 @@ def iter_work_list_chunked(
     Yields:
         Lists of work item dicts, each up to chunk_size items
     """
-    modified_index: Dict[str, Any] = {}
-    try:
-        cur = conn.cursor()
-        cur.execute(f"SELECT filepath, modified_on FROM {table_name}")
-        for fp, modified_on in cur.fetchall():
-            modified_index[str(fp)] = modified_on
-    except Exception:
-        modified_index = {}
-
-    def _get_db_record(filepath: str) -> Optional[Dict[str, Any]]:
-        mo = modified_index.get(filepath)
-        if mo is None:
-            return None
-        return {"modified_on": mo}
-
-    t = max(1, int(threads or 1))
-
-    def _meta_safe(p: Path) -> Optional[Dict[str, Any]]:
-        try:
-            return get_file_metadata(p)
-        except Exception:
-            return None
-
-    for file_chunk in iter_files_chunked(root, chunk_size):
-        if t <= 1 or len(file_chunk) <= 1:
-            metas = [_meta_safe(p) for p in file_chunk]
-        else:
-            with ThreadPoolExecutor(max_workers=min(t, len(file_chunk))) as ex:
-                metas = list(ex.map(_meta_safe, file_chunk))
-
-        work_chunk: List[Dict[str, Any]] = []
-        for meta in metas:
-            if not meta:
-                continue
-            db_record = _get_db_record(meta["filepath"])
-            if needs_rescan(db_record, meta, rescan_mode):
-                work_chunk.append(meta)
-
+    for work_chunk, _ in _iter_work_chunks(conn, table_name, root, rescan_mode, chunk_size):
         if work_chunk:
             yield work_chunk
\ No newline at end of file
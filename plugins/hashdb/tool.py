@@ -22,7 +22,9 @@ import sys
 import argparse
 import shlex
 
-from .cli import build_parser, register_cli as _register_cli
+# .cli is imported by the functions below rather than here, so importing
+# this module (the toolbox loads every tool's) doesn't load the command
+# implementations.
 
 # ------------------------------------------------------------
 # Web UI Configuration (for dynamic GUI generation)
@@ -36,7 +38,7 @@ webui_config = {
             "fields": [
                 {"id": "directory", "name": "Directory to Scan", "type": "directory", "required": True},
                 {"id": "db", "name": "Database Path", "type": "file", "default": ""},
-                {"id": "hash", "name": "Hash Algorithm", "type": "select", "options": ["sha256", "md5"], "default": "sha256"},
+                {"id": "hash", "name": "Hash Algorithm", "type": "select", "options": ["sha256", "md5", "sha1", "blake3"], "default": "sha256"},
             ],
             "command": "hashdb scan {directory}",
         },
@@ -46,7 +48,7 @@ webui_config = {
             "description": "Verify files against stored hashes.",
             "fields": [
                 {"id": "database", "name": "Database Path", "type": "file", "required": True},
-                {"id": "hash", "name": "Hash Algorithm", "type": "select", "options": ["sha256", "md5"], "default": "sha256"},
+                {"id": "hash", "name": "Hash Algorithm", "type": "select", "options": ["sha256", "md5", "sha1", "blake3"], "default": "sha256"},
             ],
             "command": "hashdb verify {database}",
         },
@@ -56,7 +58,7 @@ webui_config = {
             "description": "Find and remove duplicate files.",
             "fields": [
                 {"id": "database", "name": "Database Path", "type": "file", "required": True},
-                {"id": "hash", "name": "Hash Algorithm", "type": "select", "options": ["sha256", "md5"], "default": "sha256"},
+                {"id": "hash", "name": "Hash Algorithm", "type": "select", "options": ["sha256", "md5", "sha1", "blake3"], "default": "sha256"},
                 {"id": "hard_delete", "name": "Permanently delete (dangerous)", "type": "checkbox", "default": False},
             ],
             "command": "hashdb dedupe {database}",
@@ -76,6 +78,8 @@ webui_config = {
 
 
 def register_cli(subparsers):
+    from .cli import register_cli as _register_cli
+
     _register_cli(subparsers)
 
 
@@ -120,6 +124,8 @@ def run_cli():
     """
     Run the CLI parser exactly as if invoked from command line.
     """
+    from .cli import build_parser
+
     parser = build_parser()
     args = parser.parse_args(sys.argv[2:])  # skip "tool.py cli"
     if not hasattr(args, "func"):
@@ -128,11 +134,37 @@ def run_cli():
     args.func(args)
 
 
+def _subcommand_parsers(parser):
+    """Return the {name: subparser} map of parser's subcommands."""
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            return action.choices
+    return {}
+
+
+def _split_command(cmd_line):
+    """
+    Split an interactive command line. Only lines with quotes go through
+    shlex; plain ones are split on whitespace, which also leaves Windows
+    backslashes alone.
+    """
+    if '"' in cmd_line or "'" in cmd_line:
+        return shlex.split(cmd_line)
+    return cmd_line.split()
+
+
 def run_cli_interactive():
     """
     Interactive CLI mode - prompts for commands until user exits.
+
+    The parser is built once. A line naming a known subcommand is parsed
+    by that subcommand's parser directly; anything else goes through the
+    top-level parser, which prints the usual usage errors.
     """
+    from .cli import build_parser
+
     parser = build_parser()
+    commands = _subcommand_parsers(parser)
     print("[INFO] Entering interactive CLI mode.")
     print("Type commands like: scan --dir /path --db mydb.sqlite --hash md5")
     print("Type 'help' for available commands, 'exit' to quit.\n")
@@ -155,7 +187,13 @@ def run_cli_interactive():
 
         # Parse and execute the command
         try:
-            args = parser.parse_args(shlex.split(cmd_line))
+            tokens = _split_command(cmd_line)
+            command = commands.get(tokens[0])
+            if command is not None:
+                args = command.parse_args(tokens[1:])
+                args.cmd = tokens[0]
+            else:
+                args = parser.parse_args(tokens)
             if hasattr(args, "func"):
                 args.func(args)
             else:
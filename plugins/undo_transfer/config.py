@@ -31,6 +31,9 @@ DEFAULTS = {
     "THREAD_COUNT": 8,
     "UNDO_LOG": "",
     "CACHE_FILE": "",
+    # Where dry runs keep the parsed transfer log; the toolbox fills in its
+    # config directory. Empty disables the parse cache.
+    "LOG_CACHE_DIR": "",
     "HASH_TYPE": "md5",  # "md5" or "sha256"
     "INTERACTIVE_MODE": True,
 }
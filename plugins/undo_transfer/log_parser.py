@@ -14,10 +14,28 @@ This module:
 - Filters by ORIGINAL_ROOT
 - Filters by TARGET_SUBFOLDERS (case-insensitive)
 - Extracts (original_path, md5_hash) tuples
+
+Parsing a large log is a noticeable part of every run. Dry runs are often
+repeated while tuning the target subfolders, so load_log_entries_cached()
+keeps the latest parse in <cache_dir>/log_entries_<key>.json.gz, keyed by
+the log path, its mtime and size, the targets and ORIGINAL_ROOT. Editing
+the log changes the key, so stale parses are never reused. The toolbox
+passes its config directory, keeping the file out of the temp tree that
+gets indexed.
 """
 
+import glob
+import gzip
+import hashlib
+import json
+import os
+from pathlib import PureWindowsPath
+
 from .utils import load_log_entries as _load_log_entries
 
+LOG_CACHE_PREFIX = "log_entries_"
+LOG_CACHE_SUFFIX = ".json.gz"
+
 
 def load_log_entries(log_path, target_subfolders, original_root):
     """
@@ -30,4 +48,85 @@ def load_log_entries(log_path, target_subfolders, original_root):
     This wrapper preserves the original return shape.
     """
     entries = _load_log_entries(log_path, target_subfolders, original_root)
-    return [(original_path_str, hash_value) for (original_path_str, hash_value, _rel, _algo) in entries]
\ No newline at end of file
+    return [(original_path_str, hash_value) for (original_path_str, hash_value, _rel, _algo) in entries]
+
+
+def _log_cache_key(log_path, target_subfolders, original_root):
+    st = os.stat(log_path)
+    # Lists, not tuples, so the key compares equal after a JSON round trip
+    return [
+        os.path.abspath(log_path),
+        st.st_mtime_ns,
+        st.st_size,
+        sorted(t.lower() for t in target_subfolders),
+        original_root,
+    ]
+
+
+def log_cache_path(cache_dir, key):
+    """Return the cache file path for a cache key."""
+    digest = hashlib.sha1(json.dumps(key).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{LOG_CACHE_PREFIX}{digest}{LOG_CACHE_SUFFIX}")
+
+
+def load_log_entries_cached(log_path, target_subfolders, original_root, cache_dir, store=True):
+    """
+    Same as utils.load_log_entries, reusing a previous parse when possible.
+
+    Returns (entries, from_cache). Without a cache_dir the log is simply
+    parsed. A parse is only written when store is true, and replaces any
+    older one; an unreadable or mismatched cache file just means a re-parse.
+    """
+    if not cache_dir:
+        return _load_log_entries(log_path, target_subfolders, original_root), False
+
+    key = _log_cache_key(log_path, target_subfolders, original_root)
+    path = log_cache_path(cache_dir, key)
+
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data["key"] == key:
+            entries = [
+                (original, hash_value, PureWindowsPath(rel), algo)
+                for original, hash_value, rel, algo in data["entries"]
+            ]
+            return entries, True
+    except (OSError, EOFError, ValueError, TypeError, KeyError):
+        pass
+
+    entries = _load_log_entries(log_path, target_subfolders, original_root)
+    if store:
+        data = {
+            "key": key,
+            "entries": [
+                [original, hash_value, str(rel), algo]
+                for original, hash_value, rel, algo in entries
+            ],
+        }
+        tmp_path = path + ".tmp"
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Level 1: the logs are mostly repeated path prefixes
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        else:
+            clear_log_cache(cache_dir, keep=path)
+    return entries, False
+
+
+def clear_log_cache(cache_dir, keep=None):
+    """Remove cached log parses in cache_dir, except keep. Returns the number removed."""
+    removed = 0
+    for path in glob.glob(os.path.join(glob.escape(cache_dir), f"{LOG_CACHE_PREFIX}*{LOG_CACHE_SUFFIX}")):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -5,8 +5,9 @@ md5_cache.py
 MD5 hashing + persistent cache + directory indexing.
 
 This module provides:
-- compute_md5(): chunked hashing
-- load_cache() / save_cache(): persistent JSON cache
+- compute_hash() / compute_md5() / compute_sha256(): whole-file hashing
+- load_cache() / save_cache(): persistent JSON cache, plus a journal of
+  entries hashed since the last save
 - index_temp_directory(): builds MD5 → file path index
 - Multithreaded hashing for new/changed files
 - Optional progress reporting via queue (for GUI)
@@ -16,8 +17,10 @@ This module is used by restorer.py and tool.py.
 
 import os
 import json
+import mmap
+import time
 import hashlib
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
 
 # Import shared scanner utilities
 import sys
@@ -25,43 +28,107 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from shared import collect_files_chunked, DEFAULT_CHUNK_SIZE
 
 
-def compute_md5(path, chunk_size=65536):
-    md5 = hashlib.md5()
+# Files at least this large are hashed from a read-only memory map in one
+# update() call; smaller ones in a single read(). Either way OpenSSL sees
+# the whole file at once (GIL released) instead of one Python round trip
+# per chunk. chunk_size only matters if a file can't be mapped.
+HASH_MMAP_MIN = 8 * 1024 * 1024
+
+
+def compute_hash(path, hash_type="md5", chunk_size=65536):
+    """Return the md5 or sha256 hex digest of path, or None if unreadable."""
+    h = hashlib.sha256() if hash_type == "sha256" else hashlib.md5()
     try:
         with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < HASH_MMAP_MIN:
+                h.update(f.read())
+                return h.hexdigest()
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                mm = None
+            if mm is not None:
+                with mm:
+                    h.update(mm)
+                return h.hexdigest()
             for chunk in iter(lambda: f.read(chunk_size), b""):
-                md5.update(chunk)
-        return md5.hexdigest()
+                h.update(chunk)
+        return h.hexdigest()
     except Exception:
         return None
 
 
+# SHA-256 is CPU-bound, so runs with at least this many files to hash use
+# worker processes (PROCESS_CHUNK files per task to amortise the IPC). MD5
+# stays on threads: it is fast enough that reads dominate.
+PROCESS_HASH_MIN_FILES = 64
+PROCESS_CHUNK = 32
+
+# Progress listeners only redraw a few dozen times a second, so indexing
+# and restore send at most one update per PROGRESS_INTERVAL seconds (plus
+# the final one) instead of one queue put per file.
+PROGRESS_INTERVAL = 1 / 30
+
+
+def _hash_item(item, hash_type):
+    """Hash one (path, size, mtime) work item; module level so it pickles."""
+    path, size, mtime = item
+    return path, size, mtime, compute_hash(path, hash_type=hash_type)
+
+
+def compute_md5(path, chunk_size=65536):
+    return compute_hash(path, "md5", chunk_size=chunk_size)
+
+
 def compute_sha256(path, chunk_size=65536):
-    sha = hashlib.sha256()
+    return compute_hash(path, "sha256", chunk_size=chunk_size)
+
+
+def index_key(hash_value):
+    """
+    Return the hash_index key for a hex digest: its raw bytes (half the
+    size of the hex string), or None if hash_value isn't valid hex.
+    """
     try:
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(chunk_size), b""):
-                sha.update(chunk)
-        return sha.hexdigest()
-    except Exception:
+        return bytes.fromhex(hash_value)
+    except (TypeError, ValueError):
         return None
 
 
-def compute_hash(path, hash_type="md5", chunk_size=65536):
-    if hash_type == "sha256":
-        return compute_sha256(path, chunk_size=chunk_size)
-    return compute_md5(path, chunk_size=chunk_size)
+def journal_path(cache_path):
+    """
+    Path of the append-only journal next to the cache. Indexing appends
+    one JSON line ([path, entry]) per newly hashed file, so an interrupted
+    run keeps its work; load_cache replays it and save_cache clears it.
+    """
+    return cache_path + ".journal"
 
 
-def load_cache(cache_path):
-    if not os.path.isfile(cache_path):
-        return {}
+def _replay_journal(cache_path, cache):
     try:
-        with open(cache_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data if isinstance(data, dict) else {}
-    except Exception:
-        return {}
+        with open(journal_path(cache_path), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    path, entry = json.loads(line)
+                except (ValueError, TypeError):
+                    continue  # torn last line from an interrupted run
+                cache[path] = entry
+    except OSError:
+        pass
+    return cache
+
+
+def load_cache(cache_path):
+    data = {}
+    if os.path.isfile(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                data = json.loads(f.read())
+        except Exception:
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+    return _replay_journal(cache_path, data)
 
 
 def save_cache(cache_path, cache_data):
@@ -69,12 +136,27 @@ def save_cache(cache_path, cache_data):
     if cache_dir and not os.path.exists(cache_dir):
         os.makedirs(cache_dir, exist_ok=True)
 
+    # Compact output: the cache grows with the temp tree. orjson (optional)
+    # serialises it several times faster than the json module.
+    try:
+        import orjson
+    except ImportError:
+        payload = json.dumps(cache_data, separators=(",", ":")).encode("utf-8")
+    else:
+        payload = orjson.dumps(cache_data)
+
     tmp_path = cache_path + ".tmp"
-    with open(tmp_path, "w", encoding="utf-8") as f:
-        json.dump(cache_data, f, indent=2)
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
 
     os.replace(tmp_path, cache_path)
 
+    # Everything journaled is in the cache file now
+    try:
+        os.remove(journal_path(cache_path))
+    except FileNotFoundError:
+        pass
+
 
 def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress_queue=None, hash_type="md5"):
     """
@@ -85,12 +167,16 @@ def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress
         hash_type: "md5" or "sha256"
 
     Returns:
-        hash_index: dict mapping hash -> [list of paths] to handle duplicates
+        hash_index: dict mapping index_key(hash) -> path, or -> a list of
+                    (path, basename, mtime) candidates when several files
+                    share the hash
         cache: the updated cache dict
     """
 
     cache = load_cache(cache_path)
-    hash_index = {}  # hash -> [paths] to handle duplicates/collisions
+    # Most hashes have one file, so the list is only made on a collision.
+    # Candidates carry what the restorer needs to choose between them.
+    hash_index = {}  # index_key(hash) -> path | [(path, basename, mtime)]
 
     # Collect files with chunked scanning + progress
     def on_scan_chunk(chunk, total_so_far):
@@ -111,12 +197,26 @@ def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress
     cached_hits = 0
     to_hash = []
 
-    def add_to_index(hash_value, path):
+    def candidate(path, mtime):
+        return path, os.path.basename(path), mtime
+
+    def add_to_index(hash_value, path, mtime):
         """Add path to the index, handling duplicates."""
-        if hash_value not in hash_index:
-            hash_index[hash_value] = []
-        if path not in hash_index[hash_value]:
-            hash_index[hash_value].append(path)
+        key = index_key(hash_value)
+        if key is None:
+            return
+        current = hash_index.get(key)
+        if current is None:
+            hash_index[key] = path
+        elif isinstance(current, list):
+            if all(c[0] != path for c in current):
+                current.append(candidate(path, mtime))
+        elif current != path:
+            # Every indexed path has a cache entry by now
+            hash_index[key] = [
+                candidate(current, cache.get(current, {}).get("mtime", -1)),
+                candidate(path, mtime),
+            ]
 
     # Determine which files need hashing
     for path in file_list:
@@ -134,7 +234,7 @@ def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress
             cached_hash = entry.get(hash_type)
 
         if cached_hash:
-            add_to_index(cached_hash, path)
+            add_to_index(cached_hash, path, mtime)
             cached_hits += 1
         else:
             to_hash.append((path, size, mtime))
@@ -142,6 +242,7 @@ def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress
     total_to_hash = len(to_hash)
     hashed_count = 0
     processed_overall = 0
+    last_progress = 0.0
 
     # Initial progress update
     if progress_queue:
@@ -151,18 +252,23 @@ def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress
         ))
 
     # Hash missing files
-    def hash_worker(item):
-        path, size, mtime = item
-        hv = compute_hash(path, hash_type=hash_type)
-        return path, size, mtime, hv
-
     if total_to_hash > 0:
-        with ThreadPoolExecutor(max_workers=thread_count) as executor:
-            futures = {executor.submit(hash_worker, item): item for item in to_hash}
-            for future in as_completed(futures):
-                path, size, mtime, hv = future.result()
+        # Imported here, like the restorer's pool: runs that hit the cache for
+        # every file, and toolbox startup, never need concurrent.futures
+        if hash_type == "sha256" and total_to_hash >= PROCESS_HASH_MIN_FILES:
+            # multiprocessing in particular is a noticeable share of startup
+            from concurrent.futures import ProcessPoolExecutor
+            executor_cls, chunksize = ProcessPoolExecutor, PROCESS_CHUNK
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            executor_cls, chunksize = ThreadPoolExecutor, 1
+        worker = partial(_hash_item, hash_type=hash_type)
+
+        with executor_cls(max_workers=thread_count) as executor, \
+                open(journal_path(cache_path), "a", encoding="utf-8") as journal:
+            for path, size, mtime, hv in executor.map(worker, to_hash, chunksize=chunksize):
                 if hv:
-                    add_to_index(hv, path)
+                    add_to_index(hv, path, mtime)
                     cache[path] = {
                         # Keep both hash types if present; update the one we computed.
                         "md5": cache.get(path, {}).get("md5"),
@@ -171,11 +277,16 @@ def index_temp_directory_with_cache(temp_dir, cache_path, thread_count, progress
                         "mtime": mtime
                     }
                     cache[path][hash_type] = hv
+                    journal.write(json.dumps([path, cache[path]], separators=(",", ":")) + "\n")
 
                 hashed_count += 1
                 processed_overall = cached_hits + hashed_count
 
-                if progress_queue:
+                if progress_queue and (
+                    hashed_count == total_to_hash
+                    or time.monotonic() - last_progress >= PROGRESS_INTERVAL
+                ):
+                    last_progress = time.monotonic()
                     fraction = processed_overall / total_files if total_files else 0.0
                     progress_queue.put((
                         "index_progress",
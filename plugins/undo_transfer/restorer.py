@@ -17,15 +17,16 @@ This module is GUI-agnostic and can be used in CLI or GUI mode.
 """
 
 import os
-import shutil
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
+import time
 
 from pathlib import Path
-from .md5_cache import index_temp_directory_with_cache
+from .log_parser import load_log_entries_cached
+from .md5_cache import PROGRESS_INTERVAL, index_key, index_temp_directory_with_cache
+from shared.logger import BufferedLogger
 from shared.path_utils import ensure_directory
-from .utils import load_log_entries
+
+UNDO_LOG_FLUSH_LINES = 100
 
 
 class UndoWorker(threading.Thread):
@@ -41,12 +42,22 @@ class UndoWorker(threading.Thread):
 
         self.total_entries = 0
         self.processed_entries = 0
+        self._last_progress = 0.0
 
     def _emit(self, msg_type, payload):
         if self.progress_queue:
             self.progress_queue.put((msg_type, payload))
 
     def _update_restore_progress(self):
+        # Throttled to PROGRESS_INTERVAL; the last entry always reports
+        now = time.monotonic()
+        if (
+            now - self._last_progress < PROGRESS_INTERVAL
+            and self.processed_entries < self.total_entries
+        ):
+            return
+        self._last_progress = now
+
         if self.total_entries == 0:
             fraction = 0.0
         else:
@@ -56,6 +67,11 @@ class UndoWorker(threading.Thread):
         self._emit("restore_progress", (fraction, status))
 
     def run(self):
+        # Only a restore run needs these; importing the tool (toolbox
+        # startup, --help) shouldn't pay for them
+        import shutil
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+
         s = self.settings
 
         log_file = s["LOG_FILE"]
@@ -69,27 +85,22 @@ class UndoWorker(threading.Thread):
         hash_type_setting = s.get("HASH_TYPE", "md5")
         dry_run = s["DRY_RUN"]
 
-        # Ensure undo log exists
+        # Ensure undo log directory exists
         undo_dir = os.path.dirname(undo_log)
         if undo_dir and not os.path.exists(undo_dir):
             os.makedirs(undo_dir, exist_ok=True)
-        if not os.path.exists(undo_log):
-            open(undo_log, "w", encoding="utf-8").close()
 
-        with open(undo_log, "a", encoding="utf-8") as log:
+        # Lines reach the undo log UNDO_LOG_FLUSH_LINES at a time, and at
+        # the end of each phase, instead of one flush per line
+        logger = BufferedLogger(undo_log, buffer_limit=UNDO_LOG_FLUSH_LINES, mirror_to_console=True)
+        write = logger.log
 
-            log_lock = threading.Lock()
-            pick_lock = threading.Lock()
+        try:
+            # Collision lists are guarded per first digest byte, so
+            # threads picking for different hashes don't wait on each other
+            pick_locks = [threading.Lock() for _ in range(256)]
             cache_lock = threading.Lock()
 
-            def write(msg):
-                timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                line = f"[{timestamp}] {msg}"
-                with log_lock:
-                    print(line, flush=True)
-                    log.write(line + "\n")
-                    log.flush()
-
             write("=" * 80)
             write("UNDO TRANSFER STARTED")
             write(f"Target subfolders: {targets}")
@@ -100,10 +111,16 @@ class UndoWorker(threading.Thread):
             write(f"Cache file: {cache_file}")
             write(f"Thread count: {thread_count}")
 
-            # Load log entries (returns tuples with relative path and hash algorithm)
-            entries = load_log_entries(log_file, targets, original_root)
+            # Load log entries (returns tuples with relative path and hash algorithm).
+            # Dry runs keep the parse in LOG_CACHE_DIR for the next run;
+            # a real run reuses one but doesn't add its own.
+            entries, from_cache = load_log_entries_cached(
+                log_file, targets, original_root,
+                s.get("LOG_CACHE_DIR"),
+                store=dry_run,
+            )
             self.total_entries = len(entries)
-            write(f"Loaded {self.total_entries} matching log entries")
+            write(f"Loaded {self.total_entries} matching log entries" + (" (cached parse)" if from_cache else ""))
 
             # Index temp directory by hash
             # If logs contain mixed hash types, build both indexes (cache will be reused).
@@ -125,6 +142,7 @@ class UndoWorker(threading.Thread):
                     f"Indexing complete. Indexed {len(idx)} {algo.upper()} entries. "
                     f"Cache size: {len(cache)}"
                 )
+            logger.flush()
 
             restored = 0
             missing = 0
@@ -135,39 +153,46 @@ class UndoWorker(threading.Thread):
 
             def _pick_candidate(idx_map, hv: str, rel) -> (str, int):
                 """Pick and REMOVE a candidate path for this hash, returns (path, ambiguous_count)."""
-                candidates = idx_map.get(hv)
+                key = index_key(hv)
+                candidates = idx_map.get(key)
                 if not candidates:
                     return "", 0
 
+                # A hash with a single file maps straight to its path and
+                # never becomes a list during restore, so one atomic pop
+                # claims it without a lock (a racing thread gets None).
+                if not isinstance(candidates, list):
+                    return idx_map.pop(key, None) or "", 0
+
+                with pick_locks[key[0]]:
+                    return _pick_from_list(idx_map, key, candidates, rel)
+
+            def _pick_from_list(idx_map, key, candidates, rel) -> (str, int):
+                """_pick_candidate for a collision list; the caller holds its shard lock."""
+                if not candidates:
+                    return "", 0  # emptied by another thread meanwhile
+
                 if len(candidates) == 1:
-                    chosen = candidates.pop(0)
-                    if not idx_map.get(hv):
-                        idx_map.pop(hv, None)
+                    chosen = candidates.pop(0)[0]
+                    if not idx_map.get(key):
+                        idx_map.pop(key, None)
                     return chosen, 0
 
-                # Prefer matching basename, else newest mtime.
+                # Prefer matching basename, else newest mtime. Both were
+                # recorded at indexing time, so nothing here touches the disk.
                 target_basename = rel.name if rel else None
                 chosen = None
                 if target_basename:
-                    for i, c in enumerate(candidates):
-                        if Path(c).name == target_basename:
-                            chosen = candidates.pop(i)
+                    for i, (c, name, _) in enumerate(candidates):
+                        if name == target_basename:
+                            chosen = candidates.pop(i)[0]
                             break
                 if chosen is None:
-                    best_i = 0
-                    best_m = -1
-                    for i, c in enumerate(candidates):
-                        try:
-                            m = os.path.getmtime(c) if os.path.exists(c) else -1
-                        except Exception:
-                            m = -1
-                        if m > best_m:
-                            best_m = m
-                            best_i = i
-                    chosen = candidates.pop(best_i)
+                    best_i = max(range(len(candidates)), key=lambda i: candidates[i][2])
+                    chosen = candidates.pop(best_i)[0]
 
                 if not candidates:
-                    idx_map.pop(hv, None)
+                    idx_map.pop(key, None)
                 return chosen, len(candidates) + 1
 
             def _restore_one(entry):
@@ -177,8 +202,7 @@ class UndoWorker(threading.Thread):
                     write(f"ERROR: No index available for hash type {algo} (entry {original_path_str})")
                     return {"status": "missing"}
 
-                with pick_lock:
-                    current_path, candidate_count = _pick_candidate(idx, hash_value, rel_path)
+                current_path, candidate_count = _pick_candidate(idx, hash_value, rel_path)
 
                 if not current_path:
                     write(f"Missing: No file with {algo.upper()} {hash_value} found for {original_path_str}")
@@ -264,5 +288,8 @@ class UndoWorker(threading.Thread):
             write(f"Missing files: {missing}")
             write("UNDO TRANSFER COMPLETED")
             write("=" * 80)
+            logger.flush()
 
-            self._emit("done", None)
\ No newline at end of file
+            self._emit("done", None)
+        finally:
+            logger.flush()
\ No newline at end of file
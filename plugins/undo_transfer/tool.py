@@ -163,6 +163,10 @@ def run(mode="gui", settings=None, config_dir=None, config_file="undo_transfer.j
     final_settings = build_settings(config_dir, config_file, overrides=settings)
     save_persistent_config(config_dir, config_file, final_settings)
 
+    # Filled in after saving so the config doesn't pin an absolute path
+    if not final_settings.get("LOG_CACHE_DIR"):
+        final_settings["LOG_CACHE_DIR"] = config_dir
+
     if mode in ("cli", "tui"):
         _run_cli(final_settings)
     else:
@@ -7,6 +7,7 @@ Shared utilities for all toolbox modules.
 
 from .scanner import (
     iter_files,
+    iter_file_entries,
     iter_files_chunked,
     collect_files,
     collect_files_chunked,
@@ -42,6 +43,7 @@ from .progress import (
 
 from .logger import (
     BufferedLogger,
+    QueueLogger,
 )
 
 from .path_utils import (
@@ -65,6 +67,7 @@ from .config import (
 __all__ = [
     # Scanner
     "iter_files",
+    "iter_file_entries",
     "iter_files_chunked", 
     "collect_files",
     "collect_files_chunked",
@@ -90,6 +93,7 @@ __all__ = [
     "cli_progress",
     # Logger
     "BufferedLogger",
+    "QueueLogger",
     # Path Utils
     "get_extension",
     "ensure_directory",
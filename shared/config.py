@@ -5,6 +5,7 @@ shared.config
 Common configuration management utilities.
 """
 
+import functools
 import json
 import os
 from pathlib import Path
@@ -28,9 +29,18 @@ def load_persistent_config(
     base_dir = Path(config_dir) if config_dir else get_config_dir()
     config_path = base_dir / config_name
 
-    if not config_path.exists():
+    try:
+        st = os.stat(config_path)
+    except OSError:
         return {}
 
+    # Copy so callers can't mutate the cached dict (configs are flat).
+    return dict(_load_config_cached(str(config_path), st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_config_cached(config_path: str, mtime_ns: int, size: int) -> Dict[str, Any]:
+    """Parse a config file; cached per (path, mtime_ns, size)."""
     try:
         with open(config_path, "r", encoding="utf-8") as f:
             data = json.load(f)
@@ -52,11 +62,29 @@ def save_persistent_config(
 
     config_path = base_dir / config_name
 
+    try:
+        text = json.dumps(config, indent=2)
+    except (ValueError, TypeError):
+        return False
+
+    # Most runs save back exactly what they loaded. Skip the rewrite then,
+    # which also keeps the mtime (and so the parse cache key) stable.
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            if f.read() == text:
+                return True
+    except (OSError, UnicodeDecodeError):
+        pass
+
+    # Coarse filesystem timestamps could let a rewrite keep the same
+    # (mtime, size) key, so drop cached parses on every save.
+    _load_config_cached.cache_clear()
+
     try:
         with open(config_path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
+            f.write(text)
         return True
-    except (OSError, UnicodeEncodeError, ValueError, TypeError):
+    except (OSError, UnicodeEncodeError):
         return False
 
 
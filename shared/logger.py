@@ -12,11 +12,17 @@ Features:
 - Text and JSONL formats
 - UTF-8 safe output
 - Callback support for log streaming
+- Bulk logging for multi-line reports
+- Queue-backed front end that moves formatting and I/O off hot threads
 """
 
+import os
+import sys
 import threading
 import json
+import time
 from datetime import datetime
+from queue import Empty, SimpleQueue
 
 
 class BufferedLogger:
@@ -55,11 +61,27 @@ class BufferedLogger:
         # When True, diagnostics and other helpers can avoid printing to stdout
         self.suppress_console = False
 
+        # (epoch second, rendered timestamp) of the last line; see _timestamp
+        self._ts_cache = (None, "")
+
         # Ensure file starts cleanly separated for text logs
         # For JSONL, avoid blank lines that can confuse strict parsers
         if self.log_format != "jsonl":
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write("\n")
+            self._append("\n")
+
+    def _append(self, text):
+        """
+        Append text to the log with one O_APPEND write. A raw descriptor
+        skips building a buffered text file object for every batch.
+        """
+        data = memoryview(text.encode("utf-8"))
+        fd = os.open(self.log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o666)
+        try:
+            # os.write may be short for very large batches
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
 
     def _flush_locked(self):
         """Internal flush (requires lock already held)"""
@@ -68,30 +90,37 @@ class BufferedLogger:
 
         text = "\n".join(self.buffer) + "\n"
         self.buffer.clear()
+        self._append(text)
 
-        with open(self.log_path, "a", encoding="utf-8") as f:
-            f.write(text)
-
-    def log(self, msg):
+    def _timestamp(self):
         """
-        Append a timestamped message to the buffer.
-        Auto-flush when buffer_limit is reached.
+        Return the current time as rendered in lines. Timestamps have
+        one-second resolution, so the string is only rebuilt when the
+        second changes; every other line reuses it.
         """
-        now = datetime.now()
+        sec = int(time.time())
+        cached = self._ts_cache
+        if cached[0] != sec:
+            now = datetime.fromtimestamp(sec)
+            if self.log_format == "jsonl":
+                ts = now.isoformat(timespec="seconds")
+            else:
+                ts = now.strftime("%Y-%m-%d %H:%M:%S")
+            cached = self._ts_cache = (sec, ts)
+        return cached[1]
 
+    def _render(self, msg, ts):
+        """Render one message as a text or JSONL line."""
         if self.log_format == "jsonl":
             payload = {
-                "ts": now.isoformat(timespec="seconds"),
+                "ts": ts,
                 "msg": str(msg),
             }
-            line = json.dumps(payload, ensure_ascii=False)
-        else:
-            ts = now.strftime("%Y-%m-%d %H:%M:%S")
-            line = f"[{ts}] {msg}"
+            return json.dumps(payload, ensure_ascii=False)
 
-        if self.mirror:
-            print(line, flush=True)
+        return f"[{ts}] {msg}"
 
+    def _notify(self, line):
         if self.on_line is not None:
             try:
                 self.on_line(line)
@@ -99,11 +128,52 @@ class BufferedLogger:
                 # Logging must never crash the tool
                 pass
 
+    def log(self, msg, *args):
+        """
+        Append a timestamped message to the buffer.
+        Auto-flush when buffer_limit is reached.
+
+        As with the stdlib logging module, extra args are %-formatted into
+        msg: log("RENAME: %s -> %s", src, dst).
+        """
+        if args:
+            msg = msg % args
+        line = self._render(msg, self._timestamp())
+
+        if self.mirror:
+            print(line, flush=True)
+
+        self._notify(line)
+
         with self.lock:
             self.buffer.append(line)
             if len(self.buffer) >= self.buffer_limit:
                 self._flush_locked()
 
+    def log_bulk(self, messages):
+        """
+        Append many messages at once, sharing one timestamp.
+
+        Equivalent to calling log() per message, but takes the lock once
+        and mirrors to the console with a single print.
+        """
+        ts = self._timestamp()
+        lines = [self._render(msg, ts) for msg in messages]
+        if not lines:
+            return
+
+        if self.mirror:
+            print("\n".join(lines), flush=True)
+
+        if self.on_line is not None:
+            for line in lines:
+                self._notify(line)
+
+        with self.lock:
+            self.buffer.extend(lines)
+            if len(self.buffer) >= self.buffer_limit:
+                self._flush_locked()
+
     def flush(self):
         """
         Flush all buffered log lines to disk.
@@ -111,3 +181,97 @@ class BufferedLogger:
         """
         with self.lock:
             self._flush_locked()
+
+
+# Marks the end of a QueueLogger's stream
+_STOP = object()
+
+
+class QueueLogger:
+    """
+    Logger front end that hands messages to a single listener thread.
+
+    log() is just a SimpleQueue.put(), so the calling thread never formats
+    or renders lines, takes the target's lock or touches the disk. %-style
+    args are formatted on the listener thread. The listener drains
+    whatever has queued up and forwards it with one target.log_bulk() call,
+    preserving order. This is the QueueHandler/QueueListener pattern from
+    the stdlib logging module.
+    """
+
+    def __init__(self, target, batch_limit=500):
+        """
+        Args:
+            target: Logger to forward to (e.g. BufferedLogger); log_bulk()
+                is used when available, otherwise log() per message
+            batch_limit: Maximum messages forwarded per log_bulk() call
+        """
+        self.target = target
+        self.batch_limit = batch_limit
+        self._queue = SimpleQueue()
+        self._thread = threading.Thread(target=self._listen, name="log-listener", daemon=True)
+        self._thread.start()
+
+    @property
+    def suppress_console(self):
+        return self.target.suppress_console
+
+    def log(self, msg, *args):
+        """Queue a message (and any %-style args) for the listener thread."""
+        self._queue.put((msg, args))
+
+    def log_bulk(self, messages):
+        """Queue several messages, keeping them contiguous in the output."""
+        for msg in messages:
+            self._queue.put((msg, ()))
+
+    def _listen(self):
+        get = self._queue.get
+        get_nowait = self._queue.get_nowait
+
+        while True:
+            batch = [get()]
+            try:
+                while len(batch) < self.batch_limit and batch[-1] is not _STOP:
+                    batch.append(get_nowait())
+            except Empty:
+                pass
+
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            if batch:
+                try:
+                    self._forward(batch)
+                except Exception as e:
+                    # A failing target must not kill the listener: later
+                    # messages would be dropped without a trace
+                    print(f"[log-listener] dropped {len(batch)} log lines: {e!r}", file=sys.stderr, flush=True)
+            if stop:
+                return
+
+    @staticmethod
+    def _format(msg, args):
+        try:
+            return msg % args
+        except (TypeError, ValueError, KeyError):
+            # Like the stdlib logging module, keep the record even when its
+            # args don't fit the format string
+            return f"{msg} {args!r}"
+
+    def _forward(self, batch):
+        batch = [self._format(msg, args) if args else msg for msg, args in batch]
+        log_bulk = getattr(self.target, "log_bulk", None)
+        if log_bulk is not None:
+            log_bulk(batch)
+        else:
+            for msg in batch:
+                self.target.log(msg)
+
+    def close(self):
+        """
+        Drain every queued message into the target and stop the listener.
+        Call once, after the last log().
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
@@ -26,7 +26,7 @@ Usage:
 
 import os
 from pathlib import Path
-from typing import List, Iterator, Optional, Callable, Union
+from typing import List, Iterable, Iterator, Optional, Callable, Union
 
 # ------------------------------------------------------------
 # Default chunk size for directory scanning
@@ -64,6 +64,63 @@ def iter_files(
                 yield os.path.join(dirpath, f)
 
 
+# ------------------------------------------------------------
+# DirEntry Generator - yields os.DirEntry objects lazily
+# ------------------------------------------------------------
+def iter_file_entries(
+    root: Union[str, Path],
+    follow_symlinks: bool = False,
+    skip_dirs: Iterable[Union[str, Path]] = (),
+) -> Iterator[os.DirEntry]:
+    """
+    Generator that yields os.DirEntry objects for files, in os.walk order.
+
+    Entries cache their stat() result (and on Windows it comes free from the
+    directory listing), so callers that need sizes can avoid a separate
+    os.path.getsize() per file.
+
+    Each directory is listed in full before any of its entries is yielded,
+    so callers may rename files in place while iterating.
+
+    Args:
+        root: Directory to scan
+        follow_symlinks: If True, descend into symlinked directories
+        skip_dirs: Directories not to descend into (e.g. an output
+            directory the caller writes to while iterating)
+
+    Yields:
+        os.DirEntry for each file
+    """
+    skip = {os.path.normcase(os.path.abspath(d)) for d in skip_dirs}
+    stack = [str(root)]
+
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                entries = list(it)
+        except OSError:
+            continue
+
+        subdirs = []
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                if not follow_symlinks and entry.is_symlink():
+                    continue
+                if skip and os.path.normcase(os.path.abspath(entry.path)) in skip:
+                    continue
+                subdirs.append(entry.path)
+            else:
+                yield entry
+
+        # Reverse so the first subdirectory is visited first, like os.walk
+        stack.extend(reversed(subdirs))
+
+
 # ------------------------------------------------------------
 # Chunked Generator - yields batches of paths
 # ------------------------------------------------------------
@@ -1,3 +1,5 @@
+import os
+
 from shared.config import (
     build_settings,
     load_persistent_config,
@@ -39,3 +41,28 @@ def test_build_settings_combines_defaults_persistent_and_cli(tmp_path):
 
     assert result["threads"] == 8
     assert result["mode"] == "persisted"
+
+
+def test_load_persistent_config_sees_saves_and_returns_copies(tmp_path):
+    save_persistent_config({"a": 1}, config_name="c.json", config_dir=tmp_path)
+    first = load_persistent_config(config_name="c.json", config_dir=tmp_path)
+    first["a"] = 99
+
+    assert load_persistent_config(config_name="c.json", config_dir=tmp_path) == {"a": 1}
+
+    save_persistent_config({"a": 2}, config_name="c.json", config_dir=tmp_path)
+    assert load_persistent_config(config_name="c.json", config_dir=tmp_path) == {"a": 2}
+
+
+def test_save_persistent_config_skips_unchanged_rewrite(tmp_path):
+    save_persistent_config({"a": 1}, config_name="c.json", config_dir=tmp_path)
+    path = tmp_path / "c.json"
+    before = path.stat().st_mtime_ns
+    os.utime(path, ns=(before - 10**9, before - 10**9))
+
+    assert save_persistent_config({"a": 1}, config_name="c.json", config_dir=tmp_path) is True
+    assert path.stat().st_mtime_ns == before - 10**9
+
+    assert save_persistent_config({"a": 2}, config_name="c.json", config_dir=tmp_path) is True
+    assert path.stat().st_mtime_ns != before - 10**9
+    assert load_persistent_config(config_name="c.json", config_dir=tmp_path) == {"a": 2}
@@ -0,0 +1,98 @@
+import argparse
+
+import pytest
+
+from plugins.extension_repair.tool import _add_arguments, _parse_fast
+
+
+def _argparse(argv):
+    parser = argparse.ArgumentParser()
+    _add_arguments(parser)
+    return vars(parser.parse_args(argv))
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        [],
+        ["photos"],
+        ["photos", "--mode", "cli", "-y", "-n"],
+        ["--mode=cli", "photos", "--commit", "--report", "--quarantine", "-f"],
+        ["-m", "cli", "--config-dir", "cfg", "--out", "fixed", "-t", "4", "photos"],
+        ["--threads=2", "--trust-ext", "--console-ui", "--json", "-"],
+        ["photos", "--no-cache", "-n"],
+        ["-n", "--commit"],
+    ],
+)
+def test_parse_fast_matches_argparse(argv):
+    assert vars(_parse_fast(argv)) == _argparse(argv)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["-h"],
+        ["--dry"],
+        ["-yn"],
+        ["-t", "four"],
+        ["--mode", "tui"],
+        ["--out"],
+        ["a", "b"],
+        ["--json=1"],
+    ],
+)
+def test_parse_fast_defers_to_argparse(argv):
+    assert _parse_fast(argv) is None
+
+
+def test_webui_config_is_built_on_first_access():
+    from plugins.extension_repair import tool
+
+    config = tool.webui_config
+
+    assert [a["id"] for a in config["actions"]] == ["scan", "report"]
+    assert tool.webui_config is config
+
+
+def test_cli_run_still_prompts_for_flags_not_given(monkeypatch, tmp_path):
+    import io
+
+    from plugins.extension_repair import tool
+
+    class _TTY(io.StringIO):
+        def isatty(self):
+            return True
+
+    asked = []
+    ran = []
+    monkeypatch.setattr("sys.stdin", _TTY())
+    monkeypatch.setattr("builtins.input", lambda prompt="": asked.append(prompt) or "")
+    monkeypatch.setattr(tool, "run_cli", lambda settings, logger: ran.append(settings))
+
+    argv = [str(tmp_path), "--mode", "cli", "--config-dir", str(tmp_path / "cfg")]
+    tool._run_from_args(_parse_fast(argv))
+
+    assert any(p.startswith("Dry run only") for p in asked)
+    assert not any(p.startswith("Directory to scan") for p in asked)
+    assert ran[0]["DRY_RUN"] is True
+
+
+def test_run_only_flags_are_not_saved(monkeypatch, tmp_path):
+    import json
+
+    from plugins.extension_repair import tool
+
+    ran = []
+    monkeypatch.setattr(tool, "run_cli", lambda settings, logger: ran.append(settings))
+    cfg = tmp_path / "cfg"
+
+    tool.main([str(tmp_path), "--mode", "cli", "-y", "--config-dir", str(cfg), "--no-cache", "--trust-ext"])
+    tool.main([str(tmp_path), "--mode", "cli", "-y", "--config-dir", str(cfg)])
+
+    assert [s["DETECTION_CACHE"] for s in ran] == [False, True]
+    assert [s["VERIFY_CORRECT_EXT"] for s in ran] == [False, True]
+    assert ran[1]["CACHE_FILE"] == str(cfg / tool.CACHE_FILE)
+    saved = json.loads((cfg / tool.CONFIG_FILE).read_text(encoding="utf-8"))
+    assert saved["DETECTION_CACHE"] is True
+    assert saved["VERIFY_CORRECT_EXT"] is True
+    assert saved["CACHE_FILE"] == ""
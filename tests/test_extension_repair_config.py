@@ -0,0 +1,39 @@
+import io
+
+from plugins.extension_repair import config
+
+
+class _TTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def _no_input(_prompt=""):
+    raise AssertionError("unexpected prompt")
+
+
+def test_interactive_update_skips_prompts_without_tty(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO())
+    monkeypatch.setattr("builtins.input", _no_input)
+
+    settings = dict(config.DEFAULTS)
+    assert config._interactive_update(settings) is settings
+
+
+def test_interactive_update_only_prompts_for_missing_keys(monkeypatch, tmp_path):
+    asked = []
+
+    def fake_input(prompt=""):
+        asked.append(prompt)
+        return ""
+
+    monkeypatch.setattr("sys.stdin", _TTY())
+    monkeypatch.setattr("builtins.input", fake_input)
+
+    overrides = {"TARGET_DIRECTORY": str(tmp_path / "."), "IN_PLACE": True, "DRY_RUN": True}
+    settings = dict(config.DEFAULTS, **overrides)
+    config._interactive_update(settings, overrides)
+
+    assert settings["TARGET_DIRECTORY"] == str(tmp_path)
+    assert not any(p.startswith(("Directory to scan", "Repair files", "Dry run")) for p in asked)
+    assert any(p.startswith("Number of threads") for p in asked)
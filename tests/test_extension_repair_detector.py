@@ -0,0 +1,64 @@
+from plugins.extension_repair.detector import detect_file_type, detect_file_types
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_detect_file_type_fixed_riff_and_iso(tmp_path):
+    jpg = _write(tmp_path / "a.bin", b"\xFF\xD8\xFF\xE0" + b"\x00" * 60)
+    wav = _write(tmp_path / "b.bin", b"RIFF\x00\x00\x00\x00WAVEfmt ")
+    mp4 = _write(tmp_path / "c.bin", b"\x00\x00\x00\x18ftypisom\x00\x00\x02\x00")
+
+    assert detect_file_type(jpg) == ("jpg", None)
+    assert detect_file_type(wav) == ("wav", None)
+    assert detect_file_type(mp4) == ("mp4", None)
+
+
+def test_detect_file_type_skip_reasons(tmp_path):
+    tiny = _write(tmp_path / "tiny", b"ab")
+    riff = _write(tmp_path / "riff", b"RIFF\x00\x00\x00\x00ABCD")
+    iso = _write(tmp_path / "iso", b"\x00\x00\x00\x18ftypzzzz")
+    unknown = _write(tmp_path / "unknown", b"hello world, plain text")
+
+    assert detect_file_type(tiny) == (None, "too_small")
+    assert detect_file_type(riff) == (None, "ambiguous_riff")
+    assert detect_file_type(iso) == (None, "ambiguous_iso")
+    assert detect_file_type(unknown) == (None, "unknown")
+    assert detect_file_type(str(tmp_path / "missing")) == (None, "unreadable")
+
+
+def test_detect_file_types_preserves_input_order(tmp_path):
+    paths = [
+        _write(tmp_path / "1", b"\x89PNG\r\n\x1a\n"),
+        _write(tmp_path / "2", b"GIF89a"),
+        _write(tmp_path / "3", b"plain text"),
+    ]
+
+    results = detect_file_types(paths, workers=2)
+
+    assert [p for p, _ in results] == paths
+    assert [r for _, r in results] == [("png", None), ("gif", None), (None, "unknown")]
+
+
+
+def test_detect_file_types_sizes_auto_pool_like_the_worker(tmp_path, monkeypatch):
+    import concurrent.futures
+
+    from plugins.extension_repair import worker
+
+    monkeypatch.setattr(worker, "default_thread_count", lambda: 3)
+    sizes = []
+    real_pool = concurrent.futures.ThreadPoolExecutor
+
+    def pool(max_workers=None, **kwargs):
+        sizes.append(max_workers)
+        return real_pool(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, "ThreadPoolExecutor", pool)
+    paths = [_write(tmp_path / "1", b"GIF89a")]
+
+    assert detect_file_types(paths) == detect_file_types(paths, workers=0) == [(paths[0], ("gif", None))]
+    detect_file_types(paths, workers=2)
+    assert sizes == [3, 3, 2]
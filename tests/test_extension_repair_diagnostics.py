@@ -0,0 +1,25 @@
+from plugins.extension_repair.diagnostics import generate_summary, init_stats
+
+
+class _ListLogger:
+    suppress_console = True
+
+    def __init__(self):
+        self.lines = []
+
+    def log(self, msg):
+        self.lines.append(msg)
+
+
+def test_forensic_summary_uses_cached_headers_without_reopening(tmp_path):
+    stats = init_stats()
+    missing = str(tmp_path / "gone.bin")
+    stats["unknown"].append((missing, b"RIFF\x00\x01\x02\x03", 40))
+
+    logger = _ListLogger()
+    generate_summary(stats, 3, logger)
+    text = "\n".join(logger.lines)
+
+    assert "RIFF-like unknowns: 1" in text
+    assert f"{missing}: 5249464600010203" in text
+    assert "<unreadable>" not in text
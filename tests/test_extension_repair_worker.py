@@ -0,0 +1,111 @@
+import os
+import queue
+
+from plugins.extension_repair.config import DEFAULTS
+from plugins.extension_repair.worker import ExtensionRepairWorker
+
+
+class _ListLogger:
+    def __init__(self):
+        self.lines = []
+
+    def log(self, msg):
+        self.lines.append(msg)
+
+
+def _run(settings):
+    logger = _ListLogger()
+    events = queue.Queue()
+    worker = ExtensionRepairWorker(settings=settings, logger=logger, queue=events)
+    worker.run()
+    return logger.lines, list(events.queue)
+
+
+def test_out_of_place_dry_run_mirrors_relative_layout(tmp_path):
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "sub" / "pic.jpg").write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8)
+    out = tmp_path / "out"
+
+    settings = dict(
+        DEFAULTS,
+        TARGET_DIRECTORY=str(src) + os.sep,
+        IN_PLACE=False,
+        OUTPUT_DIRECTORY=str(out),
+        DRY_RUN=True,
+    )
+    lines, events = _run(settings)
+
+    expected = f"DRY-RUN: {src / 'sub' / 'pic.jpg'} -> {out / 'sub' / 'pic.png'} (type: png)"
+    assert expected in lines
+    assert ("progress", 1.0, "Files processed: 1") in events
+    # Dry-run only reports the target; the output tree is left alone
+    assert not (out / "sub").exists()
+
+
+def test_progress_events_are_throttled(tmp_path, monkeypatch):
+    from plugins.extension_repair import worker
+
+    monkeypatch.setattr(worker, "PROGRESS_EVERY", 10)
+    monkeypatch.setattr(worker, "PROGRESS_INTERVAL", 3600)
+    monkeypatch.setattr(worker, "DEFAULT_CHUNK_SIZE", 7)
+    for i in range(50):
+        (tmp_path / f"{i}.bin").write_bytes(b"GIF89a" + b"\x00" * 8)
+
+    settings = dict(DEFAULTS, TARGET_DIRECTORY=str(tmp_path), REPORT_ONLY=True)
+    lines, events = _run(settings)
+
+    progress = [e for e in events if e[0] == "progress"]
+    assert [e[1] for e in progress] == [None] * 5 + [1.0]
+    assert progress[2][2].startswith("Files processed: 30 (")
+    assert sum(line.startswith("REPORT: ") for line in lines) == 50
+    assert events[-1] == ("done", events[-1][1])
+
+
+def test_per_file_errors_are_recorded_and_do_not_stop_the_run(tmp_path, monkeypatch):
+    from plugins.extension_repair import worker
+
+    def boom(_header):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(worker, "classify_header", boom)
+    for name in ("a.bin", "b.bin"):
+        (tmp_path / name).write_bytes(b"GIF89a" + b"\x00" * 8)
+
+    settings = dict(DEFAULTS, TARGET_DIRECTORY=str(tmp_path), REPORT_ONLY=True)
+    lines, events = _run(settings)
+
+    assert sum(line.startswith("ERROR processing") and line.endswith(": boom") for line in lines) == 2
+    assert len(events[-1][1]["other"]) == 2
+
+
+def test_detection_cache_skips_unchanged_files(tmp_path):
+    import json
+
+    src = tmp_path / "src"
+    src.mkdir()
+    pic = src / "pic.jpg"
+    pic.write_bytes(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8)
+    cache = tmp_path / "cache.json"
+    settings = dict(DEFAULTS, TARGET_DIRECTORY=str(src), REPORT_ONLY=True, CACHE_FILE=str(cache))
+
+    lines, _ = _run(settings)
+    assert f"REPORT: {pic} -> {src / 'pic.png'} (type: png)" in lines
+
+    # Plant a different type for the same (mtime, size): it must be reused
+    # without reading the header
+    data = json.loads(cache.read_text(encoding="utf-8"))
+    data["entries"][str(pic)][2] = "gif"
+    cache.write_text(json.dumps(data), encoding="utf-8")
+    for _ in range(2):
+        lines, _ = _run(settings)
+        assert f"REPORT: {pic} -> {src / 'pic.gif'} (type: gif)" in lines
+
+    # A changed file is detected again
+    st = pic.stat()
+    os.utime(pic, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    lines, _ = _run(settings)
+    assert f"REPORT: {pic} -> {src / 'pic.png'} (type: png)" in lines
+
+    lines, _ = _run(dict(settings, DETECTION_CACHE=False))
+    assert f"REPORT: {pic} -> {src / 'pic.png'} (type: png)" in lines
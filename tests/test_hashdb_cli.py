@@ -0,0 +1,724 @@
+import hashlib
+import os
+import sqlite3
+
+import pytest
+
+from plugins.hashdb.cli import build_parser
+
+
+def _main(argv):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+def _rows(db):
+    conn = sqlite3.connect(db)
+    try:
+        return dict(conn.execute("SELECT filepath, hash_sha256 FROM file_hashes").fetchall())
+    finally:
+        conn.close()
+
+
+def test_scan_upserts_every_file_across_batches(tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    files = {}
+    for i in range(7):
+        path = root / f"f{i}.bin"
+        path.write_bytes(b"x" * i)
+        files[str(path)] = hashlib.sha256(b"x" * i).hexdigest()
+    db = str(tmp_path / "h.sqlite")
+
+    _main(["scan", str(root), "--db", db, "--batch-size", "3", "--threads", "2"])
+    assert _rows(db) == files
+
+    # A full rescan updates rows in place instead of duplicating them
+    (root / "f0.bin").write_bytes(b"changed")
+    files[str(root / "f0.bin")] = hashlib.sha256(b"changed").hexdigest()
+    _main(["scan", str(root), "--db", db, "--full"])
+    assert _rows(db) == files
+
+
+def test_rescan_compares_mtime_ns_and_falls_back_for_old_rows(tmp_path):
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.scanner import build_work_list
+
+    root = tmp_path / "data"
+    root.mkdir()
+    for name in ("old", "new", "touched"):
+        (root / name).write_bytes(name.encode())
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db, "--hash", "md5"])
+
+    with open_db(db) as conn:
+        stamps = dict(conn.execute("SELECT filename, mtime_ns FROM file_hashes"))
+        assert stamps["new"] == os.stat(root / "new").st_mtime_ns
+        # A row from before the mtime_ns column: only modified_on to go by
+        conn.execute("UPDATE file_hashes SET mtime_ns = NULL WHERE filename = 'old'")
+        conn.commit()
+        st = os.stat(root / "touched")
+        os.utime(root / "touched", ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+
+        work = build_work_list(conn, "file_hashes", str(root), rescan_mode=True, db_get_record=None)
+    assert [meta["filename"] for meta in work] == ["touched"]
+
+
+def test_get_file_metadata_keeps_iso_timestamps(tmp_path):
+    import datetime
+
+    from plugins.hashdb.scanner import get_file_metadata
+
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"abc")
+    st = os.stat(path)
+
+    meta = get_file_metadata(path)
+
+    assert meta["modified_on"] == datetime.datetime.fromtimestamp(st.st_mtime).isoformat()
+    assert "created_on" in meta
+    assert meta["mtime_ns"] == st.st_mtime_ns
+
+
+def test_scan_skips_its_own_database_files(tmp_path, capsys):
+    (tmp_path / "a").write_bytes(b"a")
+    db = tmp_path / ".hashdb.sqlite"
+
+    _main(["scan", str(tmp_path)])
+    _main(["scan", str(tmp_path)])
+
+    conn = sqlite3.connect(str(db))
+    names = [name for (name,) in conn.execute("SELECT filename FROM file_hashes")]
+    conn.close()
+    assert names == ["a"]
+
+    capsys.readouterr()
+    _main(["verify", str(db)])
+    assert "OK=1 MISSING=0" in capsys.readouterr().out
+
+
+def test_open_db_fast_pragmas(tmp_path):
+    from plugins.hashdb.db import open_db
+
+    with open_db(str(tmp_path / "fast.sqlite")) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+    with open_db(str(tmp_path / "strict.sqlite"), fast=False) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+def test_tune_for_bulk_only_changes_the_connection(tmp_path):
+    from plugins.hashdb.db import open_db, tune_for_bulk
+
+    with open_db(str(tmp_path / "strict.sqlite"), fast=False) as conn:
+        tune_for_bulk(conn)
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -262144
+        assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "delete"
+
+
+@pytest.mark.parametrize(
+    "process_min, listings",
+    [(500, False), (1, False), (500, True)],
+    ids=["threads", "processes", "dir-listings"],
+)
+def test_verify_streams_rows_and_reports_problems(tmp_path, capsys, monkeypatch, process_min, listings):
+    from plugins.hashdb import cli
+
+    monkeypatch.setattr(cli, "VERIFY_BATCH", 2)
+    monkeypatch.setattr(cli, "VERIFY_PROCESS_MIN", process_min)
+    monkeypatch.setattr(cli, "_LISTING_STATS", listings)
+    root = tmp_path / "data"
+    (root / "sub").mkdir(parents=True)
+    for i in range(5):
+        (root / "sub" / f"f{i}.bin").write_bytes(b"y" * i)
+    (root / "other.bin").write_bytes(b"outside --dir")
+    (root / "sub2").mkdir()
+    (root / "sub2" / "x.bin").write_bytes(b"sibling with the same prefix")
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+
+    (root / "sub" / "f1.bin").write_bytes(b"tampered")
+    (root / "sub" / "f2.bin").unlink()
+    capsys.readouterr()
+
+    _main(["verify", db, "--dir", str(root / "sub"), "--threads", "2"])
+    out = capsys.readouterr().out
+
+    assert "Verifying 5 DB record(s)" in out
+    assert f"[MISMATCH] {root / 'sub' / 'f1.bin'}" in out
+    assert f"[MISSING] {root / 'sub' / 'f2.bin'}" in out
+    assert "OK=3 MISSING=1 NOHASH=0 MISMATCH=1 ERROR=0" in out
+
+
+def test_verify_dir_matches_unnormalised_stored_paths(tmp_path, capsys, monkeypatch):
+    from plugins.hashdb.db import open_db
+
+    root = tmp_path / "data"
+    (root / "sub").mkdir(parents=True)
+    (root / "sub" / "a.bin").write_bytes(b"a")
+    (root / "subway.bin").write_bytes(b"b")
+    db = str(tmp_path / "h.sqlite")
+    monkeypatch.chdir(tmp_path)
+    _main(["scan", "./data/./sub", "--db", db])
+    _main(["scan", str(root), "--db", db])
+    with open_db(db) as conn:
+        stored = {fp for (fp,) in conn.execute("SELECT filepath FROM file_hashes")}
+    assert os.path.join("data", "sub", "a.bin") in stored
+    capsys.readouterr()
+
+    _main(["verify", db, "--dir", str(root / "sub")])
+    out = capsys.readouterr().out
+
+    assert "Verifying 2 DB record(s)" in out
+    assert "OK=2 MISSING=0" in out
+
+
+def test_scan_sha1_and_schema_upgrade(tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    (root / "a.bin").write_bytes(b"abc")
+    db = str(tmp_path / "old.sqlite")
+
+    # A database created before the sha1/blake3 columns existed
+    conn = sqlite3.connect(db)
+    conn.execute(
+        "CREATE TABLE file_hashes (id INTEGER PRIMARY KEY AUTOINCREMENT, filepath TEXT NOT NULL UNIQUE,"
+        " filename TEXT NOT NULL, size_bytes INTEGER, hash_md5 TEXT, hash_sha256 TEXT, imported_on TEXT,"
+        " last_scanned_on TEXT, created_on TEXT, modified_on TEXT, flags TEXT)"
+    )
+    conn.commit()
+    conn.close()
+
+    _main(["scan", str(root), "--db", db, "--hash", "sha1"])
+
+    conn = sqlite3.connect(db)
+    row = conn.execute("SELECT hash_sha1, hash_sha256, hash_blake3 FROM file_hashes").fetchone()
+    conn.close()
+    assert row == (hashlib.sha1(b"abc").hexdigest(), None, None)
+
+
+def test_blake3_hash(tmp_path, capsys):
+    from plugins.hashdb.hasher import compute_hash
+
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"abc")
+    try:
+        import blake3
+    except ImportError:
+        _main(["scan", str(tmp_path), "--db", str(tmp_path / "h.sqlite"), "--hash", "blake3"])
+        assert "[ERROR] BLAKE3 hashing needs the optional 'blake3' package" in capsys.readouterr().out
+    else:
+        assert compute_hash(str(path), "blake3") == blake3.blake3(b"abc").hexdigest()
+
+
+def test_verify_quick_trusts_unchanged_stat(tmp_path, capsys):
+    import os
+
+    root = tmp_path / "data"
+    root.mkdir()
+    same = root / "same.bin"
+    same.write_bytes(b"original")
+    edited = root / "edited.bin"
+    edited.write_bytes(b"original")
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+
+    # Same size and mtime: --quick can't tell, a full verify can
+    st = same.stat()
+    same.write_bytes(b"ORIGINAL")
+    os.utime(same, ns=(st.st_atime_ns, st.st_mtime_ns))
+    edited.write_bytes(b"edited!")
+    capsys.readouterr()
+
+    _main(["verify", db, "--quick"])
+    out = capsys.readouterr().out
+    assert f"[MISMATCH] {edited}" in out
+    assert "OK=1 MISSING=0 NOHASH=0 MISMATCH=1" in out
+
+    _main(["verify", db])
+    assert "OK=0 MISSING=0 NOHASH=0 MISMATCH=2" in capsys.readouterr().out
+
+
+def test_choose_best_file_scores_each_candidate_once(tmp_path, monkeypatch):
+    from plugins.hashdb import deduper
+
+    calls = []
+    real_score = deduper.score_file
+    monkeypatch.setattr(deduper, "score_file", lambda p: calls.append(p) or real_score(p))
+
+    rows = [{"filepath": str(tmp_path / name)} for name in ("photo (1).jpg", "photo.jpg", "deep/photo.jpg")]
+    assert deduper.choose_best_file(rows)["filepath"] == str(tmp_path / "photo.jpg")
+    assert sorted(calls) == sorted(r["filepath"] for r in rows)
+
+
+def test_find_duplicates_groups_only_duplicated_hashes(tmp_path):
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.deduper import find_duplicates
+
+    root = tmp_path / "data"
+    root.mkdir()
+    for name, data in [("a1", b"A"), ("b1", b"B"), ("a2", b"A"), ("c1", b"C"), ("b2", b"B"), ("a3", b"A")]:
+        (root / name).write_bytes(data)
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db, "--hash", "md5", "--threads", "1"])
+
+    with open_db(db) as conn:
+        groups = dict(find_duplicates(conn, "file_hashes", "md5"))
+
+    names = {h: sorted(r["filename"] for r in rows) for h, rows in groups.items()}
+    assert names == {
+        hashlib.md5(b"A").hexdigest(): ["a1", "a2", "a3"],
+        hashlib.md5(b"B").hexdigest(): ["b1", "b2"],
+    }
+
+
+def test_dedupe_quarantines_all_but_one_per_set(tmp_path):
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.deduper import count_duplicate_sets, dedupe
+
+    root = tmp_path / "data"
+    (root / "deep").mkdir(parents=True)
+    (root / "keep.txt").write_bytes(b"same")
+    (root / "deep" / "copy.txt").write_bytes(b"same")
+    (root / "unique.txt").write_bytes(b"other")
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+
+    quarantine = tmp_path / "q"
+    with open_db(db) as conn:
+        assert count_duplicate_sets(conn, "file_hashes", "sha256") == 1
+        sets, actions = dedupe(conn, "file_hashes", "sha256", quarantine_dir=str(quarantine))
+
+    assert sets == 1
+    assert [path for path, _ in actions] == [str(root / "deep" / "copy.txt")]
+    assert (root / "keep.txt").exists() and (quarantine / "copy.txt").exists()
+
+
+def test_scan_defer_index_rebuilds_covering_indexes(tmp_path):
+    root = tmp_path / "data"
+    root.mkdir()
+    (root / "a.bin").write_bytes(b"a")
+    db = str(tmp_path / "h.sqlite")
+
+    _main(["scan", str(root), "--db", db, "--defer-index"])
+
+    conn = sqlite3.connect(db)
+    indexes = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    conn.close()
+    assert {"idx_file_hashes_hash_md5_path", "idx_file_hashes_hash_sha256_path"} <= indexes
+    assert "idx_file_hashes_hash_sha256" not in indexes
+    assert len(_rows(db)) == 1
+
+
+def test_upsert_file_record_keeps_imported_on(tmp_path):
+    import pytest
+    from plugins.hashdb.db import ensure_schema, open_db, upsert_file_record, upsert_sql
+
+    with open_db(str(tmp_path / "h.sqlite")) as conn:
+        ensure_schema(conn)
+        upsert_file_record(conn, "file_hashes", {"filepath": "/a", "filename": "a", "imported_on": "first"})
+        upsert_file_record(conn, "file_hashes", {"filepath": "/a", "filename": "b", "imported_on": "second"})
+        row = conn.execute("SELECT filename, imported_on FROM file_hashes").fetchone()
+
+    assert tuple(row) == ("b", "first")
+    with pytest.raises(ValueError):
+        upsert_sql("file_hashes; DROP TABLE file_hashes")
+
+
+def test_parallel_dedupe_never_reuses_a_quarantine_name(tmp_path, monkeypatch):
+    from plugins.hashdb import deduper
+    from plugins.hashdb.db import open_db
+
+    monkeypatch.setattr(deduper, "DEDUPE_BATCH", 3)
+    root = tmp_path / "data"
+    # 20 sets of 3 copies, all named "same.bin", so every move collides
+    for s in range(20):
+        for c in range(3):
+            d = root / f"s{s}" / ("x" * c)
+            d.mkdir(parents=True, exist_ok=True)
+            (d / "same.bin").write_bytes(b"set %d" % s)
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+
+    quarantine = tmp_path / "q"
+    with open_db(db) as conn:
+        sets, actions = deduper.dedupe(conn, "file_hashes", "sha256", quarantine_dir=str(quarantine), threads=8)
+
+    assert sets == 20
+    assert len(actions) == 40 and all(a.startswith("moved to ") for _, a in actions)
+    assert len(list(quarantine.iterdir())) == 40
+
+
+def test_safe_move_releases_its_name_when_the_move_fails(tmp_path):
+    from plugins.hashdb.deduper import safe_move
+
+    quarantine = tmp_path / "q"
+    (tmp_path / "a.txt").write_text("a")
+    with pytest.raises(OSError):
+        safe_move(str(tmp_path / "missing.txt"), str(quarantine))
+    assert list(quarantine.iterdir()) == []
+
+    assert safe_move(str(tmp_path / "a.txt"), str(quarantine)) == str(quarantine / "a.txt")
+    assert (quarantine / "a.txt").read_text() == "a"
+
+
+def test_rows_are_tuples_unless_asked_for_names(tmp_path):
+    from plugins.hashdb.db import get_record_by_path, open_db
+    from plugins.hashdb.exporter import export_full_records
+
+    root = tmp_path / "data"
+    root.mkdir()
+    (root / "a.bin").write_bytes(b"a")
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+
+    with open_db(db) as conn:
+        assert type(conn.execute("SELECT filepath FROM file_hashes").fetchone()) is tuple
+        assert get_record_by_path(conn, "file_hashes", str(root / "a.bin"))["filename"] == "a.bin"
+        export_full_records(conn, "file_hashes", str(tmp_path / "full.tsv"))
+    with open_db(db, rows_as_dict=True) as conn:
+        assert conn.execute("SELECT filename FROM file_hashes").fetchone()["filename"] == "a.bin"
+
+    header, line = (tmp_path / "full.tsv").read_text(encoding="utf-8").splitlines()
+    assert dict(zip(header.split("\t"), line.split("\t")))["filename"] == "a.bin"
+
+
+def test_duplicate_groups_for_export_and_report(tmp_path):
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.exporter import fetch_duplicate_hashes
+    from plugins.hashdb.reporter import count_duplicates, fetch_duplicate_groups
+
+    root = tmp_path / "data"
+    root.mkdir()
+    for name, data in [("a1", b"A"), ("b1", b"B"), ("a2", b"A")]:
+        (root / name).write_bytes(data)
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db, "--hash", "md5"])
+
+    with open_db(db) as conn:
+        for fetch in (fetch_duplicate_hashes, fetch_duplicate_groups):
+            groups = fetch(conn, "file_hashes", "md5")
+            assert {h: sorted(fps) for h, fps in groups.items()} == {
+                hashlib.md5(b"A").hexdigest(): [str(root / "a1"), str(root / "a2")]
+            }
+        assert count_duplicates(conn, "file_hashes", "md5") == 1
+
+
+def test_verify_counts_records_without_the_hash_in_sql(tmp_path, capsys, monkeypatch):
+    from plugins.hashdb import cli
+
+    root = tmp_path / "data"
+    root.mkdir()
+    for name in ("a.bin", "b.bin"):
+        (root / name).write_bytes(name.encode())
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db, "--hash", "md5"])
+    (root / "b.bin").unlink()
+
+    verified = []
+    real_verify_one = cli._verify_one
+    monkeypatch.setattr(cli, "_verify_one", lambda *a, **kw: verified.append(a[0]) or real_verify_one(*a, **kw))
+    capsys.readouterr()
+
+    _main(["verify", db, "--hash", "sha1"])
+    out = capsys.readouterr().out
+
+    assert verified == []
+    assert "Skipping 2 record(s) with no SHA1 hash" in out
+    assert "OK=0 MISSING=0 NOHASH=2 MISMATCH=0 ERROR=0" in out
+
+
+def test_compute_hash_mmap_path_matches_chunked(tmp_path, monkeypatch):
+    from plugins.hashdb import hasher
+
+    path = tmp_path / "big.bin"
+    data = bytes(range(256)) * 1000
+    path.write_bytes(data)
+
+    monkeypatch.setattr(hasher, "HASH_MMAP_MIN", 1)
+    for hash_type in ("md5", "sha1", "sha256"):
+        assert hasher.compute_hash(str(path), hash_type) == hashlib.new(hash_type, data).hexdigest()
+
+
+def test_compute_hash_chunked_fallback(tmp_path, monkeypatch):
+    from plugins.hashdb import hasher
+
+    path = tmp_path / "big.bin"
+    data = bytes(range(256)) * 1000
+    path.write_bytes(data)
+
+    def no_mmap(*args, **kwargs):
+        raise OSError("not mappable")
+
+    monkeypatch.setattr(hasher, "HASH_MMAP_MIN", 1)
+    monkeypatch.setattr(hasher.mmap, "mmap", no_mmap)
+    assert hasher.compute_hash(str(path), "sha256", chunk_size=1000) == hashlib.sha256(data).hexdigest()
+
+
+def test_run_hashing_process_pool_keeps_order_and_batches(tmp_path, monkeypatch):
+    from plugins.hashdb import hasher
+    from plugins.hashdb.scanner import get_file_metadata
+
+    monkeypatch.setattr(hasher, "PROCESS_HASH_MIN_BYTES", 0)
+    work = []
+    for i in range(7):
+        path = tmp_path / f"f{i}.bin"
+        path.write_bytes(b"x" * i)
+        work.append(get_file_metadata(path))
+    work.append(dict(work[0], filepath=str(tmp_path / "gone.bin")))
+
+    batches = []
+    results = hasher.run_hashing(work, "md5", threads=2, batch_callback=batches.append, batch_size=3)
+
+    assert [r["filename"] for r in results] == [f"f{i}.bin" for i in range(7)]
+    assert [r["hash_md5"] for r in results] == [hashlib.md5(b"x" * i).hexdigest() for i in range(7)]
+    assert [len(b) for b in batches] == [3, 3, 1]
+
+
+def test_run_hashing_stamps_each_batch_once(tmp_path, monkeypatch):
+    import datetime
+
+    from plugins.hashdb import hasher
+    from plugins.hashdb.scanner import get_file_metadata
+
+    stamps = iter(range(100))
+
+    class _Clock(datetime.datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime.datetime(2000, 1, 1, second=next(stamps))
+
+    monkeypatch.setattr(hasher.datetime, "datetime", _Clock)
+    work = []
+    for i in range(7):
+        path = tmp_path / f"f{i}.bin"
+        path.write_bytes(b"x" * i)
+        work.append(get_file_metadata(path))
+
+    results = hasher.run_hashing(work, "md5", threads=2, batch_size=3)
+
+    assert [r["imported_on"][-2:] for r in results] == ["00"] * 3 + ["01"] * 3 + ["02"]
+    assert all(r["last_scanned_on"] == r["imported_on"] for r in results)
+
+
+@pytest.mark.parametrize("threads", [1, 2])
+def test_export_streams_hashes_and_duplicate_sets(tmp_path, threads):
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.exporter import export_duplicates, export_hashes, export_hashes_chunked
+
+    root = tmp_path / "data"
+    root.mkdir()
+    for i in range(5):
+        (root / f"f{i}.bin").write_bytes(b"%d" % (i % 3))
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db, "--hash", "md5"])
+    expected = sorted(hashlib.md5(b"%d" % (i % 3)).hexdigest() for i in range(5))
+
+    out = tmp_path / "out"
+    with open_db(db) as conn:
+        export_hashes(conn, "file_hashes", "md5", str(tmp_path / "all.txt"))
+        export_hashes_chunked(conn, "file_hashes", "md5", str(out), chunk_size=2, threads=threads)
+        export_duplicates(conn, "file_hashes", "md5", str(tmp_path / "dupes.txt"))
+
+    assert sorted((tmp_path / "all.txt").read_text().split()) == expected
+    chunks = [(out / f"md5_chunk_{i}.txt").read_text().split() for i in (1, 2, 3)]
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert sorted(sum(chunks, [])) == expected
+
+    blocks = (tmp_path / "dupes.txt").read_text().strip().split("\n\n")
+    assert sorted(block.split("\n")[0] for block in blocks) == sorted(
+        hashlib.md5(d).hexdigest() for d in (b"0", b"1")
+    )
+
+
+@pytest.mark.parametrize("listings", [False, True], ids=["stat", "dir-listings"])
+def test_cleanup_removes_missing_rows_and_flags_zero_byte_files(tmp_path, capsys, monkeypatch, listings):
+    from plugins.hashdb import maintenance
+
+    monkeypatch.setattr(maintenance, "_LISTING_STATS", listings)
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "data"
+    root.mkdir()
+    (root / "gone").mkdir()
+    for name, data in [("keep.bin", b"k"), ("gone1.bin", b"1"), ("gone/2.bin", b"2"), ("empty.bin", b"")]:
+        (root / name).write_bytes(data)
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+    (root / "gone1.bin").unlink()
+    (root / "gone" / "2.bin").unlink()
+    (root / "gone").rmdir()
+    capsys.readouterr()
+
+    _main(["cleanup", db, "--threads", "2"])
+    out = capsys.readouterr().out
+
+    assert "Missing removed: 2" in out
+    assert "Zero-byte found: 1" in out
+    assert sorted(os.path.basename(fp) for fp in _rows(db)) == ["empty.bin", "keep.bin"]
+    assert (root / "empty.bin").exists()
+
+
+@pytest.mark.parametrize("root, cwd", [("./data/", ""), (".", "data")])
+def test_scan_stores_the_same_paths_as_before_for_relative_roots(tmp_path, monkeypatch, root, cwd):
+    from pathlib import Path
+
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.scanner import build_work_list
+
+    (tmp_path / "data" / "sub").mkdir(parents=True)
+    (tmp_path / "data" / "a.bin").write_bytes(b"a")
+    (tmp_path / "data" / "sub" / "b.bin").write_bytes(b"")
+    (tmp_path / "data" / "link").symlink_to(tmp_path / "data" / "sub")
+    monkeypatch.chdir(tmp_path / cwd)
+
+    with open_db(str(tmp_path / "h.sqlite")) as conn:
+        work = build_work_list(conn, "missing_table", root, rescan_mode=True, db_get_record=None)
+
+    # The baseline stored Path(dirpath) / name
+    assert sorted(m["filepath"] for m in work) == sorted(
+        str(Path(root) / p) for p in ("a.bin", "sub/b.bin")
+    )
+    assert {m["filename"]: m["size_bytes"] for m in work} == {"a.bin": 1, "b.bin": 0}
+
+
+def test_find_parallel_helpers_share_the_single_stat_pass(tmp_path):
+    from plugins.hashdb.maintenance import find_missing_files_parallel, find_zero_byte_files_parallel
+
+    (tmp_path / "full").write_bytes(b"x")
+    (tmp_path / "empty").write_bytes(b"")
+    paths = [str(tmp_path / name) for name in ("full", "empty", "gone")]
+
+    for threads in (1, 4):
+        assert find_missing_files_parallel(paths, threads) == [paths[2]]
+        assert find_zero_byte_files_parallel(paths, threads) == [paths[1]]
+
+
+def test_cleanup_log_marks_the_zero_byte_files_actually_deleted(tmp_path, monkeypatch):
+    from plugins.hashdb import maintenance
+    from plugins.hashdb.db import open_db
+
+    monkeypatch.chdir(tmp_path)
+    root = tmp_path / "data"
+    root.mkdir()
+    for name in ("e1", "e2", "e3"):
+        (root / name).write_bytes(b"")
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db])
+
+    # e1 can't be removed, so the deleted files are not a prefix of the list
+    real_remove = os.remove
+
+    def remove(path):
+        if path.endswith("e1"):
+            raise PermissionError(path)
+        real_remove(path)
+
+    monkeypatch.setattr(maintenance.os, "remove", remove)
+    with open_db(db) as conn:
+        _, zero, deleted, log_path = maintenance.run_cleanup(conn, db, "file_hashes", delete_zero_bytes=True, threads=2)
+
+    assert (zero, deleted) == (3, 2)
+    log = open(log_path, encoding="utf-8").read()
+    assert f"{root / 'e1'} [FLAGGED]" in log
+    assert f"{root / 'e2'} [DELETED]" in log and f"{root / 'e3'} [DELETED]" in log
+
+
+def test_write_lines_across_slabs(tmp_path, monkeypatch):
+    from plugins.hashdb import exporter
+
+    monkeypatch.setattr(exporter, "WRITE_SLAB_LINES", 3)
+    path = tmp_path / "out.txt"
+
+    assert exporter.write_lines(str(path), (f"line {i}" for i in range(7))) == 7
+    assert path.read_text(encoding="utf-8") == "".join(f"line {i}\n" for i in range(7))
+    assert exporter.write_lines(str(path), []) == 0
+    assert path.read_text(encoding="utf-8") == ""
+
+
+def test_duplicate_report_streams_largest_sets_first(tmp_path):
+    from plugins.hashdb.db import open_db
+    from plugins.hashdb.reporter import write_duplicate_report
+
+    root = tmp_path / "data"
+    root.mkdir()
+    for name, data in [("a1", b"A"), ("b1", b"B"), ("b2", b"B"), ("a2", b"A"), ("b3", b"B"), ("c", b"C")]:
+        (root / name).write_bytes(data)
+    db = str(tmp_path / "h.sqlite")
+    _main(["scan", str(root), "--db", db, "--hash", "md5"])
+
+    out = tmp_path / "report.txt"
+    with open_db(db) as conn:
+        assert write_duplicate_report(conn, "file_hashes", "md5", str(out), max_samples=2) == 2
+
+    blocks = out.read_text(encoding="utf-8").split("\n\n")[1:3]
+    assert blocks[0].splitlines()[:2] == [f"Hash: {hashlib.md5(b'B').hexdigest()}", "File Count: 3"]
+    assert len(blocks[0].splitlines()) == 5 and blocks[0].endswith("... (1 more files)")
+    assert blocks[1].splitlines()[:2] == [f"Hash: {hashlib.md5(b'A').hexdigest()}", "File Count: 2"]
+    assert len(blocks[1].splitlines()) == 4
+
+
+def test_cleanup_vacuums_incrementally_and_converts_old_databases(tmp_path, monkeypatch):
+    from plugins.hashdb.db import open_db, vacuum
+
+    monkeypatch.chdir(tmp_path)
+    db = str(tmp_path / "h.sqlite")
+    with open_db(db) as conn:
+        conn.execute("CREATE TABLE blob (x)")
+        conn.executemany("INSERT INTO blob VALUES (?)", [("x" * 1000,)] * 500)
+        conn.commit()
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.execute("DELETE FROM blob")
+        conn.commit()
+        vacuum(conn)
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+
+    old = str(tmp_path / "old.sqlite")
+    conn = sqlite3.connect(old)
+    conn.execute("CREATE TABLE blob (x)")
+    conn.commit()
+    conn.close()
+    (tmp_path / "empty").mkdir()
+    _main(["scan", str(tmp_path / "empty"), "--db", old])
+    with open_db(old) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0
+    _main(["cleanup", old, "--vacuum"])
+    with open_db(old) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+
+def test_schema_uses_partial_hash_indexes_and_no_duplicate_filepath_index(tmp_path):
+    from plugins.hashdb.db import ensure_schema, open_db
+
+    db = str(tmp_path / "h.sqlite")
+    with open_db(db) as conn:
+        ensure_schema(conn)
+        # What older versions left behind
+        conn.execute("DROP INDEX idx_file_hashes_hash_md5_path")
+        conn.execute("CREATE INDEX idx_file_hashes_hash_md5_path ON file_hashes(hash_md5, filepath)")
+        conn.execute("CREATE INDEX idx_file_hashes_filepath ON file_hashes(filepath)")
+        conn.commit()
+
+        ensure_schema(conn)
+        indexes = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL"))
+
+    assert "idx_file_hashes_filepath" not in indexes
+    assert indexes["idx_file_hashes_hash_md5_path"].endswith("WHERE hash_md5 IS NOT NULL")
+    assert indexes["idx_file_hashes_hash_sha256_path"].endswith("WHERE hash_sha256 IS NOT NULL")
+
+
+def test_interactive_cli_dispatches_subcommands_directly(monkeypatch, capsys):
+    from plugins.hashdb import cli, tool
+
+    seen = []
+    monkeypatch.setattr(cli, "cmd_scan", lambda args: seen.append(("scan", args.directory, args.hash)))
+    monkeypatch.setattr(cli, "cmd_verify", lambda args: seen.append(("verify", args.database, args.cmd)))
+    lines = iter(['scan "/my photos" --hash md5', r"verify C:\db\h.sqlite", "scan --hash nope", "bogus", "exit"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(lines))
+
+    tool.run_cli_interactive()
+
+    assert seen == [("scan", "/my photos", "md5"), ("verify", r"C:\db\h.sqlite", "verify")]
+    err = capsys.readouterr().err
+    assert "invalid choice: 'nope'" in err and "invalid choice: 'bogus'" in err
@@ -0,0 +1,127 @@
+import json
+
+from shared.logger import BufferedLogger, QueueLogger
+
+
+def test_log_bulk_writes_every_line_and_notifies(tmp_path):
+    seen = []
+    logger = BufferedLogger(str(tmp_path / "run.log"), on_line=seen.append)
+
+    logger.log_bulk(["first", "second"])
+    logger.flush()
+
+    lines = (tmp_path / "run.log").read_text(encoding="utf-8").splitlines()
+    assert [line.split("] ", 1)[1] for line in lines if line] == ["first", "second"]
+    assert len(seen) == 2
+
+
+def test_log_bulk_jsonl_matches_log(tmp_path):
+    logger = BufferedLogger(str(tmp_path / "run.jsonl"), log_format="jsonl")
+
+    logger.log("single")
+    logger.log_bulk(["a", "b"])
+    logger.flush()
+
+    records = [json.loads(line) for line in (tmp_path / "run.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [r["msg"] for r in records] == ["single", "a", "b"]
+
+
+def test_queue_logger_preserves_order_and_drains_on_close(tmp_path):
+    target = BufferedLogger(str(tmp_path / "run.log"))
+    logger = QueueLogger(target, batch_limit=7)
+
+    for i in range(100):
+        logger.log(f"line {i}")
+    logger.log_bulk(["tail a", "tail b"])
+    logger.close()
+    target.flush()
+
+    lines = (tmp_path / "run.log").read_text(encoding="utf-8").splitlines()
+    msgs = [line.split("] ", 1)[1] for line in lines if line]
+    assert msgs == [f"line {i}" for i in range(100)] + ["tail a", "tail b"]
+
+
+def test_log_formats_args_lazily(tmp_path):
+    target = BufferedLogger(str(tmp_path / "run.log"))
+    logger = QueueLogger(target)
+
+    logger.log("RENAME: %s -> %s", "a.png", "a.jpg")
+    logger.log("100% literal")
+    target.log("direct %d", 3)
+    logger.close()
+    target.flush()
+
+    lines = (tmp_path / "run.log").read_text(encoding="utf-8").splitlines()
+    msgs = [line.split("] ", 1)[1] for line in lines if line]
+    assert sorted(msgs) == ["100% literal", "RENAME: a.png -> a.jpg", "direct 3"]
+
+
+def test_timestamp_is_rendered_once_per_second(tmp_path, monkeypatch):
+    import shared.logger as logger_module
+
+    clock = iter([1000.1, 1000.9, 1001.2])
+    monkeypatch.setattr(logger_module.time, "time", lambda: next(clock))
+    calls = []
+    real_fromtimestamp = logger_module.datetime.fromtimestamp
+
+    class _Datetime(logger_module.datetime):
+        @classmethod
+        def fromtimestamp(cls, t, tz=None):
+            calls.append(t)
+            return real_fromtimestamp(t)
+
+    monkeypatch.setattr(logger_module, "datetime", _Datetime)
+    logger = BufferedLogger(str(tmp_path / "run.log"))
+
+    logger.log("a")
+    logger.log_bulk(["b"])
+    logger.log("c")
+    logger.flush()
+
+    assert calls == [1000, 1001]
+    lines = [line for line in (tmp_path / "run.log").read_text(encoding="utf-8").splitlines() if line]
+    assert lines[0][:21] == lines[1][:21] != lines[2][:21]
+
+
+def test_flush_appends_utf8_to_existing_log(tmp_path):
+    path = tmp_path / "undo.log"
+    path.write_bytes(b"previous run\n")
+    logger = BufferedLogger(str(path), buffer_limit=2)
+
+    logger.log("café → restored")
+    logger.log("second")
+    logger.log("third")
+    logger.flush()
+
+    lines = path.read_bytes().decode("utf-8").splitlines()
+    assert lines[:2] == ["previous run", ""]
+    assert [line.split("] ", 1)[1] for line in lines[2:]] == ["café → restored", "second", "third"]
+
+
+def test_queue_logger_survives_bad_args_and_failing_target(tmp_path, capsys):
+    target = BufferedLogger(str(tmp_path / "run.log"))
+    logger = QueueLogger(target)
+
+    logger.log("needs two: %s %s", "only one")
+    logger.close()
+    target.flush()
+
+    lines = (tmp_path / "run.log").read_text(encoding="utf-8").splitlines()
+    assert [line.split("] ", 1)[1] for line in lines if line] == ["needs two: %s %s ('only one',)"]
+
+    class _Broken:
+        suppress_console = True
+
+        def log_bulk(self, messages):
+            if "boom" in messages:
+                raise OSError("disk full")
+            seen.extend(messages)
+
+    seen = []
+    logger = QueueLogger(_Broken(), batch_limit=1)
+    for msg in ("before", "boom", "after"):
+        logger.log(msg)
+    logger.close()
+
+    assert seen == ["before", "after"]
+    assert "dropped 1 log lines" in capsys.readouterr().err
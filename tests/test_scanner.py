@@ -0,0 +1,24 @@
+from shared.scanner import iter_file_entries, iter_files
+
+
+def test_iter_file_entries_matches_iter_files(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "c").mkdir()
+    for rel in ("top.txt", "a/one.bin", "a/b/two.bin", "c/three.bin"):
+        (tmp_path / rel).write_bytes(b"x" * len(rel))
+
+    entries = list(iter_file_entries(tmp_path))
+
+    assert [e.path for e in entries] == list(iter_files(tmp_path, as_path=False))
+    assert {e.name: e.stat().st_size for e in entries}["two.bin"] == len("a/b/two.bin")
+
+
+def test_iter_file_entries_skip_dirs(tmp_path):
+    (tmp_path / "keep").mkdir()
+    (tmp_path / "out" / "deep").mkdir(parents=True)
+    (tmp_path / "keep" / "a.bin").write_bytes(b"a")
+    (tmp_path / "out" / "deep" / "b.bin").write_bytes(b"b")
+
+    names = [e.name for e in iter_file_entries(tmp_path, skip_dirs=[tmp_path / "out"])]
+
+    assert names == ["a.bin"]
@@ -0,0 +1,32 @@
+import os
+
+from plugins.undo_transfer import log_parser
+
+
+def test_log_entries_cached_until_log_or_targets_change(tmp_path, monkeypatch):
+    log = tmp_path / "transfer.log"
+    log.write_text("C:/orig/target/sub/a.jpg | MD5: " + "a" * 32 + "\n", encoding="utf-8")
+    cache_dir = str(tmp_path / "cfg")
+    parses = []
+    real_parse = log_parser._load_log_entries
+    monkeypatch.setattr(log_parser, "_load_log_entries", lambda *a: parses.append(a) or real_parse(*a))
+
+    # A real run doesn't store, so the following dry run parses too
+    entries, hit = log_parser.load_log_entries_cached(str(log), ["target"], "C:/orig", cache_dir, store=False)
+    assert not hit
+    again, hit = log_parser.load_log_entries_cached(str(log), ["TARGET"], "C:/orig", cache_dir)
+    assert (again, hit) == (entries, False)
+    again, hit = log_parser.load_log_entries_cached(str(log), ["Target"], "C:/orig", cache_dir, store=False)
+    assert (again, hit) == (entries, True)
+    assert again[0][2].parts == ("target", "sub", "a.jpg")
+    assert len(parses) == 2
+
+    # Editing the log invalidates the parse, and only the newest is kept
+    log.write_text(log.read_text(encoding="utf-8") + "C:/orig/target/b.jpg | MD5: " + "b" * 32 + "\n", encoding="utf-8")
+    os.utime(log, ns=(1, 1))
+    changed, hit = log_parser.load_log_entries_cached(str(log), ["target"], "C:/orig", cache_dir)
+    assert not hit and len(changed) == 2
+    assert len(os.listdir(cache_dir)) == 1
+
+    assert log_parser.clear_log_cache(cache_dir) == 1
+    assert log_parser.load_log_entries_cached(str(log), ["target"], "C:/orig", None) == (changed, False)
@@ -0,0 +1,74 @@
+import hashlib
+import os
+import sys
+
+import pytest
+
+from plugins.undo_transfer import md5_cache
+
+
+def test_compute_hash_whole_file_mapped_and_chunked(tmp_path, monkeypatch):
+    path = tmp_path / "data.bin"
+    data = bytes(range(256)) * 1000
+    path.write_bytes(data)
+
+    assert md5_cache.compute_md5(str(path)) == hashlib.md5(data).hexdigest()
+    assert md5_cache.compute_sha256(str(path)) == hashlib.sha256(data).hexdigest()
+    assert md5_cache.compute_hash(str(tmp_path / "missing")) is None
+
+    monkeypatch.setattr(md5_cache, "HASH_MMAP_MIN", 1)
+    assert md5_cache.compute_hash(str(path), "sha256") == hashlib.sha256(data).hexdigest()
+
+    def no_mmap(*args, **kwargs):
+        raise OSError("not mappable")
+
+    monkeypatch.setattr(md5_cache.mmap, "mmap", no_mmap)
+    assert md5_cache.compute_hash(str(path), chunk_size=1000) == hashlib.md5(data).hexdigest()
+
+
+def test_index_hashes_sha256_in_processes_and_caches(tmp_path, monkeypatch):
+    monkeypatch.setattr(md5_cache, "PROCESS_HASH_MIN_FILES", 1)
+    root = tmp_path / "temp"
+    root.mkdir()
+    for name, data in [("a", b"A"), ("b", b"B"), ("a2", b"A")]:
+        (root / name).write_bytes(data)
+    cache_path = str(tmp_path / "cache.json")
+
+    index, cache = md5_cache.index_temp_directory_with_cache(str(root), cache_path, 2, hash_type="sha256")
+
+    # Raw digest keys; a bare path until a second file shares the hash
+    a, a2 = (str(root / name) for name in ("a", "a2"))
+    assert index[hashlib.sha256(b"B").digest()] == str(root / "b")
+    assert sorted(index[hashlib.sha256(b"A").digest()]) == [
+        (a, "a", os.stat(a).st_mtime),
+        (a2, "a2", os.stat(a2).st_mtime),
+    ]
+
+    # A second run indexes the same way from cache hits alone
+    again, _ = md5_cache.index_temp_directory_with_cache(str(root), cache_path, 2, hash_type="sha256")
+    assert {h: sorted(v) if isinstance(v, list) else v for h, v in again.items()} == {
+        h: sorted(v) if isinstance(v, list) else v for h, v in index.items()
+    }
+    assert cache[str(root / "b")]["sha256"] == hashlib.sha256(b"B").hexdigest()
+    assert md5_cache.load_cache(cache_path) == cache
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_cache_replays_journal_until_saved(tmp_path, monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setitem(sys.modules, "orjson", None)
+    cache_path = str(tmp_path / "cache.json")
+    md5_cache.save_cache(cache_path, {"/a": {"md5": "1", "size": 1, "mtime": 1.5}})
+
+    # An interrupted run: two journaled entries, the last one torn
+    with open(md5_cache.journal_path(cache_path), "w", encoding="utf-8") as f:
+        f.write('["/b", {"md5": "2", "size": 2, "mtime": 2.0}]\n["/c", {"md5"')
+
+    cache = md5_cache.load_cache(cache_path)
+    assert cache == {"/a": {"md5": "1", "size": 1, "mtime": 1.5}, "/b": {"md5": "2", "size": 2, "mtime": 2.0}}
+
+    md5_cache.save_cache(cache_path, cache)
+    assert not os.path.exists(md5_cache.journal_path(cache_path))
+    assert md5_cache.load_cache(cache_path) == cache
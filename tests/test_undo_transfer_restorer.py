@@ -0,0 +1,52 @@
+import hashlib
+import queue
+
+import pytest
+
+from plugins.undo_transfer.restorer import UndoWorker
+
+
+@pytest.mark.parametrize("threads", [1, 4])
+def test_restore_picks_each_temp_file_once(tmp_path, threads):
+    temp = tmp_path / "temp"
+    temp.mkdir()
+    files = {"u.jpg": b"unique", "dup1": b"same", "dup2": b"same"}
+    for name, data in files.items():
+        (temp / name).write_bytes(data)
+
+    log = tmp_path / "transfer.log"
+    log.write_text(
+        "".join(
+            f"C:/orig/target/{name} | MD5: {hashlib.md5(data).hexdigest().upper()}\n"
+            for name, data in [("u.jpg", b"unique"), ("dup2", b"same"), ("other.bin", b"same"), ("gone", b"x")]
+        ),
+        encoding="utf-8",
+    )
+    restore = tmp_path / "restore"
+    settings = {
+        "LOG_FILE": str(log),
+        "TEMP_DIRECTORY": str(temp),
+        "TARGET_SUBFOLDERS": ["target"],
+        "UNDO_LOG": str(tmp_path / "undo.log"),
+        "ORIGINAL_ROOT": "C:/orig",
+        "RESTORE_ROOT": str(restore),
+        "CACHE_FILE": str(tmp_path / "cache.json"),
+        "THREAD_COUNT": threads,
+        "HASH_TYPE": "md5",
+        "DRY_RUN": False,
+    }
+
+    progress = queue.Queue()
+    UndoWorker(settings, progress).run()
+
+    restored = {p.name: p.read_bytes() for p in (restore / "target").iterdir()}
+    assert restored == {"u.jpg": b"unique", "dup2": b"same", "other.bin": b"same"}
+    assert list(temp.iterdir()) == []
+    assert "Missing: No file with MD5" in (tmp_path / "undo.log").read_text(encoding="utf-8")
+
+    # Progress is throttled, but the last update of each phase always comes
+    messages = [progress.get_nowait() for _ in range(progress.qsize())]
+    last = {kind: payload for kind, payload in messages if kind.endswith("_progress")}
+    assert last["index_progress"][0] == 1.0
+    assert last["restore_progress"] == (1.0, "Restoring 4 / 4")
+    assert messages[-1] == ("done", None)
@@ -11,6 +11,7 @@ import sys
 import os
 import argparse
 import importlib
+import importlib.util
 from pathlib import Path
 
 # Shared tool parsing utilities
@@ -35,23 +36,24 @@ except ImportError:
 # Combined TUI availability: prefer textui, fallback to curses
 TUI_AVAILABLE = TEXTUI_AVAILABLE or TUI_CURSES_AVAILABLE
 
-# Browser-based GUI launcher (no tkinter dependency)
-try:
-    import toolbox.webui
-    WEBUI_AVAILABLE = True
-except ImportError:
-    WEBUI_AVAILABLE = False
-
-# Desktop wrapper (Electron-like) around webui
-try:
-    import toolbox.desktopui
-    DESKTOPUI_AVAILABLE = True
-except ImportError:
-    DESKTOPUI_AVAILABLE = False
+# Browser-based GUI launcher (no tkinter dependency) and the desktop
+# wrapper (Electron-like) around it. Both are stdlib-only, so they are only
+# located here and imported when a GUI is actually opened: the HTTP server
+# stack is a large share of startup for CLI and --help runs.
+WEBUI_AVAILABLE = importlib.util.find_spec("toolbox.webui") is not None
+DESKTOPUI_AVAILABLE = importlib.util.find_spec("toolbox.desktopui") is not None
 
 TOOLS = {}
 
 
+def _importable(module_name: str) -> bool:
+    try:
+        importlib.import_module(module_name)
+    except ImportError:
+        return False
+    return True
+
+
 def _is_interactive_tty() -> bool:
     return bool(sys.stdin.isatty() and sys.stdout.isatty())
 
@@ -188,13 +190,13 @@ def run_doctor() -> int:
         warnings.append("tui.py not importable; curses TUI fallback unavailable")
         print("  [WARN] curses TUI not available")
 
-    if WEBUI_AVAILABLE:
+    if WEBUI_AVAILABLE and _importable("toolbox.webui"):
         print("  [OK] browser GUI available (webui.py importable)")
     else:
         warnings.append("webui.py not importable; browser GUI unavailable")
         print("  [WARN] browser GUI not available")
 
-    if DESKTOPUI_AVAILABLE:
+    if DESKTOPUI_AVAILABLE and _importable("toolbox.desktopui"):
         print("  [OK] desktop GUI wrapper available (desktopui.py importable)")
     else:
         warnings.append("desktopui.py not importable; desktop GUI wrapper unavailable")
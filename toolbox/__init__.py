@@ -1,6 +1,11 @@
-"""Toolbox UI modules."""
+"""Toolbox UI modules.
 
-from . import desktopui, textui, tool_parser, tui, webui
+Submodules are imported on first use (``toolbox.webui`` or
+``import toolbox.webui``), so loading the package for one UI does not pull
+in the HTTP server, curses and the other front ends.
+"""
+
+import importlib
 
 __all__ = [
 	"desktopui",
@@ -9,3 +14,9 @@ __all__ = [
 	"tui",
 	"webui",
 ]
+
+
+def __getattr__(name):
+	if name in __all__:
+		return importlib.import_module(f"{__name__}.{name}")
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")